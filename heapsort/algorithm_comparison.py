@@ -1,7 +1,16 @@
-import time
+import os
+import sys
 import random
 from heapsort import heapsort
 from randomized_quicksort import randomized_quicksort
+from introsort import introsort
+from parallel_sort import parallel_sort
+from selection import median, percentiles
+from numpy_heapsort import heapsort_array, np
+
+# The timing harness lives in the sibling priority_queue/ directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "priority_queue"))
+from benchmark import measure  # noqa: E402
 
 
 def generate_random_array(n):
@@ -19,25 +28,87 @@ def generate_reverse_sorted_array(n):
     return list(range(n, 0, -1))
 
 
-def run_algorithm(algorithm, arr, *args):
-    """Run the sorting algorithm and measure execution time"""
-    # Create a copy to avoid modifying the original array
-    arr_copy = arr.copy()
+def generate_few_unique_array(n, unique=10):
+    """Generate an array of size n drawing from only a few distinct values"""
+    return [random.randint(0, unique - 1) for _ in range(n)]
+
+
+def generate_nearly_sorted_array(n, swaps=0.01):
+    """Generate a sorted array of size n with a fraction of random swaps"""
+    arr = list(range(n))
+    for _ in range(int(n * swaps)):
+        i, j = random.randrange(n), random.randrange(n)
+        arr[i], arr[j] = arr[j], arr[i]
+    return arr
+
+
+def generate_organ_pipe_array(n):
+    """Generate an array of size n ascending to the middle and descending after it"""
+    return list(range(n // 2)) + list(range(n - n // 2, 0, -1))
+
+
+def generate_quicksort_adversarial_array(n, algorithm=introsort):
+    """
+    Generate an array of size n that drives a deterministic quicksort into its worst case
+    (McIlroy's "killer adversary")
+
+    The algorithm sorts placeholder elements whose values are only fixed when a comparison
+    needs them: two unfixed elements compare by freezing the one not suspected to be the
+    pivot as the next smallest value, so every pivot ends up near the top of its partition.
+    Replaying the frozen values makes the same comparisons happen on a plain array.
+    The default target is introsort, randomized quicksort picks its pivots at random
+    and is attacked through duplicates instead (generate_few_unique_array)
+    """
+    gas = n  # Value of unfixed elements, larger than every frozen value
+    values = [gas] * n
+    state = {"frozen": 0, "candidate": 0}
 
-    start_time = time.time()
-    if algorithm == randomized_quicksort:
-        high = args[0] if args else None
-        algorithm(arr_copy, 0, high)
-    else:
-        algorithm(arr_copy)
-    end_time = time.time()
+    def compare(x, y):
+        if (values[x] == gas and values[y] == gas):
+            frozen = x if x == state["candidate"] else y
+            values[frozen] = state["frozen"]
+            state["frozen"] += 1
+        if (values[x] == gas):
+            state["candidate"] = x
+        elif (values[y] == gas):
+            state["candidate"] = y
+        return values[x] - values[y]
 
-    return end_time - start_time
+    class Placeholder:
+        __slots__ = ("index",)
+
+        def __init__(self, index):
+            self.index = index
+
+        def __lt__(self, other):
+            return compare(self.index, other.index) < 0
+
+        def __gt__(self, other):
+            return compare(self.index, other.index) > 0
+
+    algorithm([Placeholder(i) for i in range(n)])
+    return values
+
+
+def run_algorithm(algorithm, arr, *args, warmup=1, trials=5):
+    """
+    Run the sorting algorithm on fresh copies of arr and measure its execution time
+    Returns the median over the timed trials in seconds
+    """
+    def sort(arr_copy):
+        if algorithm == randomized_quicksort:
+            high = args[0] if args else None
+            algorithm(arr_copy, 0, high)
+        else:
+            algorithm(arr_copy)
+
+    # Create a copy to avoid modifying the original array
+    return measure(sort, arr.copy, warmup=warmup, trials=trials).median_ns / 1e9
 
 
 def compare_sorting_algorithms():
     """
-    Compare heapsort with quicksort performance
+    Compare heapsort with quicksort and introsort performance
     on different input sizes and distributions
     """
     # Define input sizes to test
@@ -50,9 +121,17 @@ def compare_sorting_algorithms():
         'Reverse Sorted': generate_reverse_sorted_array
     }
 
+    # Define the algorithms to compare, with a function preparing their input
+    algorithms = {
+        'Heap': (heapsort, list),
+        'Quick': (randomized_quicksort, list),
+        'Intro': (introsort, list),
+    }
+    if (np is not None):
+        algorithms['NumPy Heap'] = (heapsort_array, np.array)
+
     # Store results
-    heapsort_times = {dist: [] for dist in distributions}
-    quicksort_times = {dist: [] for dist in distributions}
+    times = {name: {dist: [] for dist in distributions} for name in algorithms}
 
     # Run the comparison
     for size in input_sizes:
@@ -62,29 +141,78 @@ def compare_sorting_algorithms():
             # Generate array according to distribution
             arr = dist_func(size)
 
-            # Test heapsort
-            heap_time = run_algorithm(heapsort, arr)
-            heapsort_times[dist_name].append(heap_time)
-            print(f"  Heapsort on {dist_name} distribution: {heap_time:.6f} seconds")
-
-            # Test quicksort (with high parameter set to n-1)
-            quick_time = run_algorithm(randomized_quicksort, arr, len(arr) - 1)
-            quicksort_times[dist_name].append(quick_time)
-            print(f"  Quicksort on {dist_name} distribution: {quick_time:.6f} seconds")
+            for name, (algorithm, prepare) in algorithms.items():
+                # Quicksort is called with the high parameter set to n-1
+                elapsed = run_algorithm(algorithm, prepare(arr), len(arr) - 1)
+                times[name][dist_name].append(elapsed)
+                print(f"  {name}sort on {dist_name} distribution: {elapsed:.6f} seconds")
 
     # Print a summary table
+    width = 15 + 26 * len(distributions) * len(algorithms)
     print("\nSummary Table (Execution times in seconds):")
-    print("=" * 80)
+    print("=" * width)
     print(f"{'Array Size':<15}", end="")
     for dist_name in distributions:
-        print(f"{dist_name + ' Heap':<15}{dist_name + ' Quick':<15}", end="")
+        for name in algorithms:
+            print(f"{dist_name + ' ' + name:<26}", end="")
     print()
-    print("-" * 80)
+    print("-" * width)
 
     for i, size in enumerate(input_sizes):
         print(f"{size:<15}", end="")
         for dist_name in distributions:
-            print(f"{heapsort_times[dist_name][i]:<15.6f}{quicksort_times[dist_name][i]:<15.6f}", end="")
+            for name in algorithms:
+                print(f"{times[name][dist_name][i]:<26.6f}", end="")
+        print()
+
+
+def compare_parallel_scaling(size=400000, max_workers=None):
+    """
+    Measure how parallel_sort scales from 1 to max_workers worker processes
+    on a random array, reporting the speedup over a single worker
+    """
+    max_workers = max_workers or os.cpu_count()
+    arr = generate_random_array(size)
+
+    print(f"\nParallel Sort Scaling (random array of {size} elements, {os.cpu_count()} CPUs):")
+    print("=" * 45)
+    print(f"{'Workers':<15}{'Time (s)':<15}{'Speedup':<15}")
+    print("-" * 45)
+    baseline = None
+    for workers in range(1, max_workers + 1):
+        elapsed = run_algorithm(lambda a: parallel_sort(a, workers=workers), arr, warmup=0, trials=3)
+        baseline = baseline or elapsed
+        print(f"{workers:<15}{elapsed:<15.6f}{baseline / elapsed:<15.2f}")
+
+
+def compare_selection_algorithms():
+    """
+    Compare selection of the median and of the p50/p90/p99/p999 percentiles
+    with fully sorting the array, on random arrays of different sizes
+    """
+    input_sizes = [10000, 50000, 100000, 500000]
+    contenders = {
+        'Median': median,
+        'Percentiles': percentiles,
+        'Intro Sort': introsort,
+        'Quick Sort': randomized_quicksort,
+    }
+
+    width = 15 + 15 * len(contenders)
+    print("\nSelection vs Full Sort (Execution times in seconds):")
+    print("=" * width)
+    print(f"{'Array Size':<15}", end="")
+    for name in contenders:
+        print(f"{name:<15}", end="")
+    print()
+    print("-" * width)
+
+    for size in input_sizes:
+        arr = generate_random_array(size)
+        print(f"{size:<15}", end="")
+        for name, algorithm in contenders.items():
+            elapsed = run_algorithm(algorithm, arr, len(arr) - 1)
+            print(f"{elapsed:<15.6f}", end="")
         print()
 
 
@@ -92,6 +220,8 @@ if __name__ == "__main__":
 
     # Run the comparison
     compare_sorting_algorithms()
+    compare_parallel_scaling(max_workers=max(os.cpu_count(), 4))
+    compare_selection_algorithms()
 
     # Additional verification test with a small array
     test_array = [generate_random_array(10)]
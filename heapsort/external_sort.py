@@ -0,0 +1,413 @@
+import array
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from bisect import bisect_right
+
+from heapsort import heapify, heapsort
+
+# The merge uses the priority queue of the sibling priority_queue/ directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "priority_queue"))
+from priority_queue import Task, MinHeapPriorityQueue  # noqa: E402
+
+# Default number of records held in memory at once
+DEFAULT_MEMORY_LIMIT = 1000000
+
+# Default number of records per disk read or write
+DEFAULT_BLOCK_SIZE = 8192
+
+
+class IOStats:
+    """
+    Counters of the disk traffic of an external sort
+    """
+
+    def __init__(self):
+        self.records = 0  # Records read from the input
+        self.runs = 0  # Initial runs written by replacement selection
+        self.merge_passes = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.read_time = 0.0  # Seconds spent in disk reads
+        self.write_time = 0.0  # Seconds spent in disk writes
+
+    def read_throughput(self):
+        """Read throughput in MB/s"""
+        return self.bytes_read / self.read_time / 1e6 if self.read_time else 0.0
+
+    def write_throughput(self):
+        """Write throughput in MB/s"""
+        return self.bytes_written / self.write_time / 1e6 if self.write_time else 0.0
+
+    def __str__(self):
+        """Summary of the counters"""
+        return (f"{self.records} records, {self.runs} runs, {self.merge_passes} merge passes, "
+                f"read {self.bytes_read / 1e6:.1f} MB at {self.read_throughput():.1f} MB/s, "
+                f"wrote {self.bytes_written / 1e6:.1f} MB at {self.write_throughput():.1f} MB/s")
+
+
+class RunWriter:
+    """
+    Buffered writer of a binary file of fixed-width records (raw array.array data)
+    """
+
+    def __init__(self, path, typecode, block_size, stats):
+        self.file = open(path, "wb")
+        self.buffer = array.array(typecode)
+        self.block_size = block_size
+        self.stats = stats
+
+    def write(self, value):
+        """Append one record"""
+        self.buffer.append(value)
+        if (len(self.buffer) >= self.block_size):
+            self.flush()
+
+    def write_block(self, values):
+        """Append a sequence of records"""
+        self.buffer.extend(values)
+        if (len(self.buffer) >= self.block_size):
+            self.flush()
+
+    def flush(self):
+        """Write the buffered records to the file"""
+        start = time.perf_counter()
+        self.buffer.tofile(self.file)
+        self.stats.write_time += time.perf_counter() - start
+        self.stats.bytes_written += len(self.buffer) * self.buffer.itemsize
+        del self.buffer[:]
+
+    def close(self):
+        """Flush and close the file"""
+        self.flush()
+        self.file.close()
+
+
+class RunReader:
+    """
+    Buffered reader of a binary file of fixed-width records, one block at a time
+    block holds the current block and position the index of the next unread record in it
+    """
+
+    def __init__(self, path, typecode, block_size, stats):
+        self.file = open(path, "rb")
+        self.typecode = typecode
+        self.block_size = block_size
+        self.stats = stats
+        self.block = array.array(typecode)
+        self.position = 0
+
+    def fill(self):
+        """
+        Make sure the current block has an unread record, reading the next block if needed
+        Returns False once the file is exhausted
+        """
+        if (self.position < len(self.block)):
+            return True
+
+        block = array.array(self.typecode)
+        start = time.perf_counter()
+        try:
+            block.fromfile(self.file, self.block_size)
+        except EOFError:  # The last block is short, fromfile() keeps what it read
+            pass
+        self.stats.read_time += time.perf_counter() - start
+        self.stats.bytes_read += len(block) * block.itemsize
+        self.block = block
+        self.position = 0
+        return len(block) > 0
+
+    def __iter__(self):
+        """Iterate over the remaining records"""
+        while (self.fill()):
+            block, self.block = self.block[self.position:], array.array(self.typecode)
+            yield from block
+
+    def close(self):
+        """Close the file"""
+        self.file.close()
+
+
+def replacement_selection(values, memory_limit):
+    """
+    Split a stream of values into sorted runs with replacement selection
+
+    A heap of memory_limit values outputs its smallest value and takes the next input
+    in its place. Inputs smaller than the last output cannot join the current run,
+    so they are parked behind the shrinking heap and seed the next run once the heap
+    is empty. On random input the runs are about 2 * memory_limit long.
+    The heap is a max heap of negated values built with heapify() from heapsort.
+
+    Args:
+        values: Iterable of numbers
+        memory_limit: Maximum number of values held at once
+
+    Yields:
+        (run, value) pairs, values ascending within each run and runs numbered from 0
+    """
+    iterator = iter(values)
+    heap = [-value for _, value in zip(range(memory_limit), iterator)]
+    size = len(heap)  # heap[:size] is the current run's heap, heap[size:] the next run's values
+    for i in range(size // 2 - 1, -1, -1):
+        heapify(heap, size, i)
+
+    run = 0
+    for value in iterator:
+        top = -heap[0]
+        yield run, top
+        if (value >= top):
+            heap[0] = -value
+        else:
+            size -= 1
+            heap[0] = heap[size]
+            heap[size] = -value
+        heapify(heap, size, 0)
+
+        if (size == 0):
+            # The current run is over, the parked values form the next heap
+            run += 1
+            size = len(heap)
+            for i in range(size // 2 - 1, -1, -1):
+                heapify(heap, size, i)
+
+    # Input is exhausted: finish the current run, then the parked values form one last run
+    current = heapsort([-value for value in heap[:size]])
+    for value in current:
+        yield run, value
+    for value in heapsort([-value for value in heap[size:]]):
+        yield run + 1, value
+
+
+def merge_readers(readers):
+    """
+    Merge sorted run files with a k-way merge through a min-heap of run readers
+
+    The heap holds one task per unfinished reader, task_id is the reader index and
+    priority its next record. Every record of the top reader's current block up to the
+    next record of the other readers is emitted as one slice.
+
+    Args:
+        readers: List of RunReader objects over sorted runs
+
+    Yields:
+        array.array slices of records in ascending order
+    """
+    heads = MinHeapPriorityQueue()
+    heads.insert_many([Task(index, reader.block[reader.position])
+                       for index, reader in enumerate(readers) if reader.fill()])
+
+    while (not heads.is_empty()):
+        index = heads.peek().task_id
+        reader = readers[index]
+        block, start = reader.block, reader.position
+
+        # Smallest next record among the other readers
+        second = heads.peek_second()
+        if (second is None):
+            stop = len(block)
+        else:
+            stop = bisect_right(block, second.priority, start + 1)
+
+        yield block[start:stop]
+        reader.position = stop
+        if (reader.fill()):
+            heads.change_priority(index, reader.block[reader.position])
+        else:
+            heads.extract()
+
+
+def _sorted_blocks(source, memory_limit, block_size, typecode, tmp_dir, stats):
+    """
+    Run the three stages of the external sort: run generation, intermediate merge passes
+    and the final merge, yielding the final merge's blocks
+    """
+    if (isinstance(source, (str, os.PathLike))):
+        source_reader = RunReader(source, typecode, block_size, stats)
+        values = iter(source_reader)
+    else:
+        source_reader = None
+        values = iter(source)
+
+    def counted(values):
+        for value in values:
+            stats.records += 1
+            yield value
+
+    # Every reader of a merge buffers one block, one more block is the output buffer
+    fan_in = max(2, memory_limit // block_size - 1)
+    directory = tempfile.mkdtemp(prefix="external_sort_", dir=tmp_dir)
+    try:
+        # Stage 1: spill the runs of replacement selection to disk
+        paths = []
+        writer = None
+        current_run = None
+        try:
+            for run, value in replacement_selection(counted(values), memory_limit):
+                if (run != current_run):
+                    if (writer is not None):
+                        writer.close()
+                        writer = None
+                    paths.append(os.path.join(directory, f"run-{len(paths):06d}.bin"))
+                    writer = RunWriter(paths[-1], typecode, block_size, stats)
+                    current_run = run
+                writer.write(value)
+        finally:
+            # Also when the source raises mid-stream
+            if (writer is not None):
+                writer.close()
+            if (source_reader is not None):
+                source_reader.close()
+        stats.runs = len(paths)
+
+        # Stage 2: merge groups of fan_in runs until one final merge is enough
+        while (len(paths) > fan_in):
+            stats.merge_passes += 1
+            merged = []
+            for i in range(0, len(paths), fan_in):
+                group = paths[i:i + fan_in]
+                if (len(group) == 1):
+                    merged.append(group[0])
+                    continue
+                merged.append(os.path.join(directory, f"pass-{stats.merge_passes}-{len(merged):06d}.bin"))
+                readers = []
+                try:
+                    for path in group:
+                        readers.append(RunReader(path, typecode, block_size, stats))
+                    writer = RunWriter(merged[-1], typecode, block_size, stats)
+                    try:
+                        for block in merge_readers(readers):
+                            writer.write_block(block)
+                    finally:
+                        writer.close()
+                finally:
+                    for reader in readers:
+                        reader.close()
+                for path in group:
+                    os.remove(path)
+            paths = merged
+
+        # Stage 3: final merge
+        if (paths):
+            stats.merge_passes += 1
+        readers = []
+        try:
+            for path in paths:
+                readers.append(RunReader(path, typecode, block_size, stats))
+            yield from merge_readers(readers)
+        finally:
+            for reader in readers:
+                reader.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def external_sorted(source, memory_limit=DEFAULT_MEMORY_LIMIT, block_size=DEFAULT_BLOCK_SIZE,
+                    typecode="q", tmp_dir=None, stats=None):
+    """
+    Sort a dataset larger than memory, yielding the values in ascending order
+
+    Args:
+        source: Iterable of numbers, or path of a binary file of typecode records
+        memory_limit: Maximum number of records held in memory by each stage
+        block_size: Number of records per disk read or write
+        typecode: array.array typecode of the records, "q" for 64-bit ints, "d" for floats
+        tmp_dir: Directory for the run files, defaults to the system temporary directory
+        stats: Optional IOStats object to fill in
+
+    Returns:
+        Iterator over the values in ascending order, the arguments are checked right away
+        and the sort itself runs as the iterator is consumed
+    """
+    if (block_size < 1 or memory_limit < 2 * block_size):
+        raise ValueError("memory_limit must hold at least two blocks of block_size records")
+    stats = stats if stats is not None else IOStats()
+    return _sorted_values(_sorted_blocks(source, memory_limit, block_size, typecode, tmp_dir, stats))
+
+
+def _sorted_values(blocks):
+    """Flatten the sorted blocks of the final merge into values"""
+    for block in blocks:
+        yield from block
+
+
+def external_sort(source, output, memory_limit=DEFAULT_MEMORY_LIMIT, block_size=DEFAULT_BLOCK_SIZE,
+                  typecode="q", tmp_dir=None):
+    """
+    Sort a dataset larger than memory into a binary file of typecode records
+
+    Args:
+        source: Iterable of numbers, or path of a binary file of typecode records
+        output: Path of the sorted output file
+        memory_limit: Maximum number of records held in memory by each stage
+        block_size: Number of records per disk read or write
+        typecode: array.array typecode of the records, "q" for 64-bit ints, "d" for floats
+        tmp_dir: Directory for the run files, defaults to the system temporary directory
+
+    Returns:
+        IOStats of the sort, including the output file
+    """
+    if (block_size < 1 or memory_limit < 2 * block_size):
+        raise ValueError("memory_limit must hold at least two blocks of block_size records")
+    stats = IOStats()
+    writer = RunWriter(output, typecode, block_size, stats)
+    try:
+        for block in _sorted_blocks(source, memory_limit, block_size, typecode, tmp_dir, stats):
+            writer.write_block(block)
+    finally:
+        writer.close()
+    return stats
+
+
+if __name__ == "__main__":
+    # Replacement selection makes runs of about twice the memory limit on random input
+    values = [random.randint(0, 10 ** 9) for _ in range(200000)]
+    runs = [run for run, _ in replacement_selection(values, 5000)]
+    assert 15 <= runs[-1] + 1 <= 25
+
+    # Streaming input and output, with several merge passes
+    stats = IOStats()
+    assert list(external_sorted(values, memory_limit=2000, block_size=256, stats=stats)) == sorted(values)
+    assert stats.merge_passes > 1
+    assert list(external_sorted([], memory_limit=2000, block_size=256)) == []
+
+    # Bad limits fail at the call, a failing source leaves no run file open or behind
+    try:
+        external_sorted(values, memory_limit=100, block_size=256)
+        assert False, "memory_limit below two blocks accepted"
+    except ValueError:
+        pass
+
+    def failing_source():
+        yield from values[:10000]
+        raise RuntimeError("source failed")
+
+    directory = tempfile.mkdtemp()
+    try:
+        try:
+            list(external_sorted(failing_source(), memory_limit=2000, block_size=256, tmp_dir=directory))
+            assert False, "source error swallowed"
+        except RuntimeError:
+            pass
+        assert os.listdir(directory) == []
+    finally:
+        shutil.rmtree(directory)
+
+    # File input and output
+    directory = tempfile.mkdtemp()
+    try:
+        source = os.path.join(directory, "input.bin")
+        with open(source, "wb") as file:
+            array.array("d", (random.random() for _ in range(300000))).tofile(file)
+        output = os.path.join(directory, "output.bin")
+        stats = external_sort(source, output, memory_limit=50000, block_size=4096, typecode="d")
+        with open(source, "rb") as file:
+            expected = sorted(array.array("d", file.read()))
+        with open(output, "rb") as file:
+            assert list(array.array("d", file.read())) == expected
+        print(stats)
+    finally:
+        shutil.rmtree(directory)
+    print("\nSorting algorithm works property.\n")
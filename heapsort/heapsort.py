@@ -11,22 +11,25 @@ def heapify(arr, n, i):
         i: Index of the element to use as the root
     """
 
-    largest = i
-    left = 2 * i + 1
-    right = 2 * i + 2
-
-    # Check if left child exists and larger than parent
-    if (left < n and arr[left] > arr[largest]):
-        largest = left
-
-    # Check if right child exists and larger than parent
-    if (right < n and arr[right] > arr[largest]):
-        largest = right
-
-    # Place the largest value of the triangle at the root position
-    if (largest != i):
-        arr[i], arr[largest] = arr[largest], arr[i]
-        heapify(arr,  n, largest)
+    # Lift the root out and shift larger children up into the "hole"
+    # until the root value can be written back once at its final index
+    value = arr[i]
+    child = 2 * i + 1
+    while (child < n):
+        # Pick the larger of the left and right children
+        right = child + 1
+        if (right < n and arr[right] > arr[child]):
+            child = right
+
+        # Stop once no child is larger than the lifted value
+        if (not arr[child] > value):
+            break
+
+        arr[i] = arr[child]
+        i = child
+        child = 2 * i + 1
+
+    arr[i] = value
 
 
 def heapsort(arr):
@@ -0,0 +1,86 @@
+import os
+import random
+import sys
+import time
+
+from heapsort import heapify
+
+# The metrics classes are shared with the priority queue in the sibling priority_queue/ directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "priority_queue"))
+from instrumentation import HeapMetrics  # noqa: E402
+
+
+class _CountingElement:
+    """Wrapper of an array element counting its comparisons"""
+    __slots__ = ("value", "metrics")
+
+    def __init__(self, value, metrics):
+        self.value = value
+        self.metrics = metrics
+
+    def __gt__(self, other):
+        self.metrics.comparisons += 1
+        return self.value > other.value
+
+
+class _CountingList(list):
+    """List counting element writes, i.e. moves (a swap is two moves)"""
+
+    def __init__(self, items, metrics):
+        super().__init__(items)
+        self.metrics = metrics
+
+    def __setitem__(self, index, value):
+        self.metrics.moves += 1
+        list.__setitem__(self, index, value)
+
+
+def instrumented_heapsort(arr, metrics=None):
+    """
+    Sort array in ascending order in place exactly like heapsort(), recording metrics
+
+    Every heapify() call is recorded as a "build_heap" or "extract" operation with its
+    latency, key comparisons, element moves and sift depth. The elements are wrapped
+    while sorting, so the latencies are higher than those of the plain heapsort().
+
+    Args:
+        arr: List of comparable elements to sort
+        metrics: HeapMetrics to record into, a new one by default
+
+    Returns:
+        The HeapMetrics holding the recorded operations
+    """
+    metrics = metrics if metrics is not None else HeapMetrics()
+    work = _CountingList([_CountingElement(value, metrics) for value in arr], metrics)
+    n = len(work)
+
+    def sift(name, size, i):
+        comparisons, moves = metrics.comparisons, metrics.moves
+        start = time.perf_counter_ns()
+        heapify(work, size, i)
+        latency = time.perf_counter_ns() - start
+        metrics.record(name, latency, metrics.comparisons - comparisons, metrics.moves - moves)
+
+    # Same phases as heapsort()
+    for i in range(n // 2 - 1, -1, -1):
+        sift("build_heap", n, i)
+    for i in range(n - 1, 0, -1):
+        work[i], work[0] = work[0], work[i]
+        sift("extract", i, 0)
+
+    arr[:] = [element.value for element in work]
+    return metrics
+
+
+if __name__ == "__main__":
+    arr = [random.randint(0, 500) for _ in range(1000)]
+    expected = sorted(arr)
+    metrics = instrumented_heapsort(arr)
+    assert arr == expected
+
+    snapshot = metrics.snapshot()
+    extract = snapshot["operations"]["extract"]
+    assert extract["count"] == 999 and snapshot["operations"]["build_heap"]["count"] == 500
+    print(f"Comparisons: {snapshot['comparisons']}, moves: {snapshot['moves']}")
+    print(f"Extract sift depth: p50 {extract['sift_depth']['p50']}, max {extract['sift_depth']['max']}")
+    print("\nSorting algorithm works property.\n")
@@ -0,0 +1,146 @@
+import random
+
+from heapsort import heapsort
+
+# Partitions of at most this many elements are finished with insertion sort
+INSERTION_SORT_SIZE = 16
+
+# Partitions of at least this many elements pick their pivot with Tukey's ninther
+NINTHER_SIZE = 128
+
+
+def insertion_sort(arr, low, high):
+    """
+    Sort arr[low..high] in ascending order in place with insertion sort
+
+    Args:
+        arr: Array to be sorted
+        low: Start index
+        high: End index (inclusive)
+    """
+    for i in range(low + 1, high + 1):
+        value = arr[i]
+        j = i - 1
+        # Shift larger elements one position right into the "hole"
+        while (j >= low and value < arr[j]):
+            arr[j + 1] = arr[j]
+            j -= 1
+        arr[j + 1] = value
+
+
+def _median_of_three(arr, a, b, c):
+    """Return the median of the elements at indices a, b and c"""
+    x, y, z = arr[a], arr[b], arr[c]
+    if (x < y):
+        if (y < z):
+            return y
+        return z if x < z else x
+    if (x < z):
+        return x
+    return z if y < z else y
+
+
+def choose_pivot(arr, low, high):
+    """
+    Choose a pivot value for arr[low..high]
+    Median of the first, middle and last elements, or for large partitions
+    the median of three such medians spread over the partition (ninther)
+    """
+    mid = (low + high) // 2
+    if (high - low + 1 < NINTHER_SIZE):
+        return _median_of_three(arr, low, mid, high)
+
+    eighth = (high - low) // 8
+    first = _median_of_three(arr, low, low + eighth, low + 2 * eighth)
+    second = _median_of_three(arr, mid - eighth, mid, mid + eighth)
+    third = _median_of_three(arr, high - 2 * eighth, high - eighth, high)
+    if (first < second):
+        if (second < third):
+            return second
+        return third if first < third else first
+    if (first < third):
+        return first
+    return third if second < third else second
+
+
+def partition_three_way(arr, low, high, pivot):
+    """
+    Three-way (Dutch national flag) partition of arr[low..high] around a pivot value
+
+    Returns:
+        (lt, gt) such that arr[low..lt-1] < pivot, arr[lt..gt] == pivot
+        and arr[gt+1..high] > pivot
+    """
+    lt, i, gt = low, low, high
+    while (i <= gt):
+        value = arr[i]
+        if (value < pivot):
+            arr[lt], arr[i] = value, arr[lt]
+            lt += 1
+            i += 1
+        elif (pivot < value):
+            arr[gt], arr[i] = value, arr[gt]
+            gt -= 1
+        else:
+            i += 1
+    return lt, gt
+
+
+def introsort(arr, low=0, high=None):
+    """
+    Sort array in ascending order in place using introsort
+
+    Quicksort with three-way partitioning, so runs of equal elements are finished in one pass,
+    and median-of-three / ninther pivots. Partitions are kept on an explicit stack instead of
+    recursing, and the smaller side is always processed first, so the stack holds O(log n) entries.
+    A partition that is still being split after 2 * log2(n) levels is sorted with heapsort,
+    which bounds the worst case to O(n log n). Small partitions are finished with insertion sort.
+
+    Args:
+        arr: List of comparable elements to sort
+        low: Start index
+        high: End index (inclusive), defaults to the last index
+
+    Returns:
+        Sorted array in ascending order
+    """
+    if (high is None):
+        high = len(arr) - 1
+    if (high - low < 1):
+        return arr
+
+    stack = [(low, high, 2 * (high - low + 1).bit_length())]
+    while (stack):
+        low, high, depth_limit = stack.pop()
+
+        while (high - low + 1 > INSERTION_SORT_SIZE):
+            if (depth_limit == 0):
+                # Quicksort is degrading on this partition, heapsort it instead
+                arr[low:high + 1] = heapsort(arr[low:high + 1])
+                break
+            depth_limit -= 1
+
+            lt, gt = partition_three_way(arr, low, high, choose_pivot(arr, low, high))
+
+            # Defer the larger side and keep splitting the smaller one
+            if (lt - low < high - gt):
+                stack.append((gt + 1, high, depth_limit))
+                high = lt - 1
+            else:
+                stack.append((low, lt - 1, depth_limit))
+                low = gt + 1
+        else:
+            insertion_sort(arr, low, high)
+    return arr
+
+
+if __name__ == "__main__":
+    for _ in range(5):
+        arr = [random.randint(0, 500) for _ in range(1000)]
+        assert introsort(arr.copy()) == sorted(arr.copy())
+
+    # Sorted, reverse sorted, all-equal and organ-pipe inputs
+    for arr in (list(range(5000)), list(range(5000, 0, -1)), [7] * 5000,
+                list(range(2500)) + list(range(2500, 0, -1))):
+        assert introsort(arr.copy()) == sorted(arr)
+    print("\nSorting algorithm works property.\n")
@@ -0,0 +1,168 @@
+import array
+import random
+
+from heapsort import heapsort
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, heapsort_array() then sorts with the pure-Python heapsort
+    np = None
+
+# Below this many elements a one-dimensional array is sorted by the pure-Python
+# heapsort through a memoryview, which beats per-call NumPy overhead
+SMALL_ARRAY_SIZE = 2000
+
+
+def _sift_down_batch(a, rows, nodes, size):
+    """
+    Sift down many nodes of a 2D array of heaps at once
+
+    Args:
+        a: 2D array, every row is a max heap in the making
+        rows: Row index of every node to sift
+        nodes: Column index of every node to sift, their subtrees must not overlap
+        size: Number of elements of each row that belong to the heap
+    """
+    while (nodes.size):
+        left = 2 * nodes + 1
+        inside = left < size
+        if (not inside.all()):
+            rows, nodes, left = rows[inside], nodes[inside], left[inside]
+            if (not nodes.size):
+                break
+
+        # Pick the larger of the left and right children
+        right = left + 1
+        left_values = a[rows, left]
+        right_values = a[rows, np.minimum(right, size - 1)]
+        pick_right = (right < size) & (right_values > left_values)
+        children = np.where(pick_right, right, left)
+        child_values = np.where(pick_right, right_values, left_values)
+
+        # Swap where the child is larger than its parent and follow those nodes down
+        node_values = a[rows, nodes]
+        swap = child_values > node_values
+        rows, nodes, children = rows[swap], nodes[swap], children[swap]
+        a[rows, nodes] = child_values[swap]
+        a[rows, children] = node_values[swap]
+        nodes = children
+
+
+def heapsort_rows(a):
+    """
+    Sort every row of a 2D NumPy array in ascending order in place with heapsort
+
+    The max heaps of all rows are built level by level: the nodes of one level have
+    disjoint subtrees, so they are all sifted down with the same vectorized compare/swap.
+    Elements are then extracted from all rows at once.
+
+    Args:
+        a: 2D NumPy array
+
+    Returns:
+        The same array with every row sorted
+    """
+    m, n = a.shape
+    if (n < 2 or m == 0):
+        return a
+
+    # Build the max heaps from the deepest level of internal nodes up to the roots
+    last_internal = n // 2 - 1
+    level_start = (1 << (last_internal + 1).bit_length() - 1) - 1
+    while (level_start >= 0):
+        nodes = np.arange(level_start, min(2 * level_start + 1, last_internal + 1))
+        _sift_down_batch(a, np.repeat(np.arange(m), nodes.size), np.tile(nodes, m), n)
+        level_start = (level_start - 1) // 2 if level_start else -1
+
+    # Move the root (maximum) of every row to the end of its heap and restore the heaps
+    all_rows = np.arange(m)
+    roots = np.zeros(m, dtype=np.intp)
+    for end in range(n - 1, 0, -1):
+        a[:, [0, end]] = a[:, [end, 0]]
+        _sift_down_batch(a, all_rows, roots, end)
+    return a
+
+
+def _merge(left, right):
+    """Merge two sorted 1D arrays into one sorted array"""
+    merged = np.empty(left.size + right.size, dtype=left.dtype)
+    merged[np.arange(left.size) + np.searchsorted(right, left, side="left")] = left
+    merged[np.arange(right.size) + np.searchsorted(left, right, side="right")] = right
+    return merged
+
+
+def _heapsort_vector(a):
+    """
+    Sort a large 1D NumPy array in place
+    The array is split into about sqrt(n) rows that are heapsorted together,
+    and the sorted rows are merged pairwise
+    """
+    n = a.size
+    row_length = max(int(n ** 0.5), 2)
+    m = -(-n // row_length)
+
+    # Pad the last row with the maximum so that padding sorts to the end
+    rows = np.full(m * row_length, a.max(), dtype=a.dtype)
+    rows[:n] = a
+    rows = heapsort_rows(rows.reshape(m, row_length))
+
+    runs = list(rows)
+    while (len(runs) > 1):
+        runs = [_merge(runs[i], runs[i + 1]) if i + 1 < len(runs) else runs[i] for i in range(0, len(runs), 2)]
+    a[:] = runs[0][:n]
+
+
+def heapsort_array(arr):
+    """
+    Sort a numeric array in ascending order in place, using NumPy when available
+
+    NumPy arrays and array.array objects are sorted in their own buffer without being
+    copied to a list. A 2D NumPy array has each of its rows sorted independently.
+    Anything else, or any array when NumPy is not installed, falls back to heapsort().
+
+    Args:
+        arr: NumPy array, array.array, or list of comparable elements
+
+    Returns:
+        The same object, sorted in ascending order
+    """
+    if (np is None or not isinstance(arr, (np.ndarray, array.array))):
+        return heapsort(arr)
+
+    if (isinstance(arr, array.array)):
+        if (arr.typecode == "u"):
+            return heapsort(arr)
+        data = np.frombuffer(arr, dtype=arr.typecode)
+    else:
+        data = arr
+
+    if (data.ndim == 2):
+        heapsort_rows(data)
+    elif (data.ndim != 1 or data.dtype.kind not in "biuf"):
+        raise ValueError(f"cannot heapsort a {data.ndim}-dimensional {data.dtype} array")
+    elif (data.size < SMALL_ARRAY_SIZE and data.flags.c_contiguous):
+        heapsort(memoryview(data))
+    else:
+        _heapsort_vector(data)
+    return arr
+
+
+if __name__ == "__main__":
+    if (np is None):
+        print("NumPy is not installed, heapsort_array() falls back to heapsort()")
+        arr = array.array("q", [random.randint(0, 500) for _ in range(1000)])
+        assert list(heapsort_array(arr)) == sorted(arr)
+    else:
+        for size in (0, 1, 2, 1000, 50000):
+            arr = np.random.randint(0, 10000, size)
+            assert (heapsort_array(arr.copy()) == np.sort(arr)).all()
+
+        floats = np.random.random(30001)
+        assert (heapsort_array(floats.copy()) == np.sort(floats)).all()
+
+        batch = np.random.randint(0, 10000, (50, 777))
+        assert (heapsort_array(batch.copy()) == np.sort(batch, axis=1)).all()
+
+        arr = array.array("d", np.random.random(25000))
+        assert list(heapsort_array(arr)) == sorted(arr)
+    print("\nSorting algorithm works property.\n")
@@ -0,0 +1,161 @@
+import array
+import os
+import random
+import sys
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from introsort import introsort
+
+# The k-way merge uses the priority queue of the sibling priority_queue/ directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "priority_queue"))
+from priority_queue import Task, MinHeapPriorityQueue  # noqa: E402
+
+# Arrays smaller than this are sorted in the calling process,
+# process start-up and the merge would cost more than they save
+PARALLEL_THRESHOLD = 50000
+
+
+def _typecode_of(arr):
+    """
+    array.array typecode able to hold every element of arr without changing its type,
+    or None if the elements are not all 64-bit ints or all floats
+    """
+    if (all(type(x) is int for x in arr)):
+        if (-2 ** 63 <= min(arr) and max(arr) < 2 ** 63):
+            return "q"
+        return None
+    if (all(type(x) is float for x in arr)):
+        return "d"
+    return None
+
+
+def _sort_shared_chunk(name, typecode, start, stop, kernel):
+    """
+    Worker: sort the elements start..stop-1 of a shared memory block in place
+    Only the block name and the bounds cross the process boundary, not the data
+    """
+    block = shared_memory.SharedMemory(name=name)
+    view = block.buf.cast(typecode)
+    try:
+        chunk = view[start:stop].tolist()
+        kernel(chunk)
+        view[start:stop] = array.array(typecode, chunk)
+    finally:
+        # An exported view makes close() raise BufferError, hiding the kernel's error
+        view.release()
+        block.close()
+
+
+def _sort_chunk(chunk, kernel):
+    """Worker: sort a chunk that was sent by pickling and return it"""
+    return kernel(chunk)
+
+
+def merge_runs(runs, out):
+    """
+    Merge sorted runs into out with a k-way merge driven by a min-heap of run heads
+
+    The heap holds one task per non-empty run, task_id is the run index and priority
+    the run's current head. Every element of the top run up to the smaller head of the
+    other runs is copied at once, so presorted data moves in slices rather than one
+    heap operation per element.
+
+    Args:
+        runs: List of sorted lists
+        out: List to write the merged elements into, at least as long as all runs together
+    """
+    heads = MinHeapPriorityQueue()
+    heads.insert_many([Task(index, run[0]) for index, run in enumerate(runs) if run])
+    positions = [0] * len(runs)
+    written = 0
+
+    while (not heads.is_empty()):
+        index = heads.peek().task_id
+        run = runs[index]
+        start = positions[index]
+
+        # Smallest head among the other runs
+        second = heads.peek_second()
+        if (second is None):
+            stop = len(run)
+        else:
+            stop = bisect_right(run, second.priority, start + 1)
+
+        out[written:written + stop - start] = run[start:stop]
+        written += stop - start
+        positions[index] = stop
+        if (stop < len(run)):
+            heads.change_priority(index, run[stop])
+        else:
+            heads.extract()
+
+
+def parallel_sort(arr, workers=None, kernel=introsort):
+    """
+    Sort array in ascending order in place on several CPU cores
+
+    The array is split into one chunk per worker and the chunks are sorted in a process
+    pool with kernel. Arrays of ints or floats are handed to the workers through one
+    shared memory block, other arrays are pickled. The sorted runs are then merged
+    with merge_runs().
+
+    Args:
+        arr: List of comparable elements to sort
+        workers: Number of worker processes, defaults to the number of CPUs
+        kernel: Function sorting a list in place, e.g. introsort, heapsort or randomized_quicksort
+
+    Returns:
+        Sorted array in ascending order
+    """
+    workers = workers or os.cpu_count()
+    n = len(arr)
+    if (workers < 2 or n < PARALLEL_THRESHOLD):
+        kernel(arr)
+        return arr
+
+    bounds = [n * i // workers for i in range(workers + 1)]
+    typecode = _typecode_of(arr)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        if (typecode is None):
+            runs = list(executor.map(_sort_chunk, [arr[bounds[i]:bounds[i + 1]] for i in range(workers)],
+                                     [kernel] * workers))
+        else:
+            data = array.array(typecode, arr)
+            block = shared_memory.SharedMemory(create=True, size=max(len(data) * data.itemsize, 1))
+            view = block.buf.cast(typecode)
+            try:
+                view[:] = data
+                del data
+                futures = [executor.submit(_sort_shared_chunk, block.name, typecode, bounds[i], bounds[i + 1], kernel)
+                           for i in range(workers)]
+                for future in futures:
+                    future.result()
+                runs = [view[bounds[i]:bounds[i + 1]].tolist() for i in range(workers)]
+            finally:
+                # Release the view first, so that a worker's error is not replaced by a BufferError
+                view.release()
+                block.close()
+                block.unlink()
+
+    merge_runs(runs, arr)
+    return arr
+
+
+if __name__ == "__main__":
+    for _ in range(3):
+        arr = [random.randint(0, 10000) for _ in range(100000)]
+        assert parallel_sort(arr.copy(), workers=4) == sorted(arr)
+
+    floats = [random.random() for _ in range(60000)]
+    assert parallel_sort(floats.copy(), workers=3) == sorted(floats)
+
+    words = [str(random.randint(0, 10 ** 6)) for _ in range(60000)]
+    assert parallel_sort(words.copy(), workers=2) == sorted(words)
+
+    merged = [None] * 8
+    merge_runs([[1, 4, 4, 9], [], [2, 3, 10], [4]], merged)
+    assert merged == [1, 2, 3, 4, 4, 4, 9, 10]
+    print("\nSorting algorithm works property.\n")
@@ -0,0 +1,171 @@
+import math
+import random
+from bisect import bisect_left, bisect_right
+
+from randomized_quicksort import partition
+from introsort import insertion_sort, partition_three_way
+
+# Ranges of at most this many elements are finished with insertion sort
+INSERTION_SORT_SIZE = 16
+
+# Randomized partitioning may touch this many elements per input element (times log2 of
+# the number of ranks) before the remaining work switches to median-of-medians pivots
+WORK_FACTOR = 6
+
+
+def median_of_medians(arr, low, high):
+    """
+    Return a pivot value for arr[low..high] that has at least about 30% of the
+    elements on either side (BFPRT): the median of the medians of groups of five
+    Time complexity: O(n)
+    """
+    medians = []
+    for start in range(low, high + 1, 5):
+        group = arr[start:min(start + 5, high + 1)]
+        insertion_sort(group, 0, len(group) - 1)
+        medians.append(group[(len(group) - 1) // 2])
+
+    if (len(medians) <= 5):
+        insertion_sort(medians, 0, len(medians) - 1)
+        return medians[(len(medians) - 1) // 2]
+    return _multiselect(medians, 0, len(medians) - 1, [(len(medians) - 1) // 2], [0])[0]
+
+
+def _multiselect(arr, low, high, ranks, budget):
+    """
+    Put the elements of the sorted ranks into their sorted positions within arr[low..high]
+
+    Ranges are split with partition() around a random pivot while budget[0] (a shared
+    count of elements that may still be partitioned that way) lasts, then with a
+    three-way partition around the median of medians, which bounds the total to O(n)
+    Ranges without a rank are dropped, so one pass serves every rank at once.
+
+    Returns:
+        The values at the requested ranks
+    """
+    requested = ranks
+    stack = [(low, high, ranks)]
+    while (stack):
+        low, high, ranks = stack.pop()
+        while (ranks):
+            if (high - low + 1 <= INSERTION_SORT_SIZE):
+                insertion_sort(arr, low, high)
+                break
+
+            if (budget[0] > 0):
+                budget[0] -= high - low + 1
+                pivot_index = random.randint(low, high)
+                arr[pivot_index], arr[high] = arr[high], arr[pivot_index]
+                lt = gt = partition(arr, low, high)
+            else:
+                lt, gt = partition_three_way(arr, low, high, median_of_medians(arr, low, high))
+
+            # arr[lt..gt] is final, split the ranks between both sides
+            left = ranks[:bisect_left(ranks, lt)]
+            right = ranks[bisect_right(ranks, gt):]
+            if (left and right):
+                stack.append((gt + 1, high, right))
+            if (left):
+                high, ranks = lt - 1, left
+            else:
+                low, ranks = gt + 1, right
+    return [arr[rank] for rank in requested]
+
+
+def multiselect(arr, ks):
+    """
+    Find several order statistics of arr in one pass
+
+    arr is rearranged in place so that every arr[k] holds the element that would be at
+    index k if arr were sorted, and the elements between two requested ranks lie
+    between their values.
+    Time complexity: O(n log m) for m ranks, O(n) for a single rank
+
+    Args:
+        arr: List of comparable elements
+        ks: Iterable of 0-based ranks
+
+    Returns:
+        List of the values at the ranks, in the order of ks
+    """
+    n = len(arr)
+    ks = list(ks)
+    for k in ks:
+        if (not 0 <= k < n):
+            raise IndexError(f"rank {k} out of range for {n} elements")
+    if (not ks):
+        return []
+
+    ranks = sorted(set(ks))
+    budget = [WORK_FACTOR * n * max(1, math.log2(len(ranks) + 1))]
+    _multiselect(arr, 0, n - 1, ranks, budget)
+    return [arr[k] for k in ks]
+
+
+def quickselect(arr, k):
+    """
+    Return the k-th smallest element (0-based) of arr, rearranging arr in place
+    so that arr[k] holds it, smaller or equal elements precede it and larger or
+    equal elements follow it
+    Time complexity: O(n)
+
+    Args:
+        arr: List of comparable elements
+        k: 0-based rank
+
+    Returns:
+        The k-th smallest element
+    """
+    return multiselect(arr, [k])[0]
+
+
+def percentiles(values, ps=(50, 90, 99, 99.9)):
+    """
+    Compute percentiles with the nearest-rank method without sorting
+
+    Args:
+        values: Iterable of comparable elements, not modified
+        ps: Percentiles in the range 0-100
+
+    Returns:
+        List of the percentile values, in the order of ps
+    """
+    arr = list(values)
+    if (not arr):
+        raise ValueError("percentiles of an empty sequence")
+    n = len(arr)
+    ranks = [min(max(math.ceil(p / 100 * n) - 1, 0), n - 1) for p in ps]
+    return multiselect(arr, ranks)
+
+
+def median(values):
+    """
+    Return the (lower) median of values without sorting
+    Time complexity: O(n)
+    """
+    arr = list(values)
+    if (not arr):
+        raise ValueError("median of an empty sequence")
+    return quickselect(arr, (len(arr) - 1) // 2)
+
+
+if __name__ == "__main__":
+    for _ in range(5):
+        arr = [random.randint(0, 500) for _ in range(1000)]
+        expected = sorted(arr)
+        for k in (0, 1, 499, 998, 999):
+            assert quickselect(arr.copy(), k) == expected[k]
+        ranks = [999, 0, 500, 900, 990, 500]
+        assert multiselect(arr.copy(), ranks) == [expected[k] for k in ranks]
+
+    # Duplicates, presorted input and the median-of-medians path
+    for arr in ([7] * 5000, list(range(5000)), list(range(5000, 0, -1))):
+        assert quickselect(arr.copy(), 2500) == sorted(arr)[2500]
+    arr = [random.random() for _ in range(20000)]
+    assert _multiselect(arr.copy(), 0, len(arr) - 1, [10, 15000], [0]) == [sorted(arr)[10], sorted(arr)[15000]]
+
+    latencies = [random.expovariate(1.0) for _ in range(10000)]
+    p50, p99 = percentiles(latencies, (50, 99))
+    assert p50 == sorted(latencies)[4999] and p99 == sorted(latencies)[9899]
+    assert median([3, 1, 2]) == 2
+    print("\nSelection algorithm works property.\n")
@@ -0,0 +1,59 @@
+import os
+import random
+import sys
+
+from algorithm_comparison import (
+    generate_random_array, generate_sorted_array, generate_reverse_sorted_array, generate_few_unique_array,
+    generate_nearly_sorted_array, generate_organ_pipe_array, generate_quicksort_adversarial_array,
+)
+from heapsort import heapsort
+from randomized_quicksort import randomized_quicksort
+from introsort import introsort
+
+# The timing harness lives in the sibling priority_queue/ directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "priority_queue"))
+from benchmark import DEFAULT_WARMUP, DEFAULT_TRIALS, BenchmarkResult, measure, main  # noqa: E402
+
+DISTRIBUTIONS = {
+    'random': generate_random_array,
+    'sorted': generate_sorted_array,
+    'reverse': generate_reverse_sorted_array,
+    'few-unique': generate_few_unique_array,
+    'nearly-sorted': generate_nearly_sorted_array,
+    'organ-pipe': generate_organ_pipe_array,
+    'quicksort-adversarial': generate_quicksort_adversarial_array,
+}
+
+ALGORITHMS = {
+    'heapsort': heapsort,
+    'randomized_quicksort': randomized_quicksort,
+    'introsort': introsort,
+}
+
+
+def sorting_suite(warmup=DEFAULT_WARMUP, trials=DEFAULT_TRIALS, quick=False):
+    """
+    Benchmark every sorting algorithm on every input distribution
+    Returns a list of BenchmarkResult, times are per element sorted
+    A case that fails (e.g. randomized quicksort exceeding the recursion limit
+    on few-unique input) is recorded with its error instead of samples
+    """
+    sizes = [1000, 10000] if quick else [1000, 10000, 100000]
+    results = []
+    for size in sizes:
+        for dist_name, dist_func in DISTRIBUTIONS.items():
+            # Every algorithm sees the same input
+            random.seed(size)
+            arr = dist_func(size)
+            for name, algorithm in ALGORITHMS.items():
+                params = {"distribution": dist_name, "size": size}
+                try:
+                    result = measure(algorithm, arr.copy, name, params, size, warmup, trials)
+                except RecursionError as error:
+                    result = BenchmarkResult(name, params, ops=size, error=f"RecursionError: {error}")
+                results.append(result)
+    return results
+
+
+if __name__ == "__main__":
+    sys.exit(main(sorting_suite))
@@ -0,0 +1,250 @@
+import random
+from itertools import islice
+
+from heapsort import heapify
+
+
+class _Reversed:
+    """
+    Wrapper inverting the order of a value
+    Lets the max heap of heapify() keep the smallest element at its root
+    """
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __gt__(self, other):
+        return other.value > self.value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+    def __eq__(self, other):
+        # Tuples compare their items with "==" first, equal keys must fall through to the tie-breaker
+        return self.value == other.value
+
+
+def _sift_down_min(heap, n, i):
+    """
+    Min heap counterpart of heapify(): move heap[i] down until no child is smaller
+    Only compares with "<", so heap elements need not define ">"
+    """
+    value = heap[i]
+    child = 2 * i + 1
+    while (child < n):
+        # Pick the smaller of the left and right children
+        right = child + 1
+        if (right < n and heap[right] < heap[child]):
+            child = right
+
+        if (not heap[child] < value):
+            break
+
+        heap[i] = heap[child]
+        i = child
+        child = 2 * i + 1
+
+    heap[i] = value
+
+
+def _sort_entries(heap):
+    """Sort a max heap of entries in ascending order in place (the extraction phase of heapsort)"""
+    for i in range(len(heap) - 1, 0, -1):
+        heap[i], heap[0] = heap[0], heap[i]
+        heapify(heap, i, 0)
+
+
+def nsmallest(iterable, k, key=None):
+    """
+    Return the k smallest elements of an iterable in ascending order
+
+    A max heap of the k smallest elements seen so far is kept, and each new element
+    replaces the root when it is smaller. Equal elements keep their input order.
+    Time complexity: O(n log k), memory: O(k)
+
+    Args:
+        iterable: Any iterable, consumed once
+        k: Number of elements to return
+        key: Optional function mapping an element to its sort key
+
+    Returns:
+        List of at most k elements
+    """
+    if (k <= 0):
+        return []
+
+    iterator = iter(iterable)
+    # Entries are (key, index, element), the index breaks ties and keeps equal keys stable
+    if (key is None):
+        heap = [(element, index) for index, element in enumerate(islice(iterator, k))]
+    else:
+        heap = [(key(element), index, element) for index, element in enumerate(islice(iterator, k))]
+    size = len(heap)
+    for i in range(size // 2 - 1, -1, -1):
+        heapify(heap, size, i)
+
+    if (size == k):
+        index = k
+        for element in iterator:
+            element_key = element if key is None else key(element)
+            # Later elements with an equal key never beat the root
+            if (element_key < heap[0][0]):
+                heap[0] = (element, index) if key is None else (element_key, index, element)
+                heapify(heap, size, 0)
+            index += 1
+
+    _sort_entries(heap)
+    return [entry[-1] if key is not None else entry[0] for entry in heap]
+
+
+def nlargest(iterable, k, key=None):
+    """
+    Return the k largest elements of an iterable in descending order
+
+    Same as nsmallest() with the order of the keys reversed.
+    Equal elements keep their input order.
+    Time complexity: O(n log k), memory: O(k)
+
+    Args:
+        iterable: Any iterable, consumed once
+        k: Number of elements to return
+        key: Optional function mapping an element to its sort key
+
+    Returns:
+        List of at most k elements
+    """
+    if (k <= 0):
+        return []
+
+    iterator = iter(iterable)
+    get_key = key or (lambda element: element)
+    heap = [(_Reversed(get_key(element)), index, element) for index, element in enumerate(islice(iterator, k))]
+    size = len(heap)
+    for i in range(size // 2 - 1, -1, -1):
+        heapify(heap, size, i)
+
+    if (size == k):
+        index = k
+        for element in iterator:
+            element_key = get_key(element)
+            # The root holds the smallest kept key, later equal keys never beat it
+            if (heap[0][0].value < element_key):
+                heap[0] = (_Reversed(element_key), index, element)
+                heapify(heap, size, 0)
+            index += 1
+
+    _sort_entries(heap)
+    return [element for _, _, element in heap]
+
+
+def top_k(iterable, k, key=None, largest=True):
+    """
+    Return the k best elements of an iterable, best first
+
+    Args:
+        iterable: Any iterable, consumed once
+        k: Number of elements to return
+        key: Optional function mapping an element to its sort key
+        largest: If True the largest keys are best, otherwise the smallest
+
+    Returns:
+        List of at most k elements
+    """
+    if (largest):
+        return nlargest(iterable, k, key)
+    return nsmallest(iterable, k, key)
+
+
+def partial_sort(arr, k):
+    """
+    Rearrange arr in place so that arr[:k] holds its k smallest elements in ascending order
+    The order of the remaining elements is unspecified
+
+    A max heap is built over arr[:k], every later element smaller than the root is
+    swapped in, and the heap is finally sorted with the extraction phase of heapsort.
+    Time complexity: O(n log k), no extra memory
+
+    Args:
+        arr: List of comparable elements
+        k: Number of leading elements to sort
+
+    Returns:
+        The same array
+    """
+    n = len(arr)
+    k = min(k, n)
+    if (k <= 0):
+        return arr
+
+    for i in range(k // 2 - 1, -1, -1):
+        heapify(arr, k, i)
+
+    for i in range(k, n):
+        if (arr[i] < arr[0]):
+            arr[i], arr[0] = arr[0], arr[i]
+            heapify(arr, k, 0)
+
+    for i in range(k - 1, 0, -1):
+        arr[i], arr[0] = arr[0], arr[i]
+        heapify(arr, i, 0)
+    return arr
+
+
+def lazy_heapsort(iterable, key=None, reverse=False):
+    """
+    Yield the elements of an iterable in sorted order, one at a time
+
+    The heap is built in O(n), then every element taken costs O(log n), so consuming
+    only the first k elements costs O(n + k log n). Equal elements keep their input order.
+
+    Args:
+        iterable: Any finite iterable
+        key: Optional function mapping an element to its sort key
+        reverse: If True yield the largest elements first
+
+    Yields:
+        Elements in ascending order, or descending if reverse is True
+    """
+    # Entries are (key, index, element) unless plain elements sort themselves
+    decorated = key is not None or reverse
+    get_key = key or (lambda element: element)
+    if (not decorated):
+        heap = list(iterable)
+    elif (reverse):
+        heap = [(_Reversed(get_key(element)), index, element) for index, element in enumerate(iterable)]
+    else:
+        heap = [(get_key(element), index, element) for index, element in enumerate(iterable)]
+
+    n = len(heap)
+    for i in range(n // 2 - 1, -1, -1):
+        _sift_down_min(heap, n, i)
+
+    while (n):
+        element = heap[0][2] if decorated else heap[0]
+        n -= 1
+        heap[0] = heap[n]
+        heap.pop()
+        if (n):
+            _sift_down_min(heap, n, 0)
+        yield element
+
+
+if __name__ == "__main__":
+    for _ in range(5):
+        arr = [random.randint(0, 500) for _ in range(1000)]
+        for k in (0, 1, 10, 999, 1000, 2000):
+            assert nsmallest(iter(arr), k) == sorted(arr)[:k]
+            assert nlargest(iter(arr), k) == sorted(arr, reverse=True)[:k]
+            assert partial_sort(arr.copy(), k)[:k] == sorted(arr)[:k]
+
+        assert list(lazy_heapsort(arr)) == sorted(arr)
+        assert list(lazy_heapsort(arr, reverse=True)) == sorted(arr, reverse=True)
+
+    # Keys and stability
+    pairs = [(random.randint(0, 20), i) for i in range(500)]
+    assert nsmallest(pairs, 50, key=lambda p: p[0]) == sorted(pairs, key=lambda p: p[0])[:50]
+    assert top_k(pairs, 50, key=lambda p: p[0]) == sorted(pairs, key=lambda p: p[0], reverse=True)[:50]
+    assert list(lazy_heapsort(pairs, key=lambda p: p[0], reverse=True)) == sorted(pairs, key=lambda p: p[0],
+                                                                                    reverse=True)
+    print("\nSorting algorithm works property.\n")
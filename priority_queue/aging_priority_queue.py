@@ -0,0 +1,190 @@
+from priority_queue import Task, MaxHeapPriorityQueue
+
+
+class AgingPriorityQueue:
+    """
+    Max-priority queue whose waiting tasks gain priority over time
+
+    The effective priority of a task at time now is
+        min(priority + rate * (now - arrival_time), ceiling)
+    for priorities below the ceiling, and its plain priority otherwise.
+
+    Aging needs no per-task updates: priority + rate * (now - arrival_time) equals the
+    static key priority - rate * arrival_time plus rate * now, an offset shared by all
+    tasks, so the heap ordered by the static key stays ordered at any time, and so does
+    its capped version. Advancing the clock is O(1), whatever the number of queued tasks.
+
+    Tasks whose priority is at or above the ceiling live in a separate heap ordered by
+    plain priority and always go first. Below the ceiling, a later arrival only overtakes
+    a task of priority p if it arrived less than (ceiling - p) / rate after it, which
+    bounds the starvation of low priority tasks under sustained high priority load.
+    """
+
+    def __init__(self, rate, ceiling=None, now=0):
+        """
+        Initialize an empty priority queue
+        rate: priority gained per time unit of waiting, in the unit of Task.arrival_time
+        ceiling: optional priority that aging never goes beyond
+        now: current time, the global aging offset is rate * now
+        """
+        if (rate < 0):
+            raise ValueError(f"rate must not be negative, got {rate!r}")
+
+        self.rate = rate
+        self.ceiling = ceiling
+        self.now = now
+        self.aging = MaxHeapPriorityQueue(key=self._aged_key)  # Tasks below the ceiling
+        self.urgent = MaxHeapPriorityQueue()  # Tasks at or above the ceiling
+
+    def _aged_key(self, task):
+        """Static sort key, the effective priority at time 0"""
+        return task.priority - self.rate * task.arrival_time
+
+    def _queue_for(self, priority):
+        """Heap holding tasks of a priority"""
+        if (self.ceiling is not None and priority >= self.ceiling):
+            return self.urgent
+        return self.aging
+
+    def _find(self, task_id):
+        """Heap holding a task and the task, or (None, None) if it is not in the queue"""
+        for queue in (self.urgent, self.aging):
+            if (task_id in queue):
+                return queue, queue.heap[queue.task_position[task_id]]
+        return None, None
+
+    def advance(self, now):
+        """
+        Move the clock to now, aging every queued task
+        Time complexity: O(1)
+        """
+        if (now < self.now):
+            raise ValueError(f"time cannot go backwards, {now!r} < {self.now!r}")
+        self.now = now
+
+    def effective_priority(self, task):
+        """Priority of a task after aging until the current time"""
+        if (self._queue_for(task.priority) is self.urgent):
+            return task.priority
+        aged = task.priority + self.rate * (self.now - task.arrival_time)
+        return aged if self.ceiling is None else min(aged, self.ceiling)
+
+    def is_empty(self):
+        """
+        Check if the priority queue is empty
+        Time complexity: O(1)
+        """
+        return self.urgent.is_empty() and self.aging.is_empty()
+
+    def __len__(self):
+        """Number of tasks in the priority queue"""
+        return len(self.urgent) + len(self.aging)
+
+    def __contains__(self, task_id):
+        """Check if a task with the given id is in the priority queue"""
+        return task_id in self.urgent or task_id in self.aging
+
+    def insert(self, task):
+        """
+        Insert a new task into the priority queue, aged from its arrival_time
+        Time complexity: O(log n) where n is the number of tasks
+        """
+        self._queue_for(task.priority).insert(task)
+
+    def insert_many(self, tasks):
+        """
+        Insert a batch of tasks into the priority queue
+        Time complexity: O(min(k log(n + k), n + k)) where k is the batch size
+        """
+        urgent, aging = [], []
+        for task in tasks:
+            (urgent if self._queue_for(task.priority) is self.urgent else aging).append(task)
+        self.urgent.insert_many(urgent)
+        self.aging.insert_many(aging)
+
+    @classmethod
+    def from_tasks(cls, tasks, **kwargs):
+        """
+        Create a priority queue holding all tasks of an iterable at once
+        Keyword arguments are passed to the constructor
+        Time complexity: O(n) where n is the number of tasks
+        """
+        pq = cls(**kwargs)
+        pq.insert_many(tasks)
+        return pq
+
+    def peek(self):
+        """
+        Return the task with the highest effective priority without removing it
+        Time complexity: O(1)
+        """
+        return self.urgent.peek() if not self.urgent.is_empty() else self.aging.peek()
+
+    def extract_max(self):
+        """
+        Remove and return the task with the highest effective priority
+        Tasks capped at the ceiling leave in order of their uncapped priority
+        Time complexity: O(log n) where n is the number of tasks
+        """
+        return self.urgent.extract() if not self.urgent.is_empty() else self.aging.extract()
+
+    extract = extract_max
+
+    def remove(self, task_id):
+        """
+        Remove a task from the priority queue
+        Time complexity: O(log n) where n is the number of tasks
+        """
+        queue, _ = self._find(task_id)
+        return queue is not None and queue.remove(task_id)
+
+    def change_priority(self, task_id, new_priority):
+        """
+        Set the base priority of a task, keeping its arrival_time and so its accumulated age
+        Time complexity: O(log n) where n is the number of tasks
+        """
+        queue, task = self._find(task_id)
+        if (queue is None):
+            return False
+
+        target = self._queue_for(new_priority)
+        if (target is queue):
+            return queue.change_priority(task_id, new_priority)
+        queue.remove(task_id)
+        task.priority = new_priority
+        target.insert(task)
+        return True
+
+    def increase_key(self, task_id, new_priority):
+        """
+        Increase the base priority of a task
+        Time complexity: O(log n) where n is the number of tasks
+        """
+        _, task = self._find(task_id)
+        if (task is None or new_priority <= task.priority):
+            return False  # New priority is not larger
+        return self.change_priority(task_id, new_priority)
+
+    def decrease_key(self, task_id, new_priority):
+        """
+        Decrease the base priority of a task
+        Time complexity: O(log n) where n is the number of tasks
+        """
+        _, task = self._find(task_id)
+        if (task is None or new_priority >= task.priority):
+            return False  # New priority is not smaller
+        return self.change_priority(task_id, new_priority)
+
+
+if __name__ == "__main__":
+    # One low priority task against a stream of high priority ones
+    pq = AgingPriorityQueue(rate=1, ceiling=100)
+    pq.insert(Task("low", 1, 0))
+    for tick in range(1000):
+        pq.advance(tick)
+        pq.insert(Task(tick, 50, tick))
+        task = pq.extract_max()
+        if (task.task_id == "low"):
+            break
+    print(f"Low priority task extracted at tick {tick}, bound {(pq.ceiling - 1) / pq.rate:.0f}")
+    assert tick <= (pq.ceiling - 1) / pq.rate
@@ -0,0 +1,363 @@
+import argparse
+import csv
+import gc
+import json
+import math
+import platform
+import random
+import sys
+import time
+
+from priority_queue import Task, MinHeapPriorityQueue, MaxHeapPriorityQueue
+
+# Default number of untimed and timed runs per benchmark case
+DEFAULT_WARMUP = 1
+DEFAULT_TRIALS = 7
+
+# Relative slowdown of the median beyond which compare flags a regression
+DEFAULT_THRESHOLD = 0.10
+
+# z value of a two-sided 95% confidence interval
+Z_95 = 1.96
+
+
+class BenchmarkResult:
+    """
+    Timing samples of one benchmark case and their summary statistics
+    All statistics are in nanoseconds per operation, where ops is the number of
+    operations one timed run performs
+    """
+
+    def __init__(self, name, params=None, samples_ns=(), ops=1, error=None):
+        """
+        name: benchmark name, e.g. "heapsort" or "pq.insert"
+        params: dict of case parameters, e.g. {"size": 1000, "distribution": "random"}
+        samples_ns: duration of every timed run in nanoseconds
+        ops: number of operations per timed run
+        error: message if the case failed instead of producing samples
+        """
+        self.name = name
+        self.params = dict(params or {})
+        self.samples_ns = list(samples_ns)
+        self.ops = ops
+        self.error = error
+
+        per_op = sorted(sample / ops for sample in self.samples_ns)
+        self.median_ns = _quantile(per_op, 0.5)
+        self.q1_ns = _quantile(per_op, 0.25)
+        self.q3_ns = _quantile(per_op, 0.75)
+        self.iqr_ns = self.q3_ns - self.q1_ns if per_op else None
+        self.mean_ns = sum(per_op) / len(per_op) if per_op else None
+        self.ci_low_ns, self.ci_high_ns = _median_confidence_interval(per_op)
+
+    @property
+    def case_id(self):
+        """Identifier of the case, stable across runs and used to match results when comparing"""
+        params = ",".join(f"{key}={value}" for key, value in sorted(self.params.items()))
+        return f"{self.name}[{params}]" if params else self.name
+
+    def to_dict(self):
+        """Serializable form of the result, including the raw samples"""
+        return {
+            "name": self.name,
+            "params": self.params,
+            "ops": self.ops,
+            "error": self.error,
+            "samples_ns": self.samples_ns,
+            "median_ns": self.median_ns,
+            "q1_ns": self.q1_ns,
+            "q3_ns": self.q3_ns,
+            "iqr_ns": self.iqr_ns,
+            "mean_ns": self.mean_ns,
+            "ci_low_ns": self.ci_low_ns,
+            "ci_high_ns": self.ci_high_ns,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a result from to_dict() output, or from a CSV row without samples"""
+        result = cls(data["name"], data.get("params"), data.get("samples_ns") or (), data.get("ops", 1),
+                     data.get("error"))
+        if (not result.samples_ns and not result.error):
+            # CSV rows only carry the summary statistics
+            for field in ("median_ns", "q1_ns", "q3_ns", "iqr_ns", "mean_ns", "ci_low_ns", "ci_high_ns"):
+                setattr(result, field, data.get(field))
+        return result
+
+    def __str__(self):
+        """One-line summary of the result"""
+        if (self.error):
+            return f"{self.case_id}: failed ({self.error})"
+        return (f"{self.case_id}: median {_format_ns(self.median_ns)}/op, IQR {_format_ns(self.iqr_ns)}, "
+                f"95% CI [{_format_ns(self.ci_low_ns)}, {_format_ns(self.ci_high_ns)}], n={len(self.samples_ns)}")
+
+
+def _quantile(sorted_values, q):
+    """Quantile of sorted values with linear interpolation, None for no values"""
+    if (not sorted_values):
+        return None
+    position = (len(sorted_values) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def _median_confidence_interval(sorted_values):
+    """
+    Distribution-free 95% confidence interval of the median from order statistics
+    The bounds are the samples at ranks n/2 -+ 1.96 * sqrt(n) / 2, which needs no
+    assumption about the (usually skewed) distribution of timings
+    """
+    n = len(sorted_values)
+    if (n == 0):
+        return None, None
+    half_width = Z_95 * math.sqrt(n) / 2
+    lower = max(int(math.floor(n / 2 - half_width)), 0)
+    upper = min(int(math.ceil(n / 2 + half_width)), n - 1)
+    return sorted_values[lower], sorted_values[upper]
+
+
+def _format_ns(value):
+    """Human readable duration"""
+    if (value is None):
+        return "-"
+    for unit, scale in (("s", 1e9), ("ms", 1e6), ("us", 1e3)):
+        if (value >= scale):
+            return f"{value / scale:.3f}{unit}"
+    return f"{value:.1f}ns"
+
+
+def measure(func, setup=None, name="benchmark", params=None, ops=1, warmup=DEFAULT_WARMUP,
+            trials=DEFAULT_TRIALS, disable_gc=True):
+    """
+    Time a function over repeated runs with time.perf_counter_ns()
+
+    Args:
+        func: Function to time, called with the return value of setup() if given, else without arguments
+        setup: Optional function preparing fresh state for every run, not timed
+        name: Benchmark name of the result
+        params: Case parameters of the result
+        ops: Number of operations one run performs, statistics are reported per operation
+        warmup: Number of untimed runs before the timed ones
+        trials: Number of timed runs
+        disable_gc: If True, collect garbage before and disable the collector during every run
+
+    Returns:
+        BenchmarkResult of the timed runs
+    """
+    samples = []
+    gc_was_enabled = gc.isenabled()
+    for run in range(warmup + trials):
+        state = setup() if setup is not None else None
+        if (disable_gc):
+            gc.collect()
+            gc.disable()
+        try:
+            start = time.perf_counter_ns()
+            if (setup is not None):
+                func(state)
+            else:
+                func()
+            elapsed = time.perf_counter_ns() - start
+        finally:
+            if (disable_gc and gc_was_enabled):
+                gc.enable()
+        if (run >= warmup):
+            samples.append(elapsed)
+    return BenchmarkResult(name, params, samples, ops)
+
+
+def write_json(results, path):
+    """Write results with their raw samples and some environment metadata to a JSON file"""
+    data = {
+        "metadata": {
+            "python": sys.version.split()[0],
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": [result.to_dict() for result in results],
+    }
+    with open(path, "w") as file:
+        json.dump(data, file, indent=2)
+
+
+CSV_FIELDS = ["name", "params", "ops", "error", "samples", "median_ns", "q1_ns", "q3_ns", "iqr_ns",
+              "mean_ns", "ci_low_ns", "ci_high_ns"]
+
+
+def write_csv(results, path):
+    """Write the summary statistics of results to a CSV file, one row per case"""
+    with open(path, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        for result in results:
+            row = result.to_dict()
+            row["params"] = json.dumps(result.params, sort_keys=True)
+            row["samples"] = len(result.samples_ns)
+            del row["samples_ns"]
+            writer.writerow(row)
+
+
+def load_results(path):
+    """Load results written by write_json() or write_csv(), chosen by the file extension"""
+    if (path.endswith(".csv")):
+        results = []
+        with open(path, newline="") as file:
+            for row in csv.DictReader(file):
+                data = {"name": row["name"], "params": json.loads(row["params"] or "{}"),
+                        "ops": int(row["ops"]), "error": row["error"] or None}
+                for field in ("median_ns", "q1_ns", "q3_ns", "iqr_ns", "mean_ns", "ci_low_ns", "ci_high_ns"):
+                    data[field] = float(row[field]) if row[field] else None
+                results.append(BenchmarkResult.from_dict(data))
+        return results
+
+    with open(path) as file:
+        return [BenchmarkResult.from_dict(data) for data in json.load(file)["results"]]
+
+
+def compare_results(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare two lists of results case by case
+
+    A case regresses when its median got slower by more than threshold (a fraction)
+    and the confidence intervals of both runs do not overlap, so noise alone does
+    not fail a comparison. Improvements are flagged the same way.
+
+    Returns:
+        List of (case_id, baseline median, current median, ratio, status) tuples with
+        status one of "regression", "improvement", "ok", "missing" or "error"
+    """
+    current_by_id = {result.case_id: result for result in current}
+    rows = []
+    for base in baseline:
+        new = current_by_id.get(base.case_id)
+        if (new is None):
+            rows.append((base.case_id, base.median_ns, None, None, "missing"))
+            continue
+        if (base.error or new.error or not base.median_ns):
+            rows.append((base.case_id, base.median_ns, new.median_ns, None, "error"))
+            continue
+
+        ratio = new.median_ns / base.median_ns
+        status = "ok"
+        if (ratio > 1 + threshold and new.ci_low_ns > base.ci_high_ns):
+            status = "regression"
+        elif (ratio < 1 - threshold and new.ci_high_ns < base.ci_low_ns):
+            status = "improvement"
+        rows.append((base.case_id, base.median_ns, new.median_ns, ratio, status))
+    return rows
+
+
+def print_results(results):
+    """Print a table of results"""
+    print(f"{'Case':<72}{'Median/op':<14}{'IQR':<14}{'95% CI':<26}")
+    print("-" * 126)
+    for result in results:
+        if (result.error):
+            print(f"{result.case_id:<71} failed: {result.error}")
+            continue
+        ci = f"[{_format_ns(result.ci_low_ns)}, {_format_ns(result.ci_high_ns)}]"
+        print(f"{result.case_id:<71} {_format_ns(result.median_ns):<14}{_format_ns(result.iqr_ns):<14}{ci:<26}")
+
+
+def print_comparison(rows, threshold=DEFAULT_THRESHOLD):
+    """Print the rows of compare_results() and return the number of regressions"""
+    print(f"{'Case':<72}{'Baseline':<14}{'Current':<14}{'Ratio':<10}{'Status':<12}")
+    print("-" * 122)
+    for case_id, base, new, ratio, status in rows:
+        ratio_text = f"{ratio:.3f}" if ratio is not None else "-"
+        print(f"{case_id:<71} {_format_ns(base):<14}{_format_ns(new):<14}{ratio_text:<10}{status:<12}")
+    regressions = sum(1 for row in rows if row[4] == "regression")
+    print(f"\n{regressions} regression(s) beyond {threshold:.0%}")
+    return regressions
+
+
+def priority_queue_suite(warmup=DEFAULT_WARMUP, trials=DEFAULT_TRIALS, quick=False):
+    """
+    Benchmark the core operations of MinHeapPriorityQueue and MaxHeapPriorityQueue
+    Returns a list of BenchmarkResult, times are per operation
+    """
+    sizes = [1000, 10000] if quick else [1000, 10000, 100000]
+    key_changes = 100
+    results = []
+    for size in sizes:
+        rng = random.Random(size)
+        priorities = [rng.randint(1, 1000) for _ in range(size)]
+
+        def tasks():
+            return [Task(i, priority, 0) for i, priority in enumerate(priorities)]
+
+        def filled(queue_class):
+            return lambda: queue_class.from_tasks(tasks())
+
+        for queue_class, order in ((MinHeapPriorityQueue, "min"), (MaxHeapPriorityQueue, "max")):
+            params = {"order": order, "size": size}
+
+            def insert(state, queue_class=queue_class):
+                queue = queue_class()
+                for task in state:
+                    queue.insert(task)
+
+            def change(queue, order=order):
+                if (order == "min"):
+                    for i in range(key_changes):
+                        queue.decrease_key(i, 0)
+                else:
+                    for i in range(key_changes):
+                        queue.increase_key(i, 1001)
+
+            def extract(queue):
+                for _ in range(size):
+                    queue.extract()
+
+            cases = [
+                ("pq.insert", insert, tasks, size),
+                ("pq.bulk_load", queue_class.from_tasks, tasks, size),
+                ("pq.change_key", change, filled(queue_class), key_changes),
+                ("pq.extract", extract, filled(queue_class), size),
+            ]
+            for name, func, setup, ops in cases:
+                results.append(measure(func, setup, name, params, ops, warmup, trials))
+    return results
+
+
+def main(suite, argv=None):
+    """
+    Command line entry point shared by the benchmark suites
+
+    run: run the suite, print a table and optionally write JSON / CSV results
+    compare: compare two result files and exit with status 1 on regressions
+    """
+    parser = argparse.ArgumentParser(description="Benchmark harness")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run the benchmark suite")
+    run.add_argument("--json", help="write results with raw samples to this JSON file")
+    run.add_argument("--csv", help="write summary statistics to this CSV file")
+    run.add_argument("--warmup", type=int, default=DEFAULT_WARMUP)
+    run.add_argument("--trials", type=int, default=DEFAULT_TRIALS)
+    run.add_argument("--quick", action="store_true", help="only run the smaller cases")
+
+    compare = commands.add_parser("compare", help="compare two result files")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                         help="relative slowdown flagged as a regression (default: 0.10)")
+
+    args = parser.parse_args(argv)
+    if (args.command == "compare"):
+        rows = compare_results(load_results(args.baseline), load_results(args.current), args.threshold)
+        return 1 if print_comparison(rows, args.threshold) else 0
+
+    results = suite(warmup=args.warmup, trials=args.trials, quick=args.quick)
+    print_results(results)
+    if (args.json):
+        write_json(results, args.json)
+    if (args.csv):
+        write_csv(results, args.csv)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(priority_queue_suite))
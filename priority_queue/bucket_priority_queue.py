@@ -0,0 +1,420 @@
+from priority_queue import Task, make_priority_queue
+
+# Upper bound on the number of buckets of a BucketPriorityQueue that detects its range
+DEFAULT_MAX_BUCKETS = 1 << 16
+
+# Buckets per bitmap word, the range of a BucketPriorityQueue grows in whole words
+WORD_BITS = 64
+
+
+def _is_integer(priority):
+    return isinstance(priority, int)
+
+
+class BucketPriorityQueue:
+    """
+    Priority queue implementation using one bucket per integer priority level
+
+    A two-level bitmap (one bit per bucket in 64-bit words, one bit per non-empty word
+    in a summary) finds the lowest or highest non-empty bucket, so insert() and key
+    changes are O(1) and extract() is O(1) plus a few big-integer bit operations.
+    The priority range is either given up front or detected: it starts around the first
+    integer priority and doubles as needed up to max_buckets levels.
+    Tasks whose priority is not an integer or lies outside the range are kept in a
+    binary heap fallback, which extract() consults alongside the buckets.
+    Tasks of equal priority are extracted in no particular order, as in the heap core.
+    """
+
+    def __init__(self, order="min", priority_range=None, max_buckets=DEFAULT_MAX_BUCKETS):
+        """
+        Initialize an empty priority queue
+        order: "min" extracts the task with the smallest priority first, "max" the largest
+        priority_range: optional (low, high) inclusive bounds of the bucketed priorities,
+                        detected from the inserted priorities if None
+        max_buckets: largest number of buckets a detected range may grow to
+        """
+        if (order not in ("min", "max")):
+            raise ValueError(f"order must be 'min' or 'max', got {order!r}")
+        if (max_buckets < 1):
+            raise ValueError(f"max_buckets must be positive, got {max_buckets!r}")
+
+        self.order = order
+        self.max_buckets = -(-max_buckets // WORD_BITS) * WORD_BITS
+        self.fixed = priority_range is not None
+        self.low = None  # Priority of bucket 0
+        self.high = None  # Largest bucketed priority
+        self.buckets = []  # buckets[i] maps task_id to task for priority low + i, None if never used
+        self.words = []  # Bit i % 64 of words[i // 64] is set when bucket i is not empty
+        self.summary = 0  # Bit w is set when words[w] is not zero
+        self.tasks = {}  # Maps task_id to task for the bucketed tasks
+        self.overflow = make_priority_queue(order)  # Binary heap for the other tasks
+
+        if (self.fixed):
+            low, high = priority_range
+            if (not (_is_integer(low) and _is_integer(high)) or high < low):
+                raise ValueError(f"priority_range must be integer bounds (low, high), got {priority_range!r}")
+            self._allocate(low, high)
+
+    def _allocate(self, low, high):
+        """Set up empty buckets for the priorities low ... high"""
+        words = -(-(high - low + 1) // WORD_BITS)
+        self.low = low
+        self.high = high
+        self.buckets = [None] * (words * WORD_BITS)
+        self.words = [0] * words
+
+    def _grow(self, priority):
+        """
+        Extend a detected range to cover an integer priority, by at least doubling it
+        Returns False if the range would exceed max_buckets
+        """
+        if (self.low is None):
+            self._allocate(priority - priority % WORD_BITS, priority - priority % WORD_BITS + WORD_BITS - 1)
+            return True
+
+        size = len(self.buckets)
+        if (priority > self.high):
+            needed = priority - self.low + 1
+            if (needed > self.max_buckets):
+                return False
+            extra = min(max(2 * size, needed), self.max_buckets) - size
+            extra = -(-extra // WORD_BITS) * WORD_BITS
+            self.buckets.extend([None] * extra)
+            self.words.extend([0] * (extra // WORD_BITS))
+        else:
+            needed = self.high - priority + 1
+            if (needed > self.max_buckets):
+                return False
+            extra = min(max(2 * size, needed), self.max_buckets) - size
+            extra = -(-extra // WORD_BITS) * WORD_BITS
+            # Prepending whole words keeps the bitmap aligned, only the summary shifts
+            self.buckets[:0] = [None] * extra
+            self.words[:0] = [0] * (extra // WORD_BITS)
+            self.summary <<= extra // WORD_BITS
+            self.low -= extra
+        self.high = self.low + len(self.buckets) - 1
+        return True
+
+    def _fits(self, priority):
+        """Check if a priority is bucketed, growing a detected range if needed"""
+        if (not _is_integer(priority)):
+            return False
+        if (self.low is not None and self.low <= priority <= self.high):
+            return True
+        return not self.fixed and self._grow(priority)
+
+    def _top_level(self):
+        """Index of the lowest ("min") or highest ("max") non-empty bucket"""
+        summary = self.summary
+        if (self.order == "min"):
+            w = (summary & -summary).bit_length() - 1
+            word = self.words[w]
+            return w * WORD_BITS + (word & -word).bit_length() - 1
+        w = summary.bit_length() - 1
+        return w * WORD_BITS + self.words[w].bit_length() - 1
+
+    def _place(self, task):
+        """Put a task into its bucket, or into the fallback heap"""
+        if (not self._fits(task.priority)):
+            self.overflow.insert(task)
+            return
+
+        i = task.priority - self.low
+        bucket = self.buckets[i]
+        if (bucket is None):
+            bucket = self.buckets[i] = {}
+        if (not bucket):
+            w = i // WORD_BITS
+            if (not self.words[w]):
+                self.summary |= 1 << w
+            self.words[w] |= 1 << (i % WORD_BITS)
+        bucket[task.task_id] = task
+        self.tasks[task.task_id] = task
+
+    def _unlink(self, task_id):
+        """Take a bucketed task out of its bucket and return it"""
+        task = self.tasks.pop(task_id)
+        i = task.priority - self.low
+        bucket = self.buckets[i]
+        del bucket[task_id]
+        if (not bucket):
+            w = i // WORD_BITS
+            self.words[w] &= ~(1 << (i % WORD_BITS))
+            if (not self.words[w]):
+                self.summary &= ~(1 << w)
+        return task
+
+    def _top_bucket(self):
+        """Non-empty bucket holding the next bucketed task"""
+        return self.buckets[self._top_level()]
+
+    def _bucket_first(self):
+        """True if the next task comes from the buckets rather than the fallback heap"""
+        if (not self.tasks):
+            return False
+        if (self.overflow.is_empty()):
+            return True
+        level = self.low + self._top_level()
+        fallback = self.overflow.peek().priority
+        return not (fallback < level if self.order == "min" else fallback > level)
+
+    def is_empty(self):
+        """
+        Check if the priority queue is empty
+        Time complexity: O(1)
+        """
+        return not self.tasks and self.overflow.is_empty()
+
+    def __len__(self):
+        """Number of tasks in the priority queue"""
+        return len(self.tasks) + len(self.overflow)
+
+    def __contains__(self, task_id):
+        """Check if a task with the given id is in the priority queue"""
+        return task_id in self.tasks or task_id in self.overflow
+
+    def insert(self, task):
+        """
+        Insert a new task into the priority queue
+        Time complexity: O(1) for bucketed priorities, O(log n) for the fallback heap
+        """
+        self._place(task)
+
+    def insert_many(self, tasks):
+        """
+        Insert a batch of tasks into the priority queue
+        Time complexity: O(k) for k bucketed tasks
+        """
+        for task in tasks:
+            self._place(task)
+
+    @classmethod
+    def from_tasks(cls, tasks, **kwargs):
+        """
+        Create a priority queue holding all tasks of an iterable at once
+        Keyword arguments are passed to the constructor
+        Time complexity: O(n) where n is the number of tasks
+        """
+        pq = cls(**kwargs)
+        pq.insert_many(tasks)
+        return pq
+
+    def peek(self):
+        """
+        Return the next task without removing it
+        Time complexity: O(1)
+        """
+        if (self._bucket_first()):
+            # extract() pops the most recently inserted task of the bucket
+            return next(reversed(self._top_bucket().values()))
+        return self.overflow.peek()
+
+    def extract(self):
+        """
+        Remove and return the next task
+        Time complexity: O(1) for bucketed priorities, O(log n) for the fallback heap
+        """
+        if (not self._bucket_first()):
+            return self.overflow.extract()
+
+        return self._unlink(next(reversed(self._top_bucket())))
+
+    def remove(self, task_id):
+        """
+        Remove a task from the priority queue
+        Time complexity: O(1) for bucketed priorities, O(log n) for the fallback heap
+        """
+        if (task_id in self.tasks):
+            self._unlink(task_id)
+            return True
+        return self.overflow.remove(task_id)
+
+    def change_priority(self, task_id, new_priority):
+        """
+        Set the priority of a task, moving it between buckets and the fallback heap
+        Time complexity: O(1) for bucketed priorities, O(log n) for the fallback heap
+        """
+        if (task_id in self.tasks):
+            task = self._unlink(task_id)
+        elif (task_id in self.overflow):
+            if (not self._fits(new_priority)):
+                return self.overflow.change_priority(task_id, new_priority)
+            task = self.overflow.heap[self.overflow.task_position[task_id]]
+            self.overflow.remove(task_id)
+        else:
+            return False
+
+        task.priority = new_priority
+        self._place(task)
+        return True
+
+    def _priority_of(self, task_id):
+        """Priority of a task, or None if it is not in the queue"""
+        task = self.tasks.get(task_id)
+        if (task is None and task_id in self.overflow):
+            task = self.overflow.heap[self.overflow.task_position[task_id]]
+        return None if task is None else task.priority
+
+    def decrease_key(self, task_id, new_priority):
+        """
+        Decrease the priority value of a task
+        Time complexity: O(1) for bucketed priorities
+        """
+        priority = self._priority_of(task_id)
+        if (priority is None or new_priority >= priority):
+            return False  # New priority is not smaller
+        return self.change_priority(task_id, new_priority)
+
+    def increase_key(self, task_id, new_priority):
+        """
+        Increase the priority value of a task
+        Time complexity: O(1) for bucketed priorities
+        """
+        priority = self._priority_of(task_id)
+        if (priority is None or new_priority <= priority):
+            return False  # New priority is not larger
+        return self.change_priority(task_id, new_priority)
+
+
+class BucketMinPriorityQueue(BucketPriorityQueue):
+    """
+    Bucket priority queue extracting tasks with lowest priority value first
+    """
+
+    def __init__(self, priority_range=None, max_buckets=DEFAULT_MAX_BUCKETS):
+        super().__init__("min", priority_range, max_buckets)
+
+    extract_min = BucketPriorityQueue.extract
+
+
+class BucketMaxPriorityQueue(BucketPriorityQueue):
+    """
+    Bucket priority queue extracting tasks with highest priority value first
+    """
+
+    def __init__(self, priority_range=None, max_buckets=DEFAULT_MAX_BUCKETS):
+        super().__init__("max", priority_range, max_buckets)
+
+    extract_max = BucketPriorityQueue.extract
+
+
+class RadixHeapPriorityQueue(BucketPriorityQueue):
+    """
+    Monotone priority queue implementation using a radix heap
+
+    Meant for Dijkstra-style workloads, where no inserted or changed priority is smaller
+    than the last extracted one. Bucket b holds the tasks whose priority first differs
+    from the last extracted priority at bit b - 1 (bucket 0: equal priorities).
+    extract_min() empties the lowest non-empty bucket into lower ones, so each task
+    moves at most once per bit and extraction is O(log C) amortized for priorities
+    up to C, while insert() and key changes are O(1).
+    Tasks with a non-integer priority, or one below the last extracted priority,
+    are kept in a binary heap fallback.
+    """
+
+    def __init__(self, start=0):
+        """
+        Initialize an empty priority queue
+        start: smallest priority that is bucketed before the first extraction
+        """
+        if (not _is_integer(start)):
+            raise ValueError(f"start must be an integer, got {start!r}")
+
+        self.order = "min"
+        self.last = start  # Last extracted bucketed priority
+        self.buckets = [{}]  # buckets[b] maps task_id to task
+        self.nonempty = 0  # Bit b is set when buckets[b] is not empty
+        self.tasks = {}  # Maps task_id to task for the bucketed tasks
+        self.overflow = make_priority_queue("min")  # Binary heap for the other tasks
+
+    def _fits(self, priority):
+        """Check if a priority is bucketed"""
+        return _is_integer(priority) and priority >= self.last
+
+    def _place(self, task):
+        """Put a task into its bucket, or into the fallback heap"""
+        if (not self._fits(task.priority)):
+            self.overflow.insert(task)
+            return
+
+        b = (task.priority ^ self.last).bit_length()
+        buckets = self.buckets
+        while (len(buckets) <= b):
+            buckets.append({})
+        buckets[b][task.task_id] = task
+        self.nonempty |= 1 << b
+        self.tasks[task.task_id] = task
+
+    def _unlink(self, task_id):
+        """Take a bucketed task out of its bucket and return it"""
+        task = self.tasks.pop(task_id)
+        b = (task.priority ^ self.last).bit_length()
+        bucket = self.buckets[b]
+        del bucket[task_id]
+        if (not bucket):
+            self.nonempty &= ~(1 << b)
+        return task
+
+    def _settle(self):
+        """
+        Make bucket 0 hold the smallest bucketed priority
+        Redistributes the lowest non-empty bucket around its minimum
+        """
+        nonempty = self.nonempty
+        b = (nonempty & -nonempty).bit_length() - 1
+        if (b == 0):
+            return
+
+        bucket = self.buckets[b]
+        self.buckets[b] = {}
+        self.nonempty &= ~(1 << b)
+        last = self.last = min(task.priority for task in bucket.values())
+        buckets = self.buckets
+        for task_id, task in bucket.items():
+            # Every task lands in a lower bucket, and the minimum in bucket 0
+            level = (task.priority ^ last).bit_length()
+            buckets[level][task_id] = task
+            self.nonempty |= 1 << level
+
+    def _top_bucket(self):
+        """Bucket 0, which holds the smallest bucketed priority after _settle()"""
+        return self.buckets[0]
+
+    def _bucket_first(self):
+        """True if the next task comes from the buckets rather than the fallback heap"""
+        if (not self.tasks):
+            return False
+        self._settle()
+        return self.overflow.is_empty() or not self.overflow.peek().priority < self.last
+
+    extract_min = BucketPriorityQueue.extract
+
+
+if __name__ == "__main__":
+    import random
+
+    pq = BucketMinPriorityQueue()
+    priorities = [random.randint(1, 1000) for _ in range(10000)]
+    pq.insert_many(Task(i, priority, 0) for i, priority in enumerate(priorities))
+    pq.insert(Task("float", 0.5, 0))
+    pq.decrease_key(0, -5)
+    extracted = [pq.extract_min().priority for _ in range(len(pq))]
+    assert extracted == sorted(extracted) and extracted[:2] == [-5, 0.5]
+    print(f"Bucket queue: range {pq.low}..{pq.high}, {len(pq.buckets)} buckets")
+
+    # Dijkstra-style monotone workload
+    radix = RadixHeapPriorityQueue()
+    radix.insert(Task(0, 0, 0))
+    distance = {}
+    while not radix.is_empty():
+        task = radix.extract_min()
+        distance[task.task_id] = task.priority
+        for step in (3, 7):
+            node = task.task_id + step
+            if (node <= 100 and node not in distance):
+                if (node in radix):
+                    radix.decrease_key(node, task.priority + step * step)
+                else:
+                    radix.insert(Task(node, task.priority + step * step, 0))
+    assert distance[21] == 63 and list(distance.values()) == sorted(distance.values())
+    print("Radix heap distances are monotone")
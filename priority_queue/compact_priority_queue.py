@@ -0,0 +1,303 @@
+import math
+from array import array
+
+from priority_queue import Task
+
+# Default bound on task ids: the position table holds 8 bytes per id up to the largest
+# one, so ids above it are rejected rather than allocating gigabytes for one sparse id.
+# 2^26 ids cover tens of millions of pending tasks with a table of at most 512 MiB
+MAX_TASK_ID = (1 << 26) - 1
+
+
+class CompactHeapPriorityQueue:
+    """
+    Priority queue implementation storing the heap in parallel typed arrays
+    Instead of one Task object per entry, priorities, task ids, arrival times and
+    deadlines live in array.array columns, and positions in an array indexed by task id
+    Task ids must be integers from 0 to max_task_id, ideally dense ones
+    Priorities come back in the type of the priority column, not the type they were
+    inserted with: with the default "d" column an inserted 3 is returned as 3.0, and
+    integers beyond 2 ** 53 lose precision. Use "q" for exact integer priorities.
+    """
+
+    def __init__(self, order="min", priority_typecode="d", max_task_id=MAX_TASK_ID):
+        """
+        Initialize an empty priority queue
+        order: "min" extracts the task with the smallest priority first, "max" the largest
+        priority_typecode: array typecode of the priority column,
+                           "d" for float priorities or "q" for int priorities
+        max_task_id: largest accepted task id, bounding the position table to 8 * (max_task_id + 1) bytes
+        """
+        if (order not in ("min", "max")):
+            raise ValueError(f"order must be 'min' or 'max', got {order!r}")
+        if (max_task_id < 0):
+            raise ValueError(f"max_task_id must not be negative, got {max_task_id!r}")
+
+        self.order = order
+        self.max_task_id = max_task_id
+        self.sign = 1 if order == "min" else -1  # Max-heap priorities are stored negated
+        self.priorities = array(priority_typecode)
+        self.task_ids = array("q")
+        self.arrival_times = array("d")
+        self.deadlines = array("d")  # NaN when the task has no deadline
+        self.position = array("q")  # position[task_id] is the heap index, or -1 if absent
+
+    def is_empty(self):
+        """
+        Check if the priority queue is empty
+        Time complexity: O(1)
+        """
+        return len(self.task_ids) == 0
+
+    def __len__(self):
+        """Number of tasks in the priority queue"""
+        return len(self.task_ids)
+
+    def __contains__(self, task_id):
+        """Check if a task with the given id is in the priority queue"""
+        return 0 <= task_id < len(self.position) and self.position[task_id] >= 0
+
+    def _reserve(self, task_id):
+        """Grow the position table so that task_id can index it"""
+        if (not 0 <= task_id <= self.max_task_id):
+            raise ValueError(f"task_id must be an integer from 0 to {self.max_task_id}, got {task_id!r}")
+
+        size = len(self.position)
+        if (task_id >= size):
+            new_size = min(max(task_id + 1, 2 * size), self.max_task_id + 1)
+            self.position.extend(array("q", [-1]) * (new_size - size))
+
+    def _task_at(self, i):
+        """Rebuild the Task stored at heap index i"""
+        deadline = self.deadlines[i]
+        return Task(self.task_ids[i], self.sign * self.priorities[i], self.arrival_times[i],
+                    None if math.isnan(deadline) else deadline)
+
+    def _sift_up(self, i):
+        """Move the entry at index i up until its parent priority is not larger"""
+        priorities, task_ids, position = self.priorities, self.task_ids, self.position
+        arrival_times, deadlines = self.arrival_times, self.deadlines
+
+        priority = priorities[i]
+        task_id = task_ids[i]
+        arrival_time = arrival_times[i]
+        deadline = deadlines[i]
+        while (i > 0):
+            parent = (i - 1) >> 1
+            parent_priority = priorities[parent]
+            if (not priority < parent_priority):
+                break
+            parent_id = task_ids[parent]
+            priorities[i] = parent_priority
+            task_ids[i] = parent_id
+            arrival_times[i] = arrival_times[parent]
+            deadlines[i] = deadlines[parent]
+            position[parent_id] = i
+            i = parent
+        priorities[i] = priority
+        task_ids[i] = task_id
+        arrival_times[i] = arrival_time
+        deadlines[i] = deadline
+        position[task_id] = i
+
+    def _sift_down(self, i):
+        """Move the entry at index i down until no child priority is smaller"""
+        priorities, task_ids, position = self.priorities, self.task_ids, self.position
+        arrival_times, deadlines = self.arrival_times, self.deadlines
+
+        n = len(priorities)
+        priority = priorities[i]
+        task_id = task_ids[i]
+        arrival_time = arrival_times[i]
+        deadline = deadlines[i]
+        child = 2 * i + 1
+        while (child < n):
+            child_priority = priorities[child]
+            right = child + 1
+            if (right < n and priorities[right] < child_priority):
+                child = right
+                child_priority = priorities[right]
+            if (not child_priority < priority):
+                break
+            child_id = task_ids[child]
+            priorities[i] = child_priority
+            task_ids[i] = child_id
+            arrival_times[i] = arrival_times[child]
+            deadlines[i] = deadlines[child]
+            position[child_id] = i
+            i = child
+            child = 2 * i + 1
+        priorities[i] = priority
+        task_ids[i] = task_id
+        arrival_times[i] = arrival_time
+        deadlines[i] = deadline
+        position[task_id] = i
+
+    def _append(self, task):
+        """Append a task to the end of every column"""
+        self._reserve(task.task_id)
+        if (self.position[task.task_id] >= 0):
+            raise ValueError(f"task {task.task_id!r} is already in the queue")
+
+        # A value the typed columns reject must not leave the task marked as present
+        index = len(self.task_ids)
+        try:
+            self.priorities.append(self.sign * task.priority)
+            self.arrival_times.append(task.arrival_time)
+            self.deadlines.append(math.nan if task.deadline is None else task.deadline)
+            self.task_ids.append(task.task_id)
+        except (TypeError, OverflowError):
+            for column in (self.priorities, self.arrival_times, self.deadlines, self.task_ids):
+                del column[index:]
+            raise
+        self.position[task.task_id] = index
+
+    def insert(self, task):
+        """
+        Insert a new task into the priority queue
+        Time complexity: O(log n) where n is the number of tasks
+        """
+        self._append(task)
+        self._sift_up(len(self.task_ids) - 1)
+
+    @classmethod
+    def from_tasks(cls, tasks, **kwargs):
+        """
+        Create a priority queue holding all tasks of an iterable at once
+        Keyword arguments are passed to the constructor
+        Time complexity: O(n) where n is the number of tasks
+        """
+        pq = cls(**kwargs)
+        for task in tasks:
+            pq._append(task)
+        for i in range(len(pq.task_ids) // 2 - 1, -1, -1):
+            pq._sift_down(i)
+        return pq
+
+    def peek(self):
+        """
+        Return the task at the top of the heap without removing it
+        Time complexity: O(1)
+        """
+        return self._task_at(0) if self.task_ids else None
+
+    def extract(self):
+        """
+        Remove and return the task at the top of the heap
+        Time complexity: O(log n) where n is the number of tasks
+        """
+        if (self.is_empty()):
+            return None
+
+        top_task = self._task_at(0)
+        priority = self.priorities.pop()
+        task_id = self.task_ids.pop()
+        arrival_time = self.arrival_times.pop()
+        deadline = self.deadlines.pop()
+        self.position[top_task.task_id] = -1
+
+        if (self.task_ids):  # If heap is not empty after popping
+            self.priorities[0] = priority
+            self.task_ids[0] = task_id
+            self.arrival_times[0] = arrival_time
+            self.deadlines[0] = deadline
+            self._sift_down(0)
+
+        return top_task
+
+    def priority_of(self, task_id):
+        """Return the priority of a queued task, or None if it is not in the queue"""
+        if (task_id not in self):
+            return None
+        return self.sign * self.priorities[self.position[task_id]]
+
+    def change_priority(self, task_id, new_priority):
+        """
+        Set the priority of a task and restore the heap property in either direction
+        Time complexity: O(log n) where n is the number of tasks
+        """
+        if (task_id not in self):
+            return False
+
+        index = self.position[task_id]
+        old_priority = self.priorities[index]
+        self.priorities[index] = self.sign * new_priority
+        if (self.priorities[index] < old_priority):
+            self._sift_up(index)
+        else:
+            self._sift_down(index)
+        return True
+
+
+class CompactMinHeapPriorityQueue(CompactHeapPriorityQueue):
+    """
+    Compact priority queue implementation using min-heap
+    Tasks with lowest priority value are extracted first
+    """
+
+    def __init__(self, priority_typecode="d", max_task_id=MAX_TASK_ID):
+        """
+        Initialize an empty priority queue
+        priority_typecode: array typecode of the priority column
+        max_task_id: largest accepted task id
+        """
+        super().__init__("min", priority_typecode, max_task_id)
+
+    extract_min = CompactHeapPriorityQueue.extract
+
+    def decrease_key(self, task_id, new_priority):
+        """
+        Decrease the priority of a task
+        Time complexity: O(log n) where n is the number of tasks
+        """
+        priority = self.priority_of(task_id)
+        if (priority is None or new_priority >= priority):
+            return False
+        return self.change_priority(task_id, new_priority)
+
+    def increase_key(self, task_id, new_priority):
+        """
+        Increase the priority of a task
+        Time complexity: O(log n) where n is the number of tasks
+        """
+        priority = self.priority_of(task_id)
+        if (priority is None or new_priority <= priority):
+            return False
+        return self.change_priority(task_id, new_priority)
+
+
+class CompactMaxHeapPriorityQueue(CompactHeapPriorityQueue):
+    """
+    Compact priority queue implementation using max-heap
+    Tasks with highest priority value are extracted first
+    """
+
+    def __init__(self, priority_typecode="d", max_task_id=MAX_TASK_ID):
+        """
+        Initialize an empty priority queue
+        priority_typecode: array typecode of the priority column
+        max_task_id: largest accepted task id
+        """
+        super().__init__("max", priority_typecode, max_task_id)
+
+    extract_max = CompactHeapPriorityQueue.extract
+
+    def increase_key(self, task_id, new_priority):
+        """
+        Increase the priority of a task
+        Time complexity: O(log n) where n is the number of tasks
+        """
+        priority = self.priority_of(task_id)
+        if (priority is None or new_priority <= priority):
+            return False
+        return self.change_priority(task_id, new_priority)
+
+    def decrease_key(self, task_id, new_priority):
+        """
+        Decrease the priority of a task
+        Time complexity: O(log n) where n is the number of tasks
+        """
+        priority = self.priority_of(task_id)
+        if (priority is None or new_priority >= priority):
+            return False
+        return self.change_priority(task_id, new_priority)
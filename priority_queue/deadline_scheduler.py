@@ -0,0 +1,196 @@
+from priority_queue import MinHeapPriorityQueue, deadline_key
+
+
+class DeadlineScheduler:
+    """
+    Scheduler tracking tasks by Task.deadline with a hierarchical timing wheel
+
+    Time is divided into ticks. Level 0 of the wheel has one slot per tick, and every
+    higher level has slots wheel_size times wider than the level below. A task sits on
+    the lowest level whose next-wider period it shares with the current tick, and is
+    moved ("cascaded") one level down when the current tick enters its slot.
+    Deadlines beyond the top level go to an overflow heap ordered by deadline.
+    """
+
+    def __init__(self, tick=1.0, wheel_size=256, levels=3, start_time=0):
+        """
+        Initialize an empty scheduler
+        tick: width of a level-0 slot in time units
+        wheel_size: number of slots per level
+        levels: number of wheel levels, the wheel covers tick * wheel_size ** levels
+        start_time: time at which tick 0 starts
+        """
+        if (tick <= 0):
+            raise ValueError(f"tick must be positive, got {tick!r}")
+        if (wheel_size < 2 or levels < 1):
+            raise ValueError("wheel_size must be at least 2 and levels at least 1")
+
+        self.tick = tick
+        self.wheel_size = wheel_size
+        self.levels = levels
+        self.start_time = start_time
+        self.spans = [wheel_size ** level for level in range(levels + 1)]  # Ticks per slot of each level
+        self.current_tick = 0
+        self.wheels = [[{} for _ in range(wheel_size)] for _ in range(levels)]  # Slots map task_id to task
+        self.level_counts = [0] * levels
+        self.overflow = MinHeapPriorityQueue(key=deadline_key)  # Tasks beyond the wheel
+        self.location = {}  # Maps task_id to its (level, slot), or None for the overflow heap
+
+    def __len__(self):
+        """Number of scheduled tasks"""
+        return len(self.location)
+
+    def is_empty(self):
+        """Check if no task is scheduled"""
+        return len(self.location) == 0
+
+    def __contains__(self, task_id):
+        """Check if a task with the given id is scheduled"""
+        return task_id in self.location
+
+    def tick_of(self, time):
+        """Index of the tick containing a point in time"""
+        return int((time - self.start_time) // self.tick)
+
+    def _place(self, task):
+        """Put a task into the wheel slot or overflow heap matching its deadline"""
+        current = self.current_tick
+        deadline_tick = max(self.tick_of(task.deadline), current)  # Overdue tasks go into the current slot
+        spans = self.spans
+        for level in range(self.levels):
+            if (deadline_tick // spans[level + 1] == current // spans[level + 1]):
+                slot = self.wheels[level][deadline_tick // spans[level] % self.wheel_size]
+                slot[task.task_id] = task
+                self.location[task.task_id] = (level, slot)
+                self.level_counts[level] += 1
+                return
+
+        self.overflow.insert(task)
+        self.location[task.task_id] = None
+
+    def schedule(self, task):
+        """
+        Schedule a task by its deadline
+        Time complexity: O(1), O(log m) for deadlines beyond the wheel with m of them
+        """
+        if (task.deadline is None):
+            raise ValueError(f"task {task.task_id!r} has no deadline")
+        if (task.task_id in self.location):
+            raise ValueError(f"task {task.task_id!r} is already scheduled")
+        self._place(task)
+
+    def cancel(self, task_id):
+        """
+        Remove a scheduled task
+        Time complexity: O(1), O(log m) for deadlines beyond the wheel with m of them
+        """
+        if (task_id not in self.location):
+            return False
+
+        location = self.location.pop(task_id)
+        if (location is None):
+            self.overflow.remove(task_id)
+        else:
+            level, slot = location
+            del slot[task_id]
+            self.level_counts[level] -= 1
+        return True
+
+    def _take_slot(self, level, slot, expired):
+        """Remove every task of a slot, appending them to expired"""
+        for task_id, task in slot.items():
+            del self.location[task_id]
+            expired.append(task)
+        self.level_counts[level] -= len(slot)
+        slot.clear()
+
+    def _advance(self, target_tick, expired):
+        """
+        Move the current tick forward to target_tick, collecting tasks of passed ticks
+        Runs of empty levels are skipped in one step instead of tick by tick
+        """
+        size, spans, levels = self.wheel_size, self.spans, self.levels
+        while (self.current_tick < target_tick):
+            current = self.current_tick
+            level0 = self.wheels[0][current % size]
+            if (level0):
+                self._take_slot(0, level0, expired)
+
+            # Jump to the next boundary of the lowest non-empty level
+            next_tick = current + 1
+            level = 0
+            while (level < levels and self.level_counts[level] == 0):
+                next_tick = (current // spans[level + 1] + 1) * spans[level + 1]
+                level += 1
+            if (level == levels):  # The wheel is empty
+                next_tick = target_tick
+            next_tick = min(next_tick, target_tick)
+            self.current_tick = next_tick
+
+            # Pull overflow tasks that now fall within the wheel's range
+            if (next_tick // spans[levels] != current // spans[levels]):
+                top_period = next_tick // spans[levels]
+                overflow = self.overflow
+                while (not overflow.is_empty()
+                       and self.tick_of(overflow.peek().deadline) // spans[levels] <= top_period):
+                    task = overflow.extract_min()
+                    self._place(task)
+
+            # Cascade the slots the new tick has just entered, from the widest level down
+            for level in range(levels - 1, 0, -1):
+                if (next_tick % spans[level] == 0):
+                    slot = self.wheels[level][next_tick // spans[level] % size]
+                    if (slot):
+                        tasks = list(slot.values())
+                        self.level_counts[level] -= len(slot)
+                        slot.clear()
+                        for task in tasks:
+                            self._place(task)
+
+    def pop_expired(self, now):
+        """
+        Remove and return every task whose deadline is at or before now
+        Tasks come out grouped by tick, in deadline order between ticks
+        Time complexity: O(1) amortized per expired task and per elapsed tick
+        """
+        expired = []
+        target_tick = self.tick_of(now)
+        if (target_tick > self.current_tick):
+            self._advance(target_tick, expired)
+
+        # The current tick is only partially over
+        slot = self.wheels[0][self.current_tick % self.wheel_size]
+        due = [task for task in slot.values() if task.deadline <= now]
+        for task in due:
+            del slot[task.task_id]
+            del self.location[task.task_id]
+        self.level_counts[0] -= len(due)
+        expired.extend(due)
+        return expired
+
+    def peek_earliest(self):
+        """
+        Return the task with the earliest deadline without removing it
+        Every level only holds deadlines later than the levels below it, so the
+        first non-empty slot from the current tick onwards contains the earliest task
+        Time complexity: O(wheel_size * levels + k) where k is the size of that slot
+        """
+        size = self.wheel_size
+        for level in range(self.levels):
+            if (self.level_counts[level] == 0):
+                continue
+            wheel = self.wheels[level]
+            for index in range(self.current_tick // self.spans[level] % size, size):
+                if (wheel[index]):
+                    return min(wheel[index].values(), key=deadline_key)
+        return self.overflow.peek()
+
+    def extract_earliest(self):
+        """
+        Remove and return the task with the earliest deadline (earliest-deadline-first)
+        Returns None if no task is scheduled
+        """
+        task = self.peek_earliest()
+        if (task is not None):
+            self.cancel(task.task_id)
+        return task
@@ -0,0 +1,160 @@
+from priority_queue import Task, MinHeapPriorityQueue, make_priority_queue
+
+# Virtual time a tenant of weight 1 advances per dispatched task. Strides are
+# integers so that the tenant heap packs them into stable integer keys
+STRIDE_SCALE = 1 << 20
+
+
+class FairScheduler:
+    """
+    Weighted fair scheduler over per-tenant priority queues (stride scheduling)
+
+    Every tenant with queued tasks has a heap of its own tasks and a virtual finish time,
+    its pass, in a top-level min-heap of tenants. dispatch() serves the tenant with the
+    smallest pass, then advances that pass by the tenant's stride, STRIDE_SCALE / weight,
+    so backlogged tenants are served in proportion to their weights, and tenants with
+    equal passes in the order they became active.
+    A tenant is created by its first insert() and dropped as soon as its queue is
+    empty; when it comes back it starts from the current virtual time, so idle
+    tenants do not bank credit.
+    """
+
+    def __init__(self, weights=None, default_weight=1, order="min"):
+        """
+        Initialize an empty scheduler
+        weights: optional mapping of tenant to weight, a tenant's share of dispatches
+        default_weight: weight of tenants missing from weights
+        order: order of the per-tenant queues, "min" or "max" priority first
+        """
+        if (default_weight <= 0):
+            raise ValueError(f"default_weight must be positive, got {default_weight!r}")
+
+        self.order = order
+        self.default_weight = default_weight
+        self.weights = {}
+        for tenant, weight in (weights or {}).items():
+            self.set_weight(tenant, weight)
+        self.queues = {}  # Maps an active tenant to its priority queue
+        self.tenants = MinHeapPriorityQueue(tie_break="sequence")  # Task(tenant, pass) per active tenant
+        self.virtual_time = 0  # Pass of the last served tenant
+        self.size = 0
+
+    def set_weight(self, tenant, weight):
+        """Set the weight of a tenant, applied from its next dispatch"""
+        if (weight <= 0):
+            raise ValueError(f"weight must be positive, got {weight!r}")
+        self.weights[tenant] = weight
+
+    def stride(self, tenant):
+        """Virtual time the tenant's pass advances per dispatched task"""
+        return max(1, round(STRIDE_SCALE / self.weights.get(tenant, self.default_weight)))
+
+    def is_empty(self):
+        """
+        Check if no tenant has queued tasks
+        Time complexity: O(1)
+        """
+        return self.size == 0
+
+    def __len__(self):
+        """Number of tasks queued over all tenants"""
+        return self.size
+
+    def __contains__(self, tenant):
+        """Check if a tenant currently has queued tasks"""
+        return tenant in self.queues
+
+    def queue_of(self, tenant):
+        """Priority queue of an active tenant, or None"""
+        return self.queues.get(tenant)
+
+    def insert(self, tenant, task):
+        """
+        Queue a task for a tenant, creating the tenant if needed
+        Time complexity: O(log t + log n) for t active tenants and n tasks of the tenant
+        """
+        queue = self.queues.get(tenant)
+        if (queue is None):
+            queue = self.queues[tenant] = make_priority_queue(self.order)
+            self.tenants.insert(Task(tenant, self.virtual_time + self.stride(tenant), 0))
+        queue.insert(task)
+        self.size += 1
+
+    def insert_many(self, tenant, tasks):
+        """Queue a batch of tasks for a tenant"""
+        tasks = list(tasks)
+        if (not tasks):
+            return
+        if (tenant not in self.queues):
+            self.insert(tenant, tasks.pop())
+        self.queues[tenant].insert_many(tasks)
+        self.size += len(tasks)
+
+    def peek(self):
+        """
+        Return (tenant, task) of the next dispatch without removing it
+        Time complexity: O(1)
+        """
+        if (self.tenants.is_empty()):
+            return None
+        tenant = self.tenants.peek().task_id
+        return tenant, self.queues[tenant].peek()
+
+    def dispatch(self):
+        """
+        Remove and return (tenant, task) for the tenant with the smallest pass
+        Time complexity: O(log t + log n) for t active tenants and n tasks of the tenant
+        """
+        if (self.tenants.is_empty()):
+            return None
+
+        entry = self.tenants.peek()
+        tenant = entry.task_id
+        queue = self.queues[tenant]
+        task = queue.extract()
+        self.size -= 1
+        self.virtual_time = entry.priority
+        if (queue.is_empty()):
+            self._drop(tenant)
+        else:
+            self.tenants.change_priority(tenant, entry.priority + self.stride(tenant))
+        return tenant, task
+
+    extract = dispatch
+
+    def _drop(self, tenant):
+        """Forget a tenant whose queue became empty"""
+        del self.queues[tenant]
+        self.tenants.remove(tenant)
+
+    def remove(self, tenant, task_id):
+        """
+        Remove a queued task of a tenant, dropping the tenant if it has no tasks left
+        Time complexity: O(log t + log n)
+        """
+        queue = self.queues.get(tenant)
+        if (queue is None or not queue.remove(task_id)):
+            return False
+        self.size -= 1
+        if (queue.is_empty()):
+            self._drop(tenant)
+        return True
+
+    def change_priority(self, tenant, task_id, new_priority):
+        """
+        Set the priority of a queued task within its tenant's queue
+        Time complexity: O(log n) for n tasks of the tenant
+        """
+        queue = self.queues.get(tenant)
+        return queue is not None and queue.change_priority(task_id, new_priority)
+
+
+if __name__ == "__main__":
+    scheduler = FairScheduler(weights={"gold": 3, "silver": 2})
+    for tenant in ("gold", "silver", "bronze"):
+        scheduler.insert_many(tenant, (Task(i, i, 0) for i in range(60)))
+
+    served = [scheduler.dispatch()[0] for _ in range(60)]
+    shares = {tenant: served.count(tenant) for tenant in ("gold", "silver", "bronze")}
+    print(f"Dispatches per tenant with weights 3:2:1: {shares}")
+    assert shares == {"gold": 30, "silver": 20, "bronze": 10}
@@ -0,0 +1,324 @@
+from priority_queue import HeapPriorityQueue, REHEAPIFY_RATIO, _sift_up, _sift_down
+
+# Initial number of handles, the tables double whenever they run out
+DEFAULT_CAPACITY = 1024
+
+
+class _Entry:
+    """
+    Heap entry of the indexed queue, one per handle and reused when the handle is recycled
+    Its task_id is the handle, so the sifts of the heap core record positions in the
+    position list indexed by handle, without hashing the task's own task_id
+    """
+    __slots__ = ("task_id", "task")
+
+    def __init__(self, handle):
+        self.task_id = handle
+        self.task = None
+
+
+class IndexedHeapPriorityQueue:
+    """
+    Priority queue implementation using a d-ary heap of dense integer handles
+
+    insert() returns a handle that identifies the task until it leaves the queue.
+    Positions and tasks live in preallocated lists indexed by handle, so key changes
+    by handle are plain list indexing, and freed handles are recycled through a free list.
+    The heap is sifted by the same routines as the heap core, over one entry per handle.
+    The task_id API of HeapPriorityQueue stays available through a secondary
+    task_id -> handle map, which can be turned off when only handles are used.
+    A handle must not be used after its task was extracted or removed: it may
+    already identify another task.
+    """
+
+    sort_key = HeapPriorityQueue.sort_key
+    tie_break = None  # Stable tie-breaking is only offered by the heap core
+
+    def __init__(self, order="min", key=None, arity=2, capacity=DEFAULT_CAPACITY, index_task_ids=True):
+        """
+        Initialize an empty priority queue
+        order: "min" extracts the task with the smallest key first, "max" the largest
+        key: optional function mapping a task to its sort key, defaults to its priority
+        arity: number of children per node
+        capacity: number of handles allocated up front
+        index_task_ids: if True, keep the task_id -> handle map for the task_id based methods
+        """
+        if (order not in ("min", "max")):
+            raise ValueError(f"order must be 'min' or 'max', got {order!r}")
+        if (arity < 2):
+            raise ValueError(f"arity must be at least 2, got {arity!r}")
+
+        self.order = order
+        self.key = key
+        self.arity = arity
+        self.heap = []  # Entries in heap order
+        self.keys = []  # Cached sort keys, parallel to the heap
+        capacity = max(capacity, 1)
+        self.position = [-1] * capacity  # position[handle] is the heap index, or -1 for a free handle
+        self.entries = [_Entry(handle) for handle in range(capacity)]  # entries[handle].task holds the handle
+        self.free = list(range(capacity - 1, -1, -1))  # Free handles, the smallest is popped first
+        self.handles = {} if index_task_ids else None  # Maps task_id to handle
+
+    def is_empty(self):
+        """
+        Check if the priority queue is empty
+        Time complexity: O(1)
+        """
+        return len(self.heap) == 0
+
+    def __len__(self):
+        """Number of tasks in the priority queue"""
+        return len(self.heap)
+
+    def __contains__(self, task_id):
+        """Check if a task with the given id is in the priority queue"""
+        return task_id in self._task_ids()
+
+    def _task_ids(self):
+        """The task_id -> handle map, if it is kept"""
+        if (self.handles is None):
+            raise TypeError("task_id lookups need index_task_ids=True")
+        return self.handles
+
+    def is_valid(self, handle):
+        """Check if a handle currently identifies a task in the queue"""
+        return 0 <= handle < len(self.position) and self.position[handle] >= 0
+
+    def handle_of(self, task_id):
+        """Handle of the task with the given id, or None if it is not in the queue"""
+        return self._task_ids().get(task_id)
+
+    def task_of(self, handle):
+        """Task identified by a handle, or None if the handle is free"""
+        return self.entries[handle].task if self.is_valid(handle) else None
+
+    def _grow(self):
+        """Double the handle tables"""
+        old = len(self.position)
+        self.position.extend([-1] * old)
+        self.entries.extend(_Entry(handle) for handle in range(old, 2 * old))
+        self.free.extend(range(2 * old - 1, old - 1, -1))
+
+    def _allocate(self, task):
+        """Take a free handle for a task and return its entry"""
+        if (self.handles is not None):
+            if (task.task_id in self.handles):
+                raise ValueError(f"task {task.task_id!r} is already in the queue")
+        if (not self.free):
+            self._grow()
+
+        entry = self.entries[self.free.pop()]
+        entry.task = task
+        if (self.handles is not None):
+            self.handles[task.task_id] = entry.task_id
+        return entry
+
+    def insert(self, task):
+        """
+        Insert a new task into the priority queue
+        Time complexity: O(log n) where n is the number of tasks
+
+        Returns:
+            The handle of the task
+        """
+        key = self.sort_key(task)
+        entry = self._allocate(task)
+        heap = self.heap
+        heap.append(entry)
+        self.keys.append(key)
+        _sift_up(heap, self.keys, self.position, len(heap) - 1, self.arity)
+        return entry.task_id
+
+    def insert_many(self, tasks):
+        """
+        Insert a batch of tasks into the priority queue
+        A batch at least as large as the current heap is appended and the whole heap
+        is rebuilt bottom-up, smaller batches are sifted up one by one
+        Time complexity: O(min(k log(n + k), n + k)) where k is the batch size
+
+        Returns:
+            List of the handles of the tasks, in the order of tasks
+        """
+        tasks = list(tasks)
+        if (self.handles is not None):
+            # Check the whole batch first, a rebuild must not stop halfway
+            batch_ids = set()
+            for task in tasks:
+                if (task.task_id in self.handles or task.task_id in batch_ids):
+                    raise ValueError(f"task {task.task_id!r} is already in the queue")
+                batch_ids.add(task.task_id)
+        new_keys = [self.sort_key(task) for task in tasks]
+        heap, keys, position, arity = self.heap, self.keys, self.position, self.arity
+        rebuild = len(tasks) * REHEAPIFY_RATIO >= len(heap)
+
+        handles = []
+        for task, key in zip(tasks, new_keys):
+            entry = self._allocate(task)
+            handles.append(entry.task_id)
+            heap.append(entry)
+            keys.append(key)
+            if (rebuild):
+                position[entry.task_id] = len(heap) - 1
+            else:
+                _sift_up(heap, keys, position, len(heap) - 1, arity)
+
+        if (rebuild):
+            for i in range((len(heap) - 2) // arity, -1, -1):
+                _sift_down(heap, keys, position, i, arity)
+        return handles
+
+    @classmethod
+    def from_tasks(cls, tasks, **kwargs):
+        """
+        Create a priority queue holding all tasks of an iterable at once
+        Keyword arguments are passed to the constructor
+        Time complexity: O(n) where n is the number of tasks
+        """
+        pq = cls(**kwargs)
+        pq.insert_many(tasks)
+        return pq
+
+    def peek(self):
+        """
+        Return the task at the top of the heap without removing it
+        Time complexity: O(1)
+        """
+        return self.heap[0].task if self.heap else None
+
+    def peek_handle(self):
+        """Return the handle of the task at the top of the heap, or None if empty"""
+        return self.heap[0].task_id if self.heap else None
+
+    def _remove_at(self, index):
+        """Remove the task at heap index index, free its handle and return the task"""
+        heap, keys, position = self.heap, self.keys, self.position
+        entry = heap[index]
+        old_key = keys[index]
+        last_entry = heap.pop()
+        last_key = keys.pop()
+
+        if (index < len(heap)):  # If the removed task was not the last one
+            heap[index] = last_entry
+            keys[index] = last_key
+            if (last_key < old_key):
+                _sift_up(heap, keys, position, index, self.arity)
+            else:
+                _sift_down(heap, keys, position, index, self.arity)
+
+        task = entry.task
+        entry.task = None
+        position[entry.task_id] = -1
+        self.free.append(entry.task_id)
+        if (self.handles is not None):
+            del self.handles[task.task_id]
+        return task
+
+    def extract(self):
+        """
+        Remove and return the task at the top of the heap, freeing its handle
+        Time complexity: O(log n) where n is the number of tasks
+        """
+        if (not self.heap):
+            return None
+        return self._remove_at(0)
+
+    def change_priority_by_handle(self, handle, new_priority):
+        """
+        Set the priority of the task identified by a handle and restore the heap property
+        Time complexity: O(log n) where n is the number of tasks
+        """
+        if (not 0 <= handle < len(self.position)):
+            return False
+        index = self.position[handle]
+        if (index < 0):
+            return False
+
+        task = self.entries[handle].task
+        task.priority = new_priority
+        keys = self.keys
+        old_key = keys[index]
+        new_key = self.sort_key(task)
+        keys[index] = new_key
+        if (new_key < old_key):
+            _sift_up(self.heap, keys, self.position, index, self.arity)
+        else:
+            _sift_down(self.heap, keys, self.position, index, self.arity)
+        return True
+
+    def remove_by_handle(self, handle):
+        """
+        Remove the task identified by a handle, freeing the handle
+        Time complexity: O(log n) where n is the number of tasks
+        """
+        if (not self.is_valid(handle)):
+            return False
+        self._remove_at(self.position[handle])
+        return True
+
+    def decrease_key_by_handle(self, handle, new_priority):
+        """
+        Decrease the priority value of the task identified by a handle
+        Time complexity: O(log n) where n is the number of tasks
+        """
+        task = self.task_of(handle)
+        if (task is None or new_priority >= task.priority):
+            return False  # New priority is not smaller
+        return self.change_priority_by_handle(handle, new_priority)
+
+    def increase_key_by_handle(self, handle, new_priority):
+        """
+        Increase the priority value of the task identified by a handle
+        Time complexity: O(log n) where n is the number of tasks
+        """
+        task = self.task_of(handle)
+        if (task is None or new_priority <= task.priority):
+            return False  # New priority is not larger
+        return self.change_priority_by_handle(handle, new_priority)
+
+    def decrease_key(self, task_id, new_priority):
+        """Decrease the priority value of a task by task_id"""
+        handle = self._task_ids().get(task_id)
+        return handle is not None and self.decrease_key_by_handle(handle, new_priority)
+
+    def increase_key(self, task_id, new_priority):
+        """Increase the priority value of a task by task_id"""
+        handle = self._task_ids().get(task_id)
+        return handle is not None and self.increase_key_by_handle(handle, new_priority)
+
+    def change_priority(self, task_id, new_priority):
+        """Set the priority of a task by task_id, see change_priority_by_handle()"""
+        handle = self._task_ids().get(task_id)
+        if (handle is None):
+            return False
+        return self.change_priority_by_handle(handle, new_priority)
+
+    def remove(self, task_id):
+        """Remove a task by task_id, see remove_by_handle()"""
+        handle = self._task_ids().get(task_id)
+        if (handle is None):
+            return False
+        return self.remove_by_handle(handle)
+
+
+class IndexedMinHeapPriorityQueue(IndexedHeapPriorityQueue):
+    """
+    Indexed priority queue implementation using min-heap
+    Tasks with lowest priority value are extracted first
+    """
+
+    def __init__(self, key=None, arity=2, capacity=DEFAULT_CAPACITY, index_task_ids=True):
+        super().__init__("min", key, arity, capacity, index_task_ids)
+
+    extract_min = IndexedHeapPriorityQueue.extract
+
+
+class IndexedMaxHeapPriorityQueue(IndexedHeapPriorityQueue):
+    """
+    Indexed priority queue implementation using max-heap
+    Tasks with highest priority value are extracted first
+    """
+
+    def __init__(self, key=None, arity=2, capacity=DEFAULT_CAPACITY, index_task_ids=True):
+        super().__init__("max", key, arity, capacity, index_task_ids)
+
+    extract_max = IndexedHeapPriorityQueue.extract
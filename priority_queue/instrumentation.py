@@ -0,0 +1,290 @@
+import sys
+import time
+
+from priority_queue import HeapPriorityQueue
+
+# Operations timed on an instrumented queue, when its class has them
+OPERATIONS = ("insert", "insert_many", "apply_batch", "extract", "extract_min", "extract_max", "peek",
+              "decrease_key", "increase_key", "change_priority", "remove")
+
+
+class LatencyHistogram:
+    """
+    HDR-style histogram of non-negative integer values (e.g. nanoseconds)
+
+    Values are stored with significant_bits bits of precision: small values exactly,
+    larger ones rounded down into log-linear buckets, so the relative error stays below
+    2 ** -(significant_bits - 1) at any magnitude with a few hundred buckets at most.
+    """
+
+    def __init__(self, significant_bits=7):
+        self.significant_bits = significant_bits
+        self.buckets = {}  # Maps the lower bound of a bucket to its count
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def record(self, value):
+        """Record one value"""
+        shift = value.bit_length() - self.significant_bits
+        bucket = value >> shift << shift if shift > 0 else value
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += value
+        if (self.min is None or value < self.min):
+            self.min = value
+        if (self.max is None or value > self.max):
+            self.max = value
+
+    def percentile(self, p):
+        """Value at percentile p (0-100), as the lower bound of its bucket"""
+        if (not self.count):
+            return None
+        rank = max(1, -(-self.count * p // 100))
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if (seen >= rank):
+                return bucket
+        return self.max
+
+    def snapshot(self):
+        """Summary of the recorded values"""
+        if (not self.count):
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "min": self.min,
+            "mean": self.total / self.count,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "p999": self.percentile(99.9),
+            "max": self.max,
+        }
+
+
+class OperationStats:
+    """Counters and histograms of one kind of operation"""
+
+    def __init__(self):
+        self.count = 0
+        self.comparisons = 0  # Key comparisons over all calls
+        self.moves = 0  # Tasks moved to a new heap index over all calls
+        self.latency_ns = LatencyHistogram()
+        self.sift_depth = LatencyHistogram()  # Levels a task travelled per call
+
+    def snapshot(self):
+        """Summary of the operation"""
+        return {
+            "count": self.count,
+            "comparisons": self.comparisons,
+            "moves": self.moves,
+            "comparisons_per_op": self.comparisons / self.count if self.count else 0.0,
+            "latency_ns": self.latency_ns.snapshot(),
+            "sift_depth": self.sift_depth.snapshot(),
+        }
+
+
+class HeapMetrics:
+    """
+    Metrics collected from instrumented heaps
+
+    comparisons and moves are running counters incremented by the instrumented heap,
+    and every operation records its share of them together with its latency.
+    Exporters are functions called with snapshot() by export(), and automatically
+    every export_every operations if it is set.
+    """
+
+    def __init__(self, export_every=None):
+        self.operations = {}  # Maps an operation name to its OperationStats
+        self.comparisons = 0
+        self.moves = 0
+        self.exporters = []
+        self.export_every = export_every
+        self.gauges = None  # Function returning size gauges of the instrumented heap
+        self.active = False  # True while an operation is being recorded
+        self.recorded = 0
+
+    def operation(self, name):
+        """OperationStats of an operation, created on first use"""
+        stats = self.operations.get(name)
+        if (stats is None):
+            stats = self.operations[name] = OperationStats()
+        return stats
+
+    def record(self, name, latency_ns, comparisons, moves):
+        """Record one operation"""
+        stats = self.operation(name)
+        stats.count += 1
+        stats.comparisons += comparisons
+        stats.moves += moves
+        stats.latency_ns.record(latency_ns)
+        # With hole-based sifts, a task travelling d levels writes d + 1 positions
+        stats.sift_depth.record(max(moves - 1, 0))
+
+        self.recorded += 1
+        if (self.export_every and self.recorded % self.export_every == 0):
+            self.export()
+
+    def add_exporter(self, exporter):
+        """Register a function called with every exported snapshot"""
+        self.exporters.append(exporter)
+
+    def export(self):
+        """Pass a snapshot to every exporter"""
+        snapshot = self.snapshot()
+        for exporter in self.exporters:
+            exporter(snapshot)
+        return snapshot
+
+    def snapshot(self):
+        """Point-in-time summary of all counters, histograms and heap size gauges"""
+        return {
+            "timestamp": time.time(),
+            "comparisons": self.comparisons,
+            "moves": self.moves,
+            "gauges": self.gauges() if self.gauges is not None else {},
+            "operations": {name: stats.snapshot() for name, stats in self.operations.items()},
+        }
+
+    def reset(self):
+        """Clear all counters and histograms"""
+        self.operations = {}
+        self.comparisons = 0
+        self.moves = 0
+        self.recorded = 0
+
+
+class _CountingKey:
+    """Wrapper of a cached sort key counting its comparisons"""
+    __slots__ = ("value", "metrics")
+
+    def __init__(self, value, metrics):
+        self.value = value
+        self.metrics = metrics
+
+    def __lt__(self, other):
+        self.metrics.comparisons += 1
+        return self.value < other.value
+
+
+class _CountingDict(dict):
+    """task_position dictionary counting position writes, i.e. task moves"""
+    __slots__ = ("metrics",)
+
+    def __init__(self, items, metrics):
+        super().__init__(items)
+        self.metrics = metrics
+
+    def __setitem__(self, key, value):
+        self.metrics.moves += 1
+        dict.__setitem__(self, key, value)
+
+
+def _timed(name, method):
+    """Wrap a queue method so that its outermost calls are recorded as operation name"""
+    def wrapper(self, *args, **kwargs):
+        metrics = self.metrics
+        if (metrics.active):  # Called by another recorded operation
+            return method(self, *args, **kwargs)
+
+        metrics.active = True
+        comparisons, moves = metrics.comparisons, metrics.moves
+        start = time.perf_counter_ns()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            latency = time.perf_counter_ns() - start
+            metrics.active = False
+            metrics.record(name, latency, metrics.comparisons - comparisons, metrics.moves - moves)
+
+    wrapper.__name__ = name
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+
+def _instrumented_sort_key(self, task):
+    return _CountingKey(self._base_class.sort_key(self, task), self.metrics)
+
+
+def _instrumented_build_heap(self):
+    self._base_class.build_heap(self)
+    self.task_position = _CountingDict(self.task_position, self.metrics)
+
+
+_instrumented_classes = {}
+
+
+def _instrumented_class(cls):
+    """Subclass of a queue class with recording wrappers around its operations, built once per class"""
+    instrumented = _instrumented_classes.get(cls)
+    if (instrumented is None):
+        namespace = {
+            "_base_class": cls,
+            "sort_key": _instrumented_sort_key,
+            "build_heap": _instrumented_build_heap,
+        }
+        for name in OPERATIONS:
+            if (hasattr(cls, name)):
+                namespace[name] = _timed(name, getattr(cls, name))
+        instrumented = _instrumented_classes[cls] = type(f"Instrumented{cls.__name__}", (cls,), namespace)
+    return instrumented
+
+
+def instrument(queue, metrics=None):
+    """
+    Start collecting metrics from a HeapPriorityQueue (or subclass) instance
+
+    The queue's class is switched to an instrumented subclass that times every operation
+    and counts key comparisons and task moves. Queues that are not instrumented run the
+    plain classes, so instrumentation costs nothing until it is enabled.
+
+    Args:
+        queue: HeapPriorityQueue instance
+        metrics: HeapMetrics to record into, e.g. to share one between several queues
+
+    Returns:
+        The HeapMetrics of the queue
+    """
+    if (not isinstance(queue, HeapPriorityQueue)):
+        raise TypeError(f"can only instrument HeapPriorityQueue instances, got {type(queue).__name__}")
+    if (hasattr(queue, "metrics")):
+        return queue.metrics
+
+    metrics = metrics if metrics is not None else HeapMetrics()
+    queue.metrics = metrics
+    queue.keys = [_CountingKey(key, metrics) for key in queue.keys]
+    queue.task_position = _CountingDict(queue.task_position, metrics)
+    queue.__class__ = _instrumented_class(type(queue))
+    metrics.gauges = lambda: {
+        "size": len(queue),
+        "stored": len(queue.heap),
+        "lazily_removed": len(queue.removed),
+        "task_position_entries": len(queue.task_position),
+        "task_position_bytes": sys.getsizeof(queue.task_position),
+        "depth": _depth(len(queue.heap), queue.arity),
+    }
+    return metrics
+
+
+def uninstrument(queue):
+    """Stop collecting metrics from a queue and restore its plain class"""
+    if (not hasattr(queue, "metrics")):
+        return
+    queue.__class__ = queue._base_class
+    queue.keys = [key.value for key in queue.keys]
+    queue.task_position = dict(queue.task_position)
+    del queue.metrics
+
+
+def _depth(n, arity):
+    """Number of levels of a heap of n tasks"""
+    depth = 0
+    capacity = 1
+    while (n > 0):
+        n -= capacity
+        capacity *= arity
+        depth += 1
+    return depth
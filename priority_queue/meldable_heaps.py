@@ -0,0 +1,410 @@
+from priority_queue import HeapPriorityQueue
+
+
+class _MeldableHeap:
+    """
+    Shared interface of the pointer-based heaps
+    Tasks are addressed by task_id through a dictionary of nodes, and the sort key of
+    every task is cached in its node exactly like HeapPriorityQueue does
+    """
+
+    sort_key = HeapPriorityQueue.sort_key
+    tie_break = None  # Stable tie-breaking is only offered by the heap core
+
+    def __init__(self, order="min", key=None):
+        """
+        Initialize an empty priority queue
+        order: "min" extracts the task with the smallest key first, "max" the largest
+        key: optional function mapping a task to its sort key, defaults to its priority
+        """
+        if (order not in ("min", "max")):
+            raise ValueError(f"order must be 'min' or 'max', got {order!r}")
+
+        self.order = order
+        self.key = key
+        self.nodes = {}  # Maps task_id to the node holding the task
+
+    def __len__(self):
+        """Number of tasks in the priority queue"""
+        return len(self.nodes)
+
+    def is_empty(self):
+        """
+        Check if the priority queue is empty
+        Time complexity: O(1)
+        """
+        return len(self.nodes) == 0
+
+    def __contains__(self, task_id):
+        """Check if a task with the given id is in the priority queue"""
+        return task_id in self.nodes
+
+    def peek(self):
+        """
+        Return the task at the top of the heap without removing it
+        Time complexity: O(1)
+        """
+        top = self._top()
+        return top.task if top is not None else None
+
+    def change_priority(self, task_id, new_priority):
+        """
+        Set the priority of a task
+        Time complexity: O(1) amortized when the task moves towards the top,
+        O(log n) amortized otherwise
+        """
+        node = self.nodes.get(task_id)
+        if (node is None):
+            return False
+
+        node.task.priority = new_priority
+        new_key = self.sort_key(node.task)
+        if (new_key < node.key):
+            node.key = new_key
+            self._improve(node)
+        else:
+            self._delete(node)
+            node.key = new_key
+            self._reset(node)
+            self._add(node)
+        return True
+
+    def decrease_key(self, task_id, new_priority):
+        """
+        Decrease the priority of a task
+        Time complexity: O(1) amortized for a min-heap, O(log n) amortized for a max-heap
+        """
+        node = self.nodes.get(task_id)
+        if (node is None or new_priority >= node.task.priority):
+            return False
+        return self.change_priority(task_id, new_priority)
+
+    def increase_key(self, task_id, new_priority):
+        """
+        Increase the priority of a task
+        Time complexity: O(1) amortized for a max-heap, O(log n) amortized for a min-heap
+        """
+        node = self.nodes.get(task_id)
+        if (node is None or new_priority <= node.task.priority):
+            return False
+        return self.change_priority(task_id, new_priority)
+
+    def remove(self, task_id):
+        """
+        Remove a task from the priority queue
+        Time complexity: O(log n) amortized
+        """
+        node = self.nodes.pop(task_id, None)
+        if (node is None):
+            return False
+        self._delete(node)
+        return True
+
+    def extract(self):
+        """
+        Remove and return the task at the top of the heap
+        Time complexity: O(log n) amortized
+        """
+        top = self._top()
+        if (top is None):
+            return None
+        del self.nodes[top.task.task_id]
+        self._delete(top)
+        return top.task
+
+    def meld(self, other):
+        """
+        Move all tasks of another queue of the same type and order into this one
+        The heaps are linked in O(1), the task_id index of the smaller queue
+        is merged into the larger one in O(min(n, m))
+        """
+        if (type(other) is not type(self) or other.order != self.order or other.key is not self.key):
+            raise ValueError("can only meld queues of the same type, order and key")
+        if (other is self or other.is_empty()):
+            return
+
+        self._meld_roots(other)
+        if (len(other.nodes) > len(self.nodes)):
+            self.nodes, other.nodes = other.nodes, self.nodes
+        self.nodes.update(other.nodes)
+        other.nodes = {}
+        other._clear()
+
+
+class _PairingNode:
+    """Node of a pairing heap"""
+    __slots__ = ("task", "key", "child", "sibling", "prev")
+
+    def __init__(self, task, key):
+        self.task = task
+        self.key = key
+        self.child = None  # First child
+        self.sibling = None  # Next sibling
+        self.prev = None  # Previous sibling, or the parent for a first child
+
+
+def _link(a, b):
+    """Make the root with the larger key the first child of the other, return the new root"""
+    if (b.key < a.key):
+        a, b = b, a
+    b.prev = a
+    b.sibling = a.child
+    if (a.child is not None):
+        a.child.prev = b
+    a.child = b
+    return a
+
+
+def _merge_pairs(first):
+    """
+    Merge a list of sibling subtrees into one tree (two-pass pairing)
+    Pairs are linked left to right, then the results are linked right to left
+    """
+    if (first is None):
+        return None
+
+    pairs = []
+    node = first
+    while (node is not None):
+        a = node
+        b = a.sibling
+        a.prev = a.sibling = None
+        if (b is None):
+            pairs.append(a)
+            break
+        node = b.sibling
+        b.prev = b.sibling = None
+        pairs.append(_link(a, b))
+
+    root = pairs.pop()
+    while (pairs):
+        root = _link(pairs.pop(), root)
+    return root
+
+
+class PairingHeapPriorityQueue(_MeldableHeap):
+    """
+    Priority queue implementation using a pairing heap
+    insert, meld and moving a task towards the top are O(1) amortized
+    (decrease_key in a min-heap, increase_key in a max-heap)
+    """
+
+    def __init__(self, order="min", key=None):
+        super().__init__(order, key)
+        self.root = None
+
+    def _top(self):
+        return self.root
+
+    def _clear(self):
+        self.root = None
+
+    def _reset(self, node):
+        node.child = node.sibling = node.prev = None
+
+    def _add(self, node):
+        self.root = node if self.root is None else _link(self.root, node)
+
+    def insert(self, task):
+        """
+        Insert a new task into the priority queue
+        Time complexity: O(1)
+        """
+        node = _PairingNode(task, self.sort_key(task))
+        self.nodes[task.task_id] = node
+        self._add(node)
+
+    def _detach(self, node):
+        """Cut the subtree rooted at a non-root node out of its parent"""
+        if (node.prev.child is node):
+            node.prev.child = node.sibling
+        else:
+            node.prev.sibling = node.sibling
+        if (node.sibling is not None):
+            node.sibling.prev = node.prev
+        node.prev = node.sibling = None
+
+    def _improve(self, node):
+        if (node is not self.root):
+            self._detach(node)
+            self.root = _link(self.root, node)
+
+    def _delete(self, node):
+        if (node is self.root):
+            self.root = _merge_pairs(node.child)
+        else:
+            self._detach(node)
+            subtree = _merge_pairs(node.child)
+            if (subtree is not None):
+                self.root = _link(self.root, subtree)
+        node.child = None
+
+    def _meld_roots(self, other):
+        self._add(other.root)
+
+
+class _FibonacciNode:
+    """Node of a Fibonacci heap"""
+    __slots__ = ("task", "key", "parent", "child", "left", "right", "degree", "mark")
+
+    def __init__(self, task, key):
+        self.task = task
+        self.key = key
+        self.parent = None
+        self.child = None  # Any child, children form a circular list
+        self.left = self  # Neighbours in the circular sibling list
+        self.right = self
+        self.degree = 0
+        self.mark = False
+
+
+def _splice(a, b):
+    """Join two circular lists given one node of each"""
+    a_right, b_left = a.right, b.left
+    a.right = b
+    b.left = a
+    a_right.left = b_left
+    b_left.right = a_right
+
+
+def _unlink(node):
+    """Remove a node from its circular list"""
+    node.left.right = node.right
+    node.right.left = node.left
+    node.left = node.right = node
+
+
+class FibonacciHeapPriorityQueue(_MeldableHeap):
+    """
+    Priority queue implementation using a Fibonacci heap
+    insert, meld and moving a task towards the top are O(1) amortized
+    (decrease_key in a min-heap, increase_key in a max-heap)
+    """
+
+    def __init__(self, order="min", key=None):
+        super().__init__(order, key)
+        self.min = None  # Top of the root list
+
+    def _top(self):
+        return self.min
+
+    def _clear(self):
+        self.min = None
+
+    def _reset(self, node):
+        node.parent = node.child = None
+        node.left = node.right = node
+        node.degree = 0
+        node.mark = False
+
+    def _add(self, node):
+        """Add a single tree to the root list"""
+        if (self.min is None):
+            self.min = node
+        else:
+            _splice(self.min, node)
+            if (node.key < self.min.key):
+                self.min = node
+
+    def insert(self, task):
+        """
+        Insert a new task into the priority queue
+        Time complexity: O(1)
+        """
+        node = _FibonacciNode(task, self.sort_key(task))
+        self.nodes[task.task_id] = node
+        self._add(node)
+
+    def _cut(self, node):
+        """Move a node with its subtree from its parent to the root list"""
+        parent = node.parent
+        if (parent.child is node):
+            parent.child = node.right if node.right is not node else None
+        _unlink(node)
+        parent.degree -= 1
+        node.parent = None
+        node.mark = False
+        _splice(self.min, node)
+
+    def _cascading_cut(self, node):
+        """Starting at a node that just lost a child, cut ancestors that have lost two"""
+        while (node.parent is not None):
+            if (not node.mark):
+                node.mark = True
+                return
+            parent = node.parent
+            self._cut(node)
+            node = parent
+
+    def _improve(self, node):
+        parent = node.parent
+        if (parent is not None and node.key < parent.key):
+            self._cut(node)
+            self._cascading_cut(parent)
+        if (node.key < self.min.key):
+            self.min = node
+
+    def _consolidate(self):
+        """Link roots of equal degree until all root degrees differ, then find the new top"""
+        roots = []
+        node = self.min
+        while True:
+            roots.append(node)
+            node = node.right
+            if (node is self.min):
+                break
+
+        by_degree = {}
+        for node in roots:
+            node.left = node.right = node
+            while (node.degree in by_degree):
+                other = by_degree.pop(node.degree)
+                if (other.key < node.key):
+                    node, other = other, node
+                # Make other a child of node
+                other.parent = node
+                other.mark = False
+                if (node.child is None):
+                    node.child = other
+                else:
+                    _splice(node.child, other)
+                node.degree += 1
+            by_degree[node.degree] = node
+
+        self.min = None
+        for node in by_degree.values():
+            self._add(node)
+
+    def _delete(self, node):
+        # Move the node to the root list, then remove it like the top
+        if (node.parent is not None):
+            parent = node.parent
+            self._cut(node)
+            self._cascading_cut(parent)
+
+        if (node.child is not None):
+            child = node.child
+            while True:
+                child.parent = None
+                child.mark = False
+                child = child.right
+                if (child is node.child):
+                    break
+            _splice(node, node.child)
+            node.child = None
+
+        if (node.right is node):
+            self.min = None
+        else:
+            self.min = node.right
+            _unlink(node)
+            self._consolidate()
+        node.degree = 0
+
+    def _meld_roots(self, other):
+        if (self.min is None):
+            self.min = other.min
+        else:
+            _splice(self.min, other.min)
+            if (other.min.key < self.min.key):
+                self.min = other.min
@@ -0,0 +1,410 @@
+import math
+import mmap
+import os
+import shutil
+import struct
+import zlib
+
+from priority_queue import Task
+
+# Data file: a header followed by fixed-width records kept in heap order
+# magic, order (0 = min, 1 = max), count, capacity, clean flag, checkpoint generation
+HEADER = struct.Struct("<8sQQQQQ")
+HEADER_SIZE = 64
+RECORD = struct.Struct("<qddd")  # task_id, priority, arrival_time, deadline (NaN when None)
+MAGIC = b"PQHEAP02"
+INITIAL_CAPACITY = 1024
+
+# Write-ahead log: a file header with the generation of the checkpoint the log starts
+# from, then records of an operation code, payload length and CRC-32, then the payload
+WAL_FILE_HEADER = struct.Struct("<8sQ")  # magic, generation
+WAL_MAGIC = b"PQWAL001"
+WAL_HEADER = struct.Struct("<BII")
+OP_INSERT = 1
+OP_EXTRACT = 2
+OP_CHANGE = 3
+OP_REMOVE = 4
+CHANGE = struct.Struct("<qd")  # task_id, new priority
+REMOVE = struct.Struct("<q")  # task_id
+
+FSYNC_POLICIES = ("always", "batch", "checkpoint")
+
+
+class PersistentPriorityQueue:
+    """
+    Durable priority queue stored in a memory-mapped file
+
+    The heap is kept in place in the mapped data file as fixed-width records.
+    Every operation is appended to a write-ahead log before it is applied, and a
+    checkpoint copies the data file aside and starts a new log. Closing the queue
+    marks the data file clean, so reopening it only maps the file. After a crash the
+    data file is restored from the last checkpoint and the log is replayed.
+    Task ids must be 64-bit integers, priorities and times are stored as floats.
+    """
+
+    def __init__(self, path, order="min", fsync="batch", batch_size=1000, checkpoint_every=None):
+        """
+        Open or create a persistent priority queue
+        path: data file, the log and checkpoint are kept next to it in path.wal and path.ckpt
+        order: "min" extracts the task with the lowest priority first, "max" the highest
+        fsync: when the log is forced to disk, "always" after every operation,
+               "batch" every batch_size operations and on flush(), or "checkpoint" only
+        checkpoint_every: take a checkpoint after this many operations, None to only
+                          checkpoint explicitly
+        """
+        if (order not in ("min", "max")):
+            raise ValueError(f"order must be 'min' or 'max', got {order!r}")
+        if (fsync not in FSYNC_POLICIES):
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}, got {fsync!r}")
+
+        self.path = path
+        self.wal_path = path + ".wal"
+        self.checkpoint_path = path + ".ckpt"
+        self.order = order
+        self.sign = 1 if order == "min" else -1
+        self.fsync = fsync
+        self.batch_size = batch_size
+        self.checkpoint_every = checkpoint_every
+        self.unsynced = 0  # Logged operations not yet forced to disk
+        self.since_checkpoint = 0
+        self.generation = 0  # Number of the last checkpoint, stored in the data file header
+        self.task_position = None  # Built on first use, see _positions()
+
+        if (os.path.exists(path) and self._is_clean(path)):
+            self._map(path)
+            self._set_clean(False)
+            self.wal = open(self.wal_path, "ab")
+        elif (os.path.exists(path) or os.path.exists(self.checkpoint_path)):
+            self._recover()
+        else:
+            self._create(path)
+            self._map(path)
+            self.wal = open(self.wal_path, "ab")
+            self.checkpoint()
+
+    # File management
+
+    def _create(self, path):
+        """Write an empty data file"""
+        with open(path, "wb") as file:
+            header = HEADER.pack(MAGIC, 0 if self.order == "min" else 1, 0, INITIAL_CAPACITY, 0, 0)
+            file.write(header.ljust(HEADER_SIZE, b"\0"))
+            file.truncate(HEADER_SIZE + INITIAL_CAPACITY * RECORD.size)
+
+    def _is_clean(self, path):
+        """Check if a data file was closed cleanly"""
+        with open(path, "rb") as file:
+            magic, _, _, _, clean, _ = HEADER.unpack(file.read(HEADER.size))
+        if (magic != MAGIC):
+            raise ValueError(f"{path} is not a priority queue file")
+        return clean == 1
+
+    def _map(self, path):
+        """Memory-map a data file and read its header"""
+        self.file = open(path, "r+b")
+        self.map = mmap.mmap(self.file.fileno(), 0)
+        magic, order, self.count, self.capacity, _, self.generation = HEADER.unpack_from(self.map, 0)
+        if (order != (0 if self.order == "min" else 1)):
+            raise ValueError(f"{path} holds a {'min' if order == 0 else 'max'}-heap, not a {self.order}-heap")
+
+    def _write_header(self, clean=0):
+        """Store the task count and clean flag in the data file header"""
+        HEADER.pack_into(self.map, 0, MAGIC, 0 if self.order == "min" else 1, self.count, self.capacity, clean,
+                         self.generation)
+
+    def _set_clean(self, clean):
+        """Mark the data file as cleanly closed or in use and force the header to disk"""
+        self._write_header(1 if clean else 0)
+        self.map.flush(0, mmap.PAGESIZE)
+
+    def _grow(self):
+        """Double the record capacity of the data file and remap it"""
+        self.map.close()
+        self.capacity *= 2
+        self.file.truncate(HEADER_SIZE + self.capacity * RECORD.size)
+        self.map = mmap.mmap(self.file.fileno(), 0)
+        self._write_header()
+
+    def _recover(self):
+        """Restore the data file from the last checkpoint and replay the write-ahead log"""
+        if (os.path.exists(self.checkpoint_path)):
+            shutil.copyfile(self.checkpoint_path, self.path)
+        else:
+            self._create(self.path)
+        self._map(self.path)
+
+        data = b""
+        if (os.path.exists(self.wal_path)):
+            with open(self.wal_path, "rb") as wal:
+                data = wal.read()
+        if (len(data) >= WAL_FILE_HEADER.size):
+            magic, generation = WAL_FILE_HEADER.unpack_from(data, 0)
+            if (magic != WAL_MAGIC):
+                raise ValueError(f"{self.wal_path} is not a priority queue log")
+            # A log older than the checkpoint is already contained in it: the crash
+            # happened after the checkpoint was installed but before the log was reset
+            if (generation < self.generation):
+                data = b""
+            offset = WAL_FILE_HEADER.size
+            while (offset + WAL_HEADER.size <= len(data)):
+                op, length, checksum = WAL_HEADER.unpack_from(data, offset)
+                payload = data[offset + WAL_HEADER.size:offset + WAL_HEADER.size + length]
+                if (len(payload) < length or zlib.crc32(payload) != checksum):
+                    break  # Torn write at the end of the log
+                self._apply(op, payload)
+                offset += WAL_HEADER.size + length
+
+        self.wal = open(self.wal_path, "ab")
+        self.checkpoint()
+
+    def flush(self):
+        """Force all logged operations to disk"""
+        self.wal.flush()
+        os.fsync(self.wal.fileno())
+        self.unsynced = 0
+
+    def checkpoint(self):
+        """
+        Save a consistent copy of the data file and start a new write-ahead log
+        The checkpoint carries a new generation number that the log header is set to
+        once the checkpoint is in place, so recovery skips a log the checkpoint covers
+        Time complexity: O(n) where n is the number of tasks
+        """
+        self.generation += 1
+        self._write_header()
+        self.map.flush()
+        temporary_path = self.checkpoint_path + ".tmp"
+        shutil.copyfile(self.path, temporary_path)
+        with open(temporary_path, "rb+") as file:
+            os.fsync(file.fileno())
+        os.replace(temporary_path, self.checkpoint_path)
+
+        self.wal.seek(0)
+        self.wal.truncate(0)
+        self.wal.write(WAL_FILE_HEADER.pack(WAL_MAGIC, self.generation))
+        self.flush()
+        self.since_checkpoint = 0
+
+    def close(self):
+        """Flush everything to disk and mark the data file as cleanly closed"""
+        if (self.map.closed):
+            return
+        self.flush()
+        self.wal.close()
+        self._write_header()
+        self.map.flush()
+        self._set_clean(True)
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _log(self, op, payload):
+        """Append an operation to the write-ahead log according to the fsync policy"""
+        self.wal.write(WAL_HEADER.pack(op, len(payload), zlib.crc32(payload)) + payload)
+        self.unsynced += 1
+        if (self.fsync == "always" or (self.fsync == "batch" and self.unsynced >= self.batch_size)):
+            self.flush()
+
+    def _after_operation(self):
+        """Take a periodic checkpoint if one is due"""
+        self.since_checkpoint += 1
+        if (self.checkpoint_every is not None and self.since_checkpoint >= self.checkpoint_every):
+            self.checkpoint()
+
+    # Heap operations on the mapped records
+
+    def _read(self, i):
+        """Read the record at heap index i"""
+        return RECORD.unpack_from(self.map, HEADER_SIZE + i * RECORD.size)
+
+    def _write(self, i, record):
+        """Write a record at heap index i and record its position"""
+        RECORD.pack_into(self.map, HEADER_SIZE + i * RECORD.size, *record)
+        if (self.task_position is not None):
+            self.task_position[record[0]] = i
+
+    def _positions(self):
+        """Map task ids to heap indices, scanning the file on first use"""
+        if (self.task_position is None):
+            self.task_position = {self._read(i)[0]: i for i in range(self.count)}
+        return self.task_position
+
+    def _sift_up(self, i):
+        """Move the record at index i up until its parent does not come after it"""
+        sign = self.sign
+        record = self._read(i)
+        key = sign * record[1]
+        while (i > 0):
+            parent = (i - 1) >> 1
+            parent_record = self._read(parent)
+            if (not key < sign * parent_record[1]):
+                break
+            self._write(i, parent_record)
+            i = parent
+        self._write(i, record)
+
+    def _sift_down(self, i):
+        """Move the record at index i down until no child comes before it"""
+        sign, n = self.sign, self.count
+        record = self._read(i)
+        key = sign * record[1]
+        child = 2 * i + 1
+        while (child < n):
+            child_record = self._read(child)
+            if (child + 1 < n):
+                right_record = self._read(child + 1)
+                if (sign * right_record[1] < sign * child_record[1]):
+                    child += 1
+                    child_record = right_record
+            if (not sign * child_record[1] < key):
+                break
+            self._write(i, child_record)
+            i = child
+            child = 2 * i + 1
+        self._write(i, record)
+
+    def _remove_at(self, i):
+        """Remove the record at heap index i, filling the gap with the last record"""
+        record = self._read(i)
+        self.count -= 1
+        if (i < self.count):
+            last_record = self._read(self.count)
+            self._write(i, last_record)
+            if (self.sign * last_record[1] < self.sign * record[1]):
+                self._sift_up(i)
+            else:
+                self._sift_down(i)
+        if (self.task_position is not None):
+            del self.task_position[record[0]]
+        self._write_header()
+        return record
+
+    def _apply(self, op, payload):
+        """Apply a logged operation to the heap"""
+        if (op == OP_INSERT):
+            if (self.count == self.capacity):
+                self._grow()
+            self.count += 1
+            RECORD.pack_into(self.map, HEADER_SIZE + (self.count - 1) * RECORD.size, *RECORD.unpack(payload))
+            self._sift_up(self.count - 1)
+            self._write_header()
+            return None
+        if (op == OP_EXTRACT):
+            return self._remove_at(0)
+        if (op == OP_CHANGE):
+            task_id, new_priority = CHANGE.unpack(payload)
+            i = self._positions()[task_id]
+            record = self._read(i)
+            self._write(i, (task_id, new_priority, record[2], record[3]))
+            if (self.sign * new_priority < self.sign * record[1]):
+                self._sift_up(i)
+            else:
+                self._sift_down(i)
+            return None
+        if (op == OP_REMOVE):
+            task_id, = REMOVE.unpack(payload)
+            return self._remove_at(self._positions()[task_id])
+        raise ValueError(f"unknown log operation {op!r}")
+
+    def _run(self, op, payload):
+        """Log an operation, then apply it"""
+        self._log(op, payload)
+        result = self._apply(op, payload)
+        self._after_operation()
+        return result
+
+    # Public API
+
+    def __len__(self):
+        """Number of tasks in the priority queue"""
+        return self.count
+
+    def is_empty(self):
+        """
+        Check if the priority queue is empty
+        Time complexity: O(1)
+        """
+        return self.count == 0
+
+    def __contains__(self, task_id):
+        """Check if a task with the given id is in the priority queue"""
+        return task_id in self._positions()
+
+    @staticmethod
+    def _to_task(record):
+        """Build a Task from a record"""
+        task_id, priority, arrival_time, deadline = record
+        return Task(task_id, priority, arrival_time, None if math.isnan(deadline) else deadline)
+
+    def insert(self, task):
+        """
+        Insert a new task into the priority queue
+        A duplicate task_id is rejected before anything is logged, so it is never replayed
+        Time complexity: O(log n), plus a one-time O(n) scan to index task positions
+        """
+        if (task.task_id in self._positions()):
+            raise ValueError(f"task {task.task_id!r} is already in the queue")
+        deadline = math.nan if task.deadline is None else task.deadline
+        self._run(OP_INSERT, RECORD.pack(task.task_id, task.priority, task.arrival_time, deadline))
+
+    def peek(self):
+        """
+        Return the task at the top of the heap without removing it
+        Time complexity: O(1)
+        """
+        return self._to_task(self._read(0)) if self.count else None
+
+    def extract(self):
+        """
+        Remove and return the task at the top of the heap
+        Time complexity: O(log n) where n is the number of tasks
+        """
+        if (self.count == 0):
+            return None
+        return self._to_task(self._run(OP_EXTRACT, b""))
+
+    def priority_of(self, task_id):
+        """Return the priority of a queued task, or None if it is not in the queue"""
+        positions = self._positions()
+        if (task_id not in positions):
+            return None
+        return self._read(positions[task_id])[1]
+
+    def change_priority(self, task_id, new_priority):
+        """
+        Set the priority of a task and restore the heap property in either direction
+        Time complexity: O(log n), plus a one-time O(n) scan to index task positions
+        """
+        if (task_id not in self):
+            return False
+        self._run(OP_CHANGE, CHANGE.pack(task_id, new_priority))
+        return True
+
+    def decrease_key(self, task_id, new_priority):
+        """Decrease the priority of a task"""
+        priority = self.priority_of(task_id)
+        if (priority is None or new_priority >= priority):
+            return False
+        return self.change_priority(task_id, new_priority)
+
+    def increase_key(self, task_id, new_priority):
+        """Increase the priority of a task"""
+        priority = self.priority_of(task_id)
+        if (priority is None or new_priority <= priority):
+            return False
+        return self.change_priority(task_id, new_priority)
+
+    def remove(self, task_id):
+        """
+        Remove a task from the priority queue
+        Time complexity: O(log n), plus a one-time O(n) scan to index task positions
+        """
+        if (task_id not in self):
+            return False
+        self._run(OP_REMOVE, REMOVE.pack(task_id))
+        return True
@@ -1,9 +1,26 @@
+# insert_many() rebuilds the whole heap instead of sifting each task
+# once batch_size * REHEAPIFY_RATIO reaches the current heap size
+REHEAPIFY_RATIO = 1
+
+# Bits of a packed stable key taken by the insertion sequence and, with
+# tie_break="arrival", by Task.arrival_time above it
+SEQUENCE_BITS = 48
+ARRIVAL_BITS = 48
+
+# Operation codes of HeapPriorityQueue.apply_batch()
+OP_INSERT = 0
+OP_CHANGE_PRIORITY = 1
+OP_DECREASE_KEY = 2
+OP_INCREASE_KEY = 3
+OP_REMOVE = 4
+OP_EXTRACT = 5
 
 
 class Task:
     """
     Class to represent a task in th priority queue
     """
+    __slots__ = ("task_id", "priority", "arrival_time", "deadline")
 
     def __init__(self, task_id, priority, arrival_time=0, deadline=None):
         """
@@ -24,115 +41,616 @@ class Task:
         return f"Task ID: {self.task_id}, Priority: {self.priority}"
 
 
-class MinHeapPriorityQueue:
+def deadline_key(task):
     """
-    Priority queue implementation using min-heap
-    Tasks with lowest priority value are extracted first
+    Sort key for earliest-deadline-first scheduling in a min-heap queue
+    Tasks without a deadline go last, ties are broken by priority and arrival time
     """
+    deadline = float("inf") if task.deadline is None else task.deadline
+    return (deadline, task.priority, task.arrival_time)
 
-    def __init__(self):
+
+class _ReversedKey:
+    """
+    Wrapper inverting the order of a non-numeric sort key
+    Lets a max-heap store keys that always compare with "<"
+    """
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+
+# Iterative sift routines of the heap core.
+# Instead of swapping pairs level by level, the moving task is lifted out of the
+# heap, the tasks in its way are shifted into the "hole", and the task is written
+# back once at its final index. Every moved task gets its position written once.
+# Keys are cached in a list parallel to the heap and always compare with "<".
+# The node at index i has children arity * i + 1 ... arity * i + arity.
+# The write-back sits in a finally clause: if keys cannot be compared, the task still
+# fills the hole, so the heap keeps every task exactly once and can be repaired.
+
+def _sift_up(heap, keys, task_position, i, arity=2):
+    """Move the task at index i up until its parent key is not larger"""
+    task = heap[i]
+    key = keys[i]
+    try:
+        while (i > 0):
+            parent = (i - 1) // arity
+            parent_key = keys[parent]
+            if (not key < parent_key):
+                break
+            parent_task = heap[parent]
+            heap[i] = parent_task
+            keys[i] = parent_key
+            task_position[parent_task.task_id] = i
+            i = parent
+    finally:
+        heap[i] = task
+        keys[i] = key
+        task_position[task.task_id] = i
+
+
+def _sift_down(heap, keys, task_position, i, arity=2):
+    """Move the task at index i down until no child key is smaller"""
+    n = len(heap)
+    task = heap[i]
+    key = keys[i]
+    child = arity * i + 1
+    try:
+        while (child < n):
+            # Find the child with the smallest key
+            child_key = keys[child]
+            if (arity == 2):
+                right = child + 1
+                if (right < n and keys[right] < child_key):
+                    child = right
+                    child_key = keys[right]
+            else:
+                last = min(child + arity, n)
+                for sibling in range(child + 1, last):
+                    if (keys[sibling] < child_key):
+                        child = sibling
+                        child_key = keys[sibling]
+            if (not child_key < key):
+                break
+            child_task = heap[child]
+            heap[i] = child_task
+            keys[i] = child_key
+            task_position[child_task.task_id] = i
+            i = child
+            child = arity * i + 1
+    finally:
+        heap[i] = task
+        keys[i] = key
+        task_position[task.task_id] = i
+
+
+class HeapPriorityQueue:
+    """
+    Priority queue implementation using a d-ary heap with a configurable order
+    Each task's sort key is computed once on insertion or priority change and cached
+    """
+
+    def __init__(self, order="min", key=None, arity=2, lazy_remove=False, compaction_threshold=0.5, tie_break=None):
         """
         Initialize an empty priority queue
-        Use a list to store the heap
-        """
-
-        self.heap = list()
-        self.task_position = {}  # Dictionary to store task positions in the heap
+        order: "min" extracts the task with the smallest key first, "max" the largest
+        key: optional function mapping a task to its sort key, defaults to its priority
+        arity: number of children per node, a wider heap is shallower, which makes
+               insertions and key improvements cheaper and extractions more expensive
+        lazy_remove: if True, remove() only marks tasks as removed in O(1),
+                     and they are skipped when they reach the top of the heap
+        compaction_threshold: fraction of removed entries in the heap at which
+                              the heap is rebuilt without them
+        tie_break: None for no particular order among equal keys, "sequence" to extract
+                   them in insertion order, or "arrival" by Task.arrival_time, then
+                   insertion order. Without a key function, priorities and arrival times
+                   must be integers: the priority and the tie-breaker are packed into one
+                   integer key, so sifts still do a single int comparison per step
+        """
+        if (order not in ("min", "max")):
+            raise ValueError(f"order must be 'min' or 'max', got {order!r}")
+        if (arity < 2):
+            raise ValueError(f"arity must be at least 2, got {arity!r}")
+        if (not 0 < compaction_threshold <= 1):
+            raise ValueError(f"compaction_threshold must be in (0, 1], got {compaction_threshold!r}")
+        if (tie_break not in (None, "sequence", "arrival")):
+            raise ValueError(f"tie_break must be None, 'sequence' or 'arrival', got {tie_break!r}")
+
+        self.order = order
+        self.key = key
+        self.arity = arity
+        self.lazy_remove = lazy_remove
+        self.compaction_threshold = compaction_threshold
+        self.heap = []
+        self.keys = []  # Cached sort keys, parallel to the heap
+        self.task_position = {}  # Maps task_id to its position in the heap
+        self.removed = set()  # Ids of lazily removed tasks still stored in the heap
+        self.tie_break = tie_break
+        self.sequence = 0  # Insertion counter of the stable modes
+        self.ties = {} if tie_break else None  # Maps task_id to its tie-breaker, kept across key changes
+        self.tie_bits = SEQUENCE_BITS + ARRIVAL_BITS if tie_break == "arrival" else SEQUENCE_BITS
+
+    def sort_key(self, task):
+        """
+        Compute the cached sort key of a task
+        Keys of a max-heap are inverted so that sifts always compare with "<"
+        """
+        key = task.priority if self.key is None else self.key(task)
+        if (self.order == "max"):
+            key = -key if isinstance(key, (int, float)) else _ReversedKey(key)
+        if (self.tie_break is not None):
+            return self._stable_key(task, key)
+        return key
+
+    def _stable_key(self, task, key):
+        """
+        Combine a sort key with the task's tie-breaker, assigned on first insertion
+        Without a key function both are packed into one integer, (key << bits) | tie,
+        otherwise the key is the tuple (key, tie)
+        """
+        packed = self.key is None
+        if (packed and not isinstance(key, int)):
+            raise TypeError(f"packed tie-breaking needs integer priorities, got {task.priority!r}, "
+                            f"pass a key function instead")
+        tie = self.ties.get(task.task_id)
+        if (tie is None):
+            # Validate before assigning, so that a rejected task leaves no tie-breaker behind
+            tie = self.sequence
+            if (self.tie_break == "arrival"):
+                arrival = task.arrival_time
+                if (not packed):
+                    tie = (arrival, tie)
+                elif (isinstance(arrival, int) and 0 <= arrival < 1 << ARRIVAL_BITS):
+                    tie |= arrival << SEQUENCE_BITS
+                else:
+                    raise TypeError(f"packed arrival tie-breaking needs integer arrival times in "
+                                    f"[0, 2**{ARRIVAL_BITS}), got {arrival!r}, pass a key function instead")
+            self.sequence += 1
+            self.ties[task.task_id] = tie
+
+        if (not packed):
+            return (key, tie)
+        return (key << self.tie_bits) | tie
 
     def is_empty(self):
         """
         Check if the priority queue is empty
-        Time complexisy: O(1)
+        Time complexity: O(1)
         """
+        return len(self.heap) == len(self.removed)
 
-        return len(self.heap) == 0
+    def __len__(self):
+        """Number of tasks in the priority queue"""
+        return len(self.heap) - len(self.removed)
 
-    def parent(self, i):
-        """
-        Get the parent index of node at index i
-        """
+    def __contains__(self, task_id):
+        """Check if a task with the given id is in the priority queue"""
+        return task_id in self.task_position and task_id not in self.removed
 
-        return (i - 1) // 2
+    def parent(self, i):
+        """Get the parent index of node at index i"""
+        return (i - 1) // self.arity
 
     def left_child(self, i):
-        """
-        Get the left child index of node at index i
-        """
-
-        return 2 * i + 1
+        """Get left-most child index of node at index i"""
+        return self.arity * i + 1
 
     def right_child(self, i):
-        """
-        Get the right child index of node at index i
-        """
-
-        return 2 * i + 2
+        """Get right-most child index of node at index i"""
+        return self.arity * i + self.arity
 
     def swap(self, i, j):
-        """
-        Swap two nodes in the heap
-        Also update task positions
-        """
-
+        """Swap two elements in the heap and update their positions"""
         self.heap[i], self.heap[j] = self.heap[j], self.heap[i]
+        self.keys[i], self.keys[j] = self.keys[j], self.keys[i]
         self.task_position[self.heap[i].task_id] = i
         self.task_position[self.heap[j].task_id] = j
 
     def sift_up(self, i):
-        """
-        Sift up the node at index i to maintain heap property
-        """
-
-        while (i > 0 and self.heap[i].priority < self.heap[self.parent(i)].priority):
-            self.swap(i, self.parent(i))
-            i = self.parent(i)
+        """Move a node up the heap to maintain the heap property"""
+        _sift_up(self.heap, self.keys, self.task_position, i, self.arity)
 
     def sift_down(self, i):
+        """Move a node down the heap to maintain the heap property"""
+        _sift_down(self.heap, self.keys, self.task_position, i, self.arity)
+
+    def insert(self, task):
         """
-        Sift down the node at index i to maintain heap property
+        Insert a new task into the priority queue
+        Time complexity: O(log n) where n is the number of tasks
         """
+        if (self.removed and task.task_id in self.removed):
+            self._purge(task.task_id)
 
-        min_index = i
-        left = self.left_child(i)
-        if (left < len(self.heap) and self.heap[left].priority < self.heap[min_index].priority):
-            min_index = left
+        key = self.sort_key(task)  # May raise, before the heap is touched
+        self.heap.append(task)
+        self.keys.append(key)
+        try:
+            _sift_up(self.heap, self.keys, self.task_position, len(self.heap) - 1, self.arity)
+        except Exception:
+            self._discard(task.task_id)  # Its key does not compare with the others
+            raise
+
+    def build_heap(self):
+        """
+        Recompute all sort keys and rebuild the heap property bottom-up
+        Starting from the last internal node, sift every subtree root down
+        (the same way heapsort() builds its max heap)
+        Time complexity: O(n) where n is the number of tasks
+        """
+        heap, arity = self.heap, self.arity
+        keys = [self.sort_key(task) for task in heap]
+        task_position = {task.task_id: index for index, task in enumerate(heap)}
+        for i in range((len(heap) - 2) // arity, -1, -1):
+            _sift_down(heap, keys, task_position, i, arity)
+        self.keys = keys
+        self.task_position = task_position
+
+    @classmethod
+    def from_tasks(cls, tasks, **kwargs):
+        """
+        Create a priority queue holding all tasks of an iterable at once
+        Keyword arguments are passed to the constructor
+        Time complexity: O(n) where n is the number of tasks
+        """
+        pq = cls(**kwargs)
+        pq.heap = list(tasks)
+        pq.build_heap()
+        return pq
+
+    def insert_many(self, tasks):
+        """
+        Insert a batch of tasks into the priority queue
+        Small batches are sifted up one by one, while a batch at least as large as
+        the current heap is appended and the whole heap is rebuilt bottom-up.
+        A task whose sort key cannot be computed or compared rejects the whole batch
+        Time complexity: O(min(k log(n + k), n + k)) where k is the batch size
+        """
+        tasks = list(tasks)
+        if (self.removed):
+            for task in tasks:
+                if (task.task_id in self.removed):
+                    self._purge(task.task_id)
+
+        if (len(tasks) * REHEAPIFY_RATIO < len(self.heap)):
+            heap, keys, task_position = self.heap, self.keys, self.task_position
+            sort_key, arity = self.sort_key, self.arity
+            sequence = self.sequence
+            try:
+                new_keys = [sort_key(task) for task in tasks]
+            except Exception:
+                self._forget_ties(tasks, sequence)
+                raise
+            for done, (task, key) in enumerate(zip(tasks, new_keys)):
+                heap.append(task)
+                keys.append(key)
+                try:
+                    _sift_up(heap, keys, task_position, len(heap) - 1, arity)
+                except Exception:
+                    # Its key does not compare with the others, take the batch back out
+                    self._discard(task.task_id)
+                    for inserted in tasks[:done]:
+                        self._remove_at(task_position[inserted.task_id])
+                    self._forget_ties(tasks, sequence)
+                    raise
+        else:
+            heap, sequence = self.heap, self.sequence
+            self.heap = heap + tasks
+            try:
+                self.build_heap()
+            except Exception:
+                # build_heap() only commits keys and positions once the new heap is built
+                self.heap = heap
+                self._forget_ties(tasks, sequence)
+                raise
+
+    def _forget_ties(self, tasks, sequence):
+        """Undo the tie-breakers assigned to a rejected batch of tasks, so that it is inserted all or nothing"""
+        if (self.ties is not None):
+            for task in tasks:
+                if (task.task_id not in self.task_position):
+                    self.ties.pop(task.task_id, None)
+            self.sequence = sequence
+
+    def peek(self):
+        """
+        Return the task at the top of the heap without removing it
+        Time complexity: O(1), amortized when lazily removed tasks are skipped
+        """
+        if (self.removed):
+            self._drop_removed_top()
+        return self.heap[0] if self.heap else None
+
+    def peek_second(self):
+        """
+        Return the task that extract() would return after the top one, without removing anything
+        It is the child of the root with the smallest key, k-way merges use it to find
+        how far the top run can be copied before another run takes over
+        Time complexity: O(arity), plus the children of lazily removed tasks in the way
+        """
+        heap, keys, arity = self.heap, self.keys, self.arity
+        if (not self.removed):
+            n = len(heap)
+            if (n <= 2):
+                return heap[1] if n == 2 else None
+            if (arity == 2):
+                return heap[2] if keys[2] < keys[1] else heap[1]
+            return heap[min(range(1, min(arity + 1, n)), key=keys.__getitem__)]
+
+        self._drop_removed_top()
+        heap, keys, removed = self.heap, self.keys, self.removed
+        n = len(heap)
+        best = None
+        candidates = list(range(1, min(arity + 1, n)))
+        while (candidates):
+            i = candidates.pop()
+            if (removed and heap[i].task_id in removed):
+                # Its subtree may still hold the second task
+                candidates.extend(range(arity * i + 1, min(arity * i + arity + 1, n)))
+            elif (best is None or keys[i] < keys[best]):
+                best = i
+        return heap[best] if best is not None else None
+
+    def extract(self):
+        """
+        Remove and return the task at the top of the heap
+        Time complexity: O(log n) where n is the number of tasks
+        """
+        if (self.removed):
+            self._drop_removed_top()
+        if (not self.heap):
+            return None
 
-        right = self.right_child(i)
-        if (right < len(self.heap) and self.heap[right].priority < self.heap[min_index].priority):
-            min_index = right
+        return self._remove_at(0)
+
+    def _remove_at(self, index):
+        """Remove and return the task at heap index index, filling the gap with the last task"""
+        heap, keys = self.heap, self.keys
+        task = heap[index]
+        old_key = keys[index]
+        last_task = heap.pop()
+        last_key = keys.pop()
+
+        if (index < len(heap)):  # If the removed task was not the last one
+            heap[index] = last_task
+            keys[index] = last_key
+            if (last_key < old_key):
+                _sift_up(heap, keys, self.task_position, index, self.arity)
+            else:
+                _sift_down(heap, keys, self.task_position, index, self.arity)
+
+        del self.task_position[task.task_id]
+        if (self.ties is not None):
+            del self.ties[task.task_id]
+        return task
+
+    def _discard(self, task_id):
+        """Take a task whose key failed to compare back out of the heap, without comparing its key"""
+        heap, keys = self.heap, self.keys
+        index = self.task_position.pop(task_id)
+        last_task = heap.pop()
+        last_key = keys.pop()
+        if (index < len(heap)):
+            heap[index] = last_task
+            keys[index] = last_key
+            _sift_up(heap, keys, self.task_position, index, self.arity)
+            _sift_down(heap, keys, self.task_position, self.task_position[last_task.task_id], self.arity)
+        if (self.ties is not None):
+            self.ties.pop(task_id, None)
+
+    def _purge(self, task_id):
+        """Physically remove a lazily removed task from the heap"""
+        self.removed.discard(task_id)
+        self._remove_at(self.task_position[task_id])
+
+    def _drop_removed_top(self):
+        """Pop lazily removed tasks off the top of the heap"""
+        heap, removed = self.heap, self.removed
+        while (heap and heap[0].task_id in removed):
+            removed.discard(heap[0].task_id)
+            self._remove_at(0)
+
+    def remove(self, task_id):
+        """
+        Remove a task from the priority queue
+        Eager mode restores the heap right away, lazy mode only marks the task as removed
+        and compacts the heap once removed tasks exceed compaction_threshold of its size
+        Time complexity: O(log n) eager, O(1) amortized lazy
+        """
+        if (task_id not in self):
+            return False
 
-        if (i != min_index):
-            self.swap(i, min_index)
-            self.sift_down(min_index)
+        if (not self.lazy_remove):
+            self._remove_at(self.task_position[task_id])
+            return True
 
-    def insert(self, task):
+        self.removed.add(task_id)
+        if (len(self.removed) >= self.compaction_threshold * len(self.heap)):
+            self.compact()
+        return True
+
+    def compact(self):
         """
-        Insert a new task into the priority queue
-        Time complexity: O(log n) where n is the number of tasks
+        Drop all lazily removed tasks and rebuild the heap
+        Time complexity: O(n) where n is the number of stored tasks
         """
-        self.heap.append(task)
-        index = len(self.heap) - 1
-        self.task_position[task.task_id] = index
-        self.sift_up(index)
+        if (self.removed):
+            removed = self.removed
+            self.heap = [task for task in self.heap if task.task_id not in removed]
+            if (self.ties is not None):
+                for task_id in removed:
+                    del self.ties[task_id]
+            self.removed = set()
+            self.build_heap()
 
-    def extract_min(self):
+    def change_priority(self, task_id, new_priority):
         """
-        Remove and return the task with the lowest priority
+        Set the priority of a task and restore the heap property in either direction
         Time complexity: O(log n) where n is the number of tasks
         """
-        if (self.is_empty()):
-            return None
+        if (task_id not in self):
+            return False
 
-        min_task = self.heap[0]
-        last_task = self.heap.pop()
+        index = self.task_position[task_id]
+        task = self.heap[index]
+        old_priority = task.priority
+        task.priority = new_priority
+        try:
+            new_key = self.sort_key(task)
+        except Exception:
+            task.priority = old_priority
+            raise
+        old_key = self.keys[index]
+        self.keys[index] = new_key
+        try:
+            if (new_key < old_key):
+                _sift_up(self.heap, self.keys, self.task_position, index, self.arity)
+            else:
+                _sift_down(self.heap, self.keys, self.task_position, index, self.arity)
+        except Exception:
+            # The new key does not compare with the others, put the task back under its old key
+            index = self.task_position[task_id]
+            task.priority = old_priority
+            self.keys[index] = old_key
+            _sift_up(self.heap, self.keys, self.task_position, index, self.arity)
+            _sift_down(self.heap, self.keys, self.task_position, self.task_position[task_id], self.arity)
+            raise
+        return True
 
-        if (self.heap):  # If heap is not empty after popping
-            self.heap[0] = last_task
-            self.task_position[last_task.task_id] = 0
-            self.sift_down(0)
+    def apply_batch(self, op_codes, task_ids, priorities, arrival_time=0):
+        """
+        Apply a batch of operations given as columns, with the same result as calling
+        the methods one by one in order
+        op_codes[i] is one of OP_INSERT (a new Task(task_ids[i], priorities[i], arrival_time)),
+        OP_CHANGE_PRIORITY, OP_DECREASE_KEY, OP_INCREASE_KEY, OP_REMOVE (priority ignored)
+        and OP_EXTRACT (task id and priority ignored). Decrease and increase refer to the
+        priority value, as decrease_key() / increase_key() of both heap orders do.
+
+        Between two extractions or removals, inserts and key changes only update the tasks.
+        Then each task whose priority changed is sifted once with its final key and new
+        tasks are sifted up, or the whole heap is rebuilt when the changed tasks reach
+        about half the heap.
+        Columns may be lists, array.array or numpy arrays. Unknown operation codes are
+        rejected before anything is applied, and if an operation fails, the operations
+        before it are left applied with the heap restored.
+
+        Returns:
+            List of the extracted tasks, None for extractions from an empty queue
+        """
+        if (not len(op_codes) == len(task_ids) == len(priorities)):
+            raise ValueError(f"columns differ in length: {len(op_codes)}, {len(task_ids)}, {len(priorities)}")
+        columns = [column.tolist() if hasattr(column, "tolist") else column
+                   for column in (op_codes, task_ids, priorities)]
+        unknown = set(columns[0]) - {OP_INSERT, OP_CHANGE_PRIORITY, OP_DECREASE_KEY, OP_INCREASE_KEY,
+                                     OP_REMOVE, OP_EXTRACT}
+        if (unknown):
+            raise ValueError(f"unknown operation codes {sorted(unknown)!r}")
+
+        touched = {}  # Maps task_id to queued tasks whose priority changed since the last flush
+        pending = {}  # Maps task_id to inserted tasks not in the heap yet
+        try:
+            return self._apply_columns(columns, arrival_time, touched, pending)
+        finally:
+            # Priorities already changed must reach the cached keys even if an operation failed
+            self._flush_batch(touched, pending)
+
+    def _apply_columns(self, columns, arrival_time, touched, pending):
+        """Operation loop of apply_batch(), deferring inserts and key changes into touched and pending"""
+        heap, task_position, removed = self.heap, self.task_position, self.removed
+        extracted = []
+        for op, task_id, priority in zip(*columns):
+            if (op == OP_INSERT):
+                # Like a second insert() call, a repeated id keeps both tasks
+                if (task_id in removed or task_id in pending):
+                    self._flush_batch(touched, pending)
+                    if (task_id in self.removed):
+                        self._purge(task_id)
+                    heap, task_position, removed = self.heap, self.task_position, self.removed
+                pending[task_id] = Task(task_id, priority, arrival_time)
+            elif (OP_CHANGE_PRIORITY <= op <= OP_INCREASE_KEY):
+                task = pending.get(task_id)
+                queued = task is None
+                if (queued):
+                    index = task_position.get(task_id)
+                    if (index is None or task_id in removed):
+                        continue
+                    task = heap[index]
+                if (op == OP_CHANGE_PRIORITY
+                        or (op == OP_DECREASE_KEY and priority < task.priority)
+                        or (op == OP_INCREASE_KEY and priority > task.priority)):
+                    task.priority = priority
+                    if (queued):
+                        touched[task_id] = task
+            elif (op == OP_EXTRACT and not touched and not pending and not removed):
+                extracted.append(self._remove_at(0) if heap else None)
+            else:
+                self._flush_batch(touched, pending)
+                if (op == OP_EXTRACT):
+                    extracted.append(self.extract())
+                else:
+                    self.remove(task_id)
+                # A rebuild or compaction replaces these
+                heap, task_position, removed = self.heap, self.task_position, self.removed
+        return extracted
+
+    def _flush_batch(self, touched, pending):
+        """Restore the heap after the deferred key changes and inserts of apply_batch()"""
+        if (not touched and not pending):
+            return
+
+        heap = self.heap
+        # Inserted tasks climb O(1) levels on average, so only the changed keys count
+        # against the O(n) rebuild, which pays off once they reach about half the heap
+        if (2 * len(touched) * REHEAPIFY_RATIO >= len(heap) + len(pending)):
+            heap.extend(pending.values())
+            self.build_heap()
+        else:
+            keys, task_position, arity = self.keys, self.task_position, self.arity
+            sort_key = self.sort_key
+            for task_id, task in touched.items():
+                index = task_position[task_id]
+                old_key = keys[index]
+                new_key = sort_key(task)
+                keys[index] = new_key
+                if (new_key < old_key):
+                    _sift_up(heap, keys, task_position, index, arity)
+                elif (old_key < new_key):
+                    _sift_down(heap, keys, task_position, index, arity)
+            for task in pending.values():
+                key = sort_key(task)
+                heap.append(task)
+                keys.append(key)
+                _sift_up(heap, keys, task_position, len(heap) - 1, arity)
+        touched.clear()
+        pending.clear()
+
+
+class MinHeapPriorityQueue(HeapPriorityQueue):
+    """
+    Priority queue implementation using min-heap
+    Tasks with lowest priority value are extracted first
+    """
 
-        del self.task_position[min_task.task_id]
-        return min_task
+    def __init__(self, key=None, arity=2, lazy_remove=False, compaction_threshold=0.5, tie_break=None):
+        """
+        Initialize an empty priority queue
+        key: optional function mapping a task to its sort key, defaults to its priority
+        arity: number of children per node in the heap
+        lazy_remove: if True, remove() marks tasks as removed and skips them later
+        compaction_threshold: fraction of removed entries that triggers a rebuild
+        tie_break: None, "sequence" or "arrival" order among tasks with equal keys
+        """
+        super().__init__("min", key, arity, lazy_remove, compaction_threshold, tie_break)
+
+    extract_min = HeapPriorityQueue.extract
 
     def decrease_key(self, task_id, new_priority):
         """
@@ -140,16 +658,13 @@ class MinHeapPriorityQueue:
         For min-heap, decrease means the priority value becomes smaller
         Time complexity: O(log n) where n is the number of tasks
         """
-        if (task_id not in self.task_position):
+        if (task_id not in self):
             return False
 
-        index = self.task_position[task_id]
-        if (new_priority >= self.heap[index].priority):
+        if (new_priority >= self.heap[self.task_position[task_id]].priority):
             return False  # New priority is not smaller
 
-        self.heap[index].priority = new_priority
-        self.sift_up(index)
-        return True
+        return self.change_priority(task_id, new_priority)
 
     def increase_key(self, task_id, new_priority):
         """
@@ -157,106 +672,33 @@ class MinHeapPriorityQueue:
         For min-heap, increase means the priority value becomes larger
         Time complexity: O(log n) where n is the number of tasks
         """
-        if (task_id not in self.task_position):
+        if (task_id not in self):
             return False
 
-        index = self.task_position[task_id]
-        if (new_priority <= self.heap[index].priority):
+        if (new_priority <= self.heap[self.task_position[task_id]].priority):
             return False  # New priority is not larger
 
-        self.heap[index].priority = new_priority
-        self.sift_down(index)
-        return True
+        return self.change_priority(task_id, new_priority)
 
 
-class MaxHeapPriorityQueue:
+class MaxHeapPriorityQueue(HeapPriorityQueue):
     """
     Priority queue implementation using max-heap
     Tasks with highest priority value are extracted first
     """
-    def __init__(self):
-        """
-        Initialize an empty priority queue
-        We use a list to store the heap
-        """
-        self.heap = []
-        self.task_position = {}  # Maps task_id to its position in the heap
 
-    def is_empty(self):
-        """
-        Check if the priority queue is empty
-        Time complexity: O(1)
+    def __init__(self, key=None, arity=2, lazy_remove=False, compaction_threshold=0.5, tie_break=None):
         """
-        return len(self.heap) == 0
-
-    def parent(self, i):
-        """Get the parent index of node at index i"""
-        return (i - 1) // 2
-
-    def left_child(self, i):
-        """Get left child index of node at index i"""
-        return 2 * i + 1
-
-    def right_child(self, i):
-        """Get right child index of node at index i"""
-        return 2 * i + 2
-
-    def swap(self, i, j):
-        """Swap two elements in the heap and update their positions"""
-        self.heap[i], self.heap[j] = self.heap[j], self.heap[i]
-        self.task_position[self.heap[i].task_id] = i
-        self.task_position[self.heap[j].task_id] = j
-
-    def sift_up(self, i):
-        """Move a node up the heap to maintain the heap property"""
-        while i > 0 and self.heap[i].priority > self.heap[self.parent(i)].priority:
-            self.swap(i, self.parent(i))
-            i = self.parent(i)
-
-    def sift_down(self, i):
-        """Move a node down the heap to maintain the heap property"""
-        max_index = i
-        left = self.left_child(i)
-
-        if (left < len(self.heap) and self.heap[left].priority > self.heap[max_index].priority):
-            max_index = left
-
-        right = self.right_child(i)
-        if (right < len(self.heap) and self.heap[right].priority > self.heap[max_index].priority):
-            max_index = right
-
-        if (i != max_index):
-            self.swap(i, max_index)
-            self.sift_down(max_index)
-
-    def insert(self, task):
-        """
-        Insert a new task into the priority queue
-        Time complexity: O(log n) where n is the number of tasks
-        """
-        self.heap.append(task)
-        index = len(self.heap) - 1
-        self.task_position[task.task_id] = index
-        self.sift_up(index)
-
-    def extract_max(self):
-        """
-        Remove and return the task with the highest priority
-        Time complexity: O(log n) where n is the number of tasks
+        Initialize an empty priority queue
+        key: optional function mapping a task to its sort key, defaults to its priority
+        arity: number of children per node in the heap
+        lazy_remove: if True, remove() marks tasks as removed and skips them later
+        compaction_threshold: fraction of removed entries that triggers a rebuild
+        tie_break: None, "sequence" or "arrival" order among tasks with equal keys
         """
-        if (self.is_empty()):
-            return None
+        super().__init__("max", key, arity, lazy_remove, compaction_threshold, tie_break)
 
-        max_task = self.heap[0]
-        last_task = self.heap.pop()
-
-        if (self.heap):  # If heap is not empty after popping
-            self.heap[0] = last_task
-            self.task_position[last_task.task_id] = 0
-            self.sift_down(0)
-
-        del self.task_position[max_task.task_id]
-        return max_task
+    extract_max = HeapPriorityQueue.extract
 
     def increase_key(self, task_id, new_priority):
         """
@@ -264,16 +706,13 @@ class MaxHeapPriorityQueue:
         For max-heap, increase means the priority value becomes larger
         Time complexity: O(log n) where n is the number of tasks
         """
-        if (task_id not in self.task_position):
+        if (task_id not in self):
             return False
 
-        index = self.task_position[task_id]
-        if (new_priority <= self.heap[index].priority):
+        if (new_priority <= self.heap[self.task_position[task_id]].priority):
             return False  # New priority is not larger
 
-        self.heap[index].priority = new_priority
-        self.sift_up(index)
-        return True
+        return self.change_priority(task_id, new_priority)
 
     def decrease_key(self, task_id, new_priority):
         """
@@ -281,16 +720,25 @@ class MaxHeapPriorityQueue:
         For max-heap, decrease means the priority value becomes smaller
         Time complexity: O(log n) where n is the number of tasks
         """
-        if (task_id not in self.task_position):
+        if (task_id not in self):
             return False
 
-        index = self.task_position[task_id]
-        if (new_priority >= self.heap[index].priority):
+        if (new_priority >= self.heap[self.task_position[task_id]].priority):
             return False  # New priority is not smaller
 
-        self.heap[index].priority = new_priority
-        self.sift_down(index)
-        return True
+        return self.change_priority(task_id, new_priority)
+
+
+def make_priority_queue(order="min", **kwargs):
+    """
+    Create a MinHeapPriorityQueue or MaxHeapPriorityQueue for the given order
+    Keyword arguments are passed to the constructor
+    """
+    if (order == "min"):
+        return MinHeapPriorityQueue(**kwargs)
+    if (order == "max"):
+        return MaxHeapPriorityQueue(**kwargs)
+    raise ValueError(f"order must be 'min' or 'max', got {order!r}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,316 @@
+import multiprocessing
+import random
+import threading
+
+from priority_queue import Task, HeapPriorityQueue, make_priority_queue
+
+
+def _top_key(shard):
+    """Cached sort key of a shard's top task, or None if the shard is empty"""
+    try:
+        return shard.keys[0]
+    except IndexError:
+        return None
+
+
+class ShardedPriorityQueue:
+    """
+    Priority queue split into independent heaps (shards) that can be used from many threads
+    Each task_id is hashed to one shard, so key changes are routed to the shard holding the task
+    Relaxed mode extracts the better top of two randomly sampled shards (MultiQueue),
+    strict mode keeps the shard tops in a small top-level heap and extracts in exact order
+    """
+
+    def __init__(self, num_shards=8, order="min", key=None, arity=2, strict=False):
+        """
+        Initialize an empty sharded priority queue
+        num_shards: number of independent heaps
+        order: "min" extracts the task with the smallest key first, "max" the largest
+        key: optional function mapping a task to its sort key, defaults to its priority
+        arity: number of children per node in every shard
+        strict: if True, extract in exact order at the cost of one global lock
+        """
+        if (num_shards < 1):
+            raise ValueError(f"num_shards must be at least 1, got {num_shards!r}")
+
+        self.shards = [make_priority_queue(order, key=key, arity=arity) for _ in range(num_shards)]
+        self.locks = [threading.Lock() for _ in range(num_shards)]
+        self.strict = strict
+        # Strict mode: one entry per non-empty shard, task_id is the shard index
+        # and priority is the cached sort key of the shard's top task
+        self.heads = HeapPriorityQueue("min")
+        self.heads_lock = threading.Lock()
+
+    def shard_of(self, task_id):
+        """Index of the shard responsible for a task"""
+        return hash(task_id) % len(self.shards)
+
+    def __len__(self):
+        """Number of tasks in all shards"""
+        return sum(len(shard) for shard in self.shards)
+
+    def is_empty(self):
+        """Check if every shard is empty"""
+        return all(shard.is_empty() for shard in self.shards)
+
+    def _update_head(self, index):
+        """Sync the top-level entry of a shard with its current top (strict mode)"""
+        shard = self.shards[index]
+        if (shard.is_empty()):
+            self.heads.remove(index)
+        elif (index in self.heads):
+            self.heads.change_priority(index, shard.keys[0])
+        else:
+            self.heads.insert(Task(index, shard.keys[0]))
+
+    def _call(self, task_id, operation, *args):
+        """Run a shard operation on the shard of task_id under the right locks"""
+        index = self.shard_of(task_id)
+        if (self.strict):
+            with self.heads_lock:
+                result = getattr(self.shards[index], operation)(*args)
+                self._update_head(index)
+                return result
+
+        with self.locks[index]:
+            return getattr(self.shards[index], operation)(*args)
+
+    def insert(self, task):
+        """
+        Insert a new task into its shard
+        Time complexity: O(log(n / s)), plus O(log s) in strict mode for s shards
+        """
+        self._call(task.task_id, "insert", task)
+
+    def insert_many(self, tasks):
+        """Insert a batch of tasks, taking each shard's lock once"""
+        batches = [[] for _ in self.shards]
+        for task in tasks:
+            batches[self.shard_of(task.task_id)].append(task)
+
+        for index, batch in enumerate(batches):
+            if (not batch):
+                continue
+            if (self.strict):
+                with self.heads_lock:
+                    self.shards[index].insert_many(batch)
+                    self._update_head(index)
+            else:
+                with self.locks[index]:
+                    self.shards[index].insert_many(batch)
+
+    def decrease_key(self, task_id, new_priority):
+        """Decrease the priority of a task in its shard"""
+        return self._call(task_id, "decrease_key", task_id, new_priority)
+
+    def increase_key(self, task_id, new_priority):
+        """Increase the priority of a task in its shard"""
+        return self._call(task_id, "increase_key", task_id, new_priority)
+
+    def remove(self, task_id):
+        """Remove a task from its shard"""
+        return self._call(task_id, "remove", task_id)
+
+    def extract(self):
+        """
+        Remove and return a top task
+        Strict mode returns the exact top of all shards, relaxed mode the better top
+        of two random shards, falling back to a scan when both are empty
+        Returns None if every shard is empty
+        """
+        if (self.strict):
+            with self.heads_lock:
+                if (self.heads.is_empty()):
+                    return None
+                index = self.heads.peek().task_id
+                task = self.shards[index].extract()
+                self._update_head(index)
+                return task
+
+        shards = self.shards
+        if (len(shards) > 1):
+            first, second = random.sample(range(len(shards)), 2)
+            # Reading the tops without locks is fine, the choice is only a heuristic
+            first_key, second_key = _top_key(shards[first]), _top_key(shards[second])
+            if (second_key is not None and (first_key is None or second_key < first_key)):
+                first, second = second, first
+            for index in (first, second):
+                with self.locks[index]:
+                    if (not shards[index].is_empty()):
+                        return shards[index].extract()
+
+        for index in range(len(shards)):
+            with self.locks[index]:
+                if (not shards[index].is_empty()):
+                    return shards[index].extract()
+        return None
+
+
+def _shard_server(connection, order, key, arity):
+    """
+    Serve one shard in a worker process
+    Every reply carries the cached sort key of the shard's top task (None when empty)
+    so that the client can order shards without extra round trips
+    A failed operation replies with its exception instead of a result, the worker and
+    the tasks of its shard stay alive
+    """
+    shard = make_priority_queue(order, key=key, arity=arity)
+    while True:
+        operation, args = connection.recv()
+        if (operation == "close"):
+            connection.close()
+            return
+        try:
+            result = getattr(shard, operation)(*args)
+        except Exception as exc:
+            result = exc
+        head_key = shard.keys[0] if shard.heap else None
+        try:
+            connection.send((result, head_key))
+        except Exception as exc:  # An exception or result that does not pickle
+            connection.send((RuntimeError(f"{operation} failed: {result!r}, reply not picklable: {exc!r}"),
+                             head_key))
+
+
+class ProcessShardedPriorityQueue:
+    """
+    Sharded priority queue whose shards each live in their own worker process
+    Shards run operations in parallel, for example the per-shard parts of insert_many()
+    The client keeps the top key of every shard, so relaxed and strict extraction only
+    talk to the one shard the task is taken from
+    """
+
+    def __init__(self, num_shards=None, order="min", key=None, arity=2, strict=False):
+        """
+        Start one worker process per shard
+        num_shards: number of shards, defaults to the number of CPUs
+        order: "min" extracts the task with the smallest key first, "max" the largest
+        key: optional picklable function mapping a task to its sort key
+        arity: number of children per node in every shard
+        strict: if True, extract in exact order through a top-level heap of shard tops
+        """
+        num_shards = num_shards or multiprocessing.cpu_count()
+        self.strict = strict
+        self.connections = []
+        self.processes = []
+        for _ in range(num_shards):
+            connection, worker_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_shard_server, args=(worker_connection, order, key, arity),
+                                              daemon=True)
+            process.start()
+            worker_connection.close()
+            self.connections.append(connection)
+            self.processes.append(process)
+        self.head_keys = [None] * num_shards  # Cached sort key of every shard's top task
+        self.heads = HeapPriorityQueue("min")  # Same layout as ShardedPriorityQueue.heads
+        self.size = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Stop all worker processes"""
+        for connection, process in zip(self.connections, self.processes):
+            if (process.is_alive()):
+                connection.send(("close", ()))
+            process.join()
+            connection.close()
+        self.processes = []
+        self.connections = []
+
+    def shard_of(self, task_id):
+        """Index of the shard responsible for a task"""
+        return hash(task_id) % len(self.connections)
+
+    def __len__(self):
+        """Number of tasks in all shards"""
+        return self.size
+
+    def is_empty(self):
+        """Check if every shard is empty"""
+        return self.size == 0
+
+    def _receive(self, index):
+        """Receive a reply from a shard, record its new top key, and re-raise a failed operation"""
+        result, head_key = self.connections[index].recv()
+        self.head_keys[index] = head_key
+        if (head_key is None):
+            self.heads.remove(index)
+        elif (index in self.heads):
+            self.heads.change_priority(index, head_key)
+        else:
+            self.heads.insert(Task(index, head_key))
+        if (isinstance(result, Exception)):
+            raise result
+        return result
+
+    def _call(self, index, operation, *args):
+        """Run an operation on one shard and wait for its result"""
+        self.connections[index].send((operation, args))
+        return self._receive(index)
+
+    def insert(self, task):
+        """Insert a new task into its shard"""
+        self._call(self.shard_of(task.task_id), "insert", task)
+        self.size += 1
+
+    def insert_many(self, tasks):
+        """Insert a batch of tasks, with all shards inserting their part in parallel"""
+        batches = [[] for _ in self.connections]
+        for task in tasks:
+            batches[self.shard_of(task.task_id)].append(task)
+
+        busy = [index for index, batch in enumerate(batches) if batch]
+        for index in busy:
+            self.connections[index].send(("insert_many", (batches[index],)))
+        error = None
+        for index in busy:  # Every shard replies, even after another one failed
+            try:
+                self._receive(index)
+                self.size += len(batches[index])
+            except Exception as exc:
+                error = error or exc
+        if (error is not None):
+            raise error
+
+    def decrease_key(self, task_id, new_priority):
+        """Decrease the priority of a task in its shard"""
+        return self._call(self.shard_of(task_id), "decrease_key", task_id, new_priority)
+
+    def increase_key(self, task_id, new_priority):
+        """Increase the priority of a task in its shard"""
+        return self._call(self.shard_of(task_id), "increase_key", task_id, new_priority)
+
+    def remove(self, task_id):
+        """Remove a task from its shard"""
+        removed = self._call(self.shard_of(task_id), "remove", task_id)
+        self.size -= removed
+        return removed
+
+    def extract(self):
+        """
+        Remove and return a top task, exact in strict mode and from the better
+        of two random non-empty shards otherwise
+        Returns None if every shard is empty
+        """
+        if (self.size == 0):
+            return None
+
+        if (self.strict or len(self.connections) == 1):
+            index = self.heads.peek().task_id
+        else:
+            candidates = random.sample(range(len(self.connections)), 2)
+            candidates = [i for i in candidates if self.head_keys[i] is not None]
+            if (not candidates):
+                index = self.heads.peek().task_id
+            elif (len(candidates) == 1 or not self.head_keys[candidates[1]] < self.head_keys[candidates[0]]):
+                index = candidates[0]
+            else:
+                index = candidates[1]
+
+        task = self._call(index, "extract")
+        self.size -= 1
+        return task
@@ -1,6 +1,29 @@
-from priority_queue import Task, MinHeapPriorityQueue, MaxHeapPriorityQueue
+from priority_queue import (
+    Task, HeapPriorityQueue, MinHeapPriorityQueue, MaxHeapPriorityQueue, deadline_key,
+    OP_INSERT, OP_CHANGE_PRIORITY, OP_DECREASE_KEY, OP_INCREASE_KEY, OP_REMOVE, OP_EXTRACT,
+)
+from concurrent_priority_queue import ThreadSafePriorityQueue, AsyncPriorityQueue
+from sharded_priority_queue import ShardedPriorityQueue, ProcessShardedPriorityQueue
+from deadline_scheduler import DeadlineScheduler
+from persistent_priority_queue import PersistentPriorityQueue
+from meldable_heaps import PairingHeapPriorityQueue, FibonacciHeapPriorityQueue
+from compact_priority_queue import CompactMinHeapPriorityQueue, CompactMaxHeapPriorityQueue
+from indexed_priority_queue import IndexedMinHeapPriorityQueue, IndexedMaxHeapPriorityQueue
+from bucket_priority_queue import BucketMinPriorityQueue, BucketMaxPriorityQueue, RadixHeapPriorityQueue
+from aging_priority_queue import AgingPriorityQueue
+from fair_scheduler import FairScheduler
+from instrumentation import HeapMetrics, LatencyHistogram, instrument, uninstrument
+from benchmark import BenchmarkResult, measure, write_json, write_csv, load_results, compare_results
+import gc
 import time
 import random
+import tracemalloc
+import threading
+import asyncio
+import os
+import shutil
+import tempfile
+from array import array
 
 
 def test_basic_operations():
@@ -96,6 +119,1219 @@ def test_priority_changes():
         print(f"Extracted: {task}")
 
 
+def test_bulk_operations():
+    """Test bulk loading with from_tasks and insert_many"""
+    print("\n=== Testing Bulk Operations ===")
+
+    priorities = [random.randint(1, 1000) for _ in range(500)]
+
+    min_pq = MinHeapPriorityQueue.from_tasks(Task(i, p, 0) for i, p in enumerate(priorities[:200]))
+    min_pq.insert_many(Task(i, p, 0) for i, p in enumerate(priorities[200:210], 200))  # sift path
+    min_pq.insert_many(Task(i, p, 0) for i, p in enumerate(priorities[210:], 210))  # rebuild path
+    assert all(min_pq.heap[index].task_id == task_id for task_id, index in min_pq.task_position.items())
+
+    extracted = []
+    while not min_pq.is_empty():
+        extracted.append(min_pq.extract_min().priority)
+    assert extracted == sorted(priorities)
+    print("MinHeap bulk load extracted", len(extracted), "tasks in order")
+
+    max_pq = MaxHeapPriorityQueue.from_tasks(Task(i, p, 0) for i, p in enumerate(priorities))
+    max_pq.increase_key(0, 2000)
+    assert max_pq.extract_max().task_id == 0
+    extracted = []
+    while not max_pq.is_empty():
+        extracted.append(max_pq.extract_max().priority)
+    assert extracted == sorted(priorities[1:], reverse=True)
+    print("MaxHeap bulk load extracted", len(extracted) + 1, "tasks in order")
+
+
+def test_custom_keys():
+    """Test ordering by composite sort keys"""
+    print("\n=== Testing Custom Sort Keys ===")
+
+    tasks = [
+        Task(1, 5, 0, deadline=30),
+        Task(2, 5, 1, deadline=10),
+        Task(3, 1, 2),
+        Task(4, 8, 3, deadline=10),
+        Task(5, 2, 4, deadline=20),
+    ]
+
+    # Earliest deadline first, ties broken by priority
+    edf_pq = MinHeapPriorityQueue.from_tasks(tasks, key=deadline_key)
+    edf_pq.decrease_key(4, 3)
+    order = []
+    while not edf_pq.is_empty():
+        order.append(edf_pq.extract_min().task_id)
+    print("Earliest-deadline-first order:", order)
+    assert order == [4, 2, 5, 1, 3]
+
+    # Highest priority first, ties broken by the latest arrival
+    max_pq = HeapPriorityQueue("max", key=lambda task: (task.priority, task.arrival_time))
+    for task in tasks:
+        max_pq.insert(task)
+    max_pq.change_priority(3, 5)
+    order = []
+    while not max_pq.is_empty():
+        order.append(max_pq.extract().task_id)
+    print("Max priority, latest arrival first order:", order)
+    assert order == [3, 2, 1, 4, 5]
+
+
+def test_arity():
+    """Test d-ary heaps against sorted order"""
+    print("\n=== Testing Heap Arity ===")
+
+    priorities = [random.randint(1, 1000) for _ in range(1000)]
+    for arity in (2, 3, 4, 8):
+        min_pq = MinHeapPriorityQueue.from_tasks((Task(i, p, 0) for i, p in enumerate(priorities)), arity=arity)
+        for i in range(0, 1000, 7):
+            min_pq.decrease_key(i, priorities[i] // 2)
+        expected = sorted(p // 2 if i % 7 == 0 and p // 2 < p else p for i, p in enumerate(priorities))
+
+        extracted = []
+        while not min_pq.is_empty():
+            extracted.append(min_pq.extract_min().priority)
+        assert extracted == expected
+        print(f"Arity {arity}: extracted {len(extracted)} tasks in order")
+
+
+def test_arity_benchmark():
+    """Compare heap arities on mixes of insert, decrease_key and extract_min"""
+    print("\n=== Arity Benchmark ===")
+
+    size = 10000
+    operations = 20000
+    # Share of insert / decrease_key / extract_min operations in each mix
+    mixes = {
+        "Insert-heavy": (0.6, 0.3, 0.1),
+        "Decrease-heavy": (0.2, 0.7, 0.1),
+        "Balanced": (0.34, 0.33, 0.33),
+    }
+
+    for mix_name, (insert_share, decrease_share, _) in mixes.items():
+        rng = random.Random(42)
+        ops = []
+        for _ in range(operations):
+            r = rng.random()
+            ops.append(0 if r < insert_share else 1 if r < insert_share + decrease_share else 2)
+
+        results = []
+        final_heaps = []
+        for arity in (2, 4, 8):
+            def setup():
+                rng = random.Random(7)
+                min_pq = MinHeapPriorityQueue.from_tasks((Task(i, rng.randint(1, 1000), 0) for i in range(size)),
+                                                         arity=arity)
+                final_heaps.append(min_pq)
+                return min_pq, rng
+
+            def run(state):
+                min_pq, rng = state
+                next_id = size
+                for op in ops:
+                    if (op == 0):
+                        min_pq.insert(Task(next_id, rng.randint(1, 1000), 0))
+                        next_id += 1
+                    elif (op == 1):
+                        task = min_pq.heap[rng.randrange(len(min_pq.heap))]
+                        min_pq.decrease_key(task.task_id, task.priority - 1)
+                    else:
+                        min_pq.extract_min()
+
+            avg_op = measure(run, setup, ops=operations, warmup=0, trials=3).median_ns / 1e6
+            results.append(f"d={arity}: {avg_op:.4f}ms/op")
+
+        # Every arity ends with the same number of tasks, each in a valid heap
+        assert len({len(min_pq) for min_pq in final_heaps}) == 1
+        for min_pq in final_heaps:
+            keys, arity = min_pq.keys, min_pq.arity
+            assert all(not keys[i] < keys[(i - 1) // arity] for i in range(1, len(keys)))
+
+        print(f"{mix_name:<15}" + ", ".join(results))
+
+
+def test_remove():
+    """Test eager and lazy removal of tasks"""
+    print("\n=== Testing Task Removal ===")
+
+    priorities = [random.randint(1, 1000) for _ in range(2000)]
+    cancelled = set(random.sample(range(2000), 800))
+    expected = sorted(p for i, p in enumerate(priorities) if i not in cancelled)
+
+    for lazy_remove in (False, True):
+        min_pq = MinHeapPriorityQueue.from_tasks((Task(i, p, 0) for i, p in enumerate(priorities)),
+                                                 lazy_remove=lazy_remove, compaction_threshold=0.3)
+        for task_id in cancelled:
+            assert min_pq.remove(task_id)
+        assert not min_pq.remove(next(iter(cancelled)))  # Already removed
+        assert not min_pq.decrease_key(next(iter(cancelled)), 0)
+        assert len(min_pq) == len(expected)
+        if (lazy_remove):
+            print(f"Lazy removal: {len(min_pq.heap)} entries stored for {len(min_pq)} live tasks")
+
+        extracted = []
+        while not min_pq.is_empty():
+            # peek_second() looks past lazily removed tasks as well
+            second = min_pq.peek_second()
+            assert (second.priority if second else None) == (expected[len(extracted) + 1]
+                                                              if len(extracted) + 1 < len(expected) else None)
+            extracted.append(min_pq.extract_min().priority)
+        assert extracted == expected
+        assert min_pq.extract_min() is None
+        print(f"{'Lazy' if lazy_remove else 'Eager'} removal: extracted {len(extracted)} tasks in order")
+
+    # Re-inserting a lazily removed task replaces the stale entry
+    max_pq = MaxHeapPriorityQueue(lazy_remove=True, compaction_threshold=1)
+    for task_id, priority in [(1, 5), (2, 9), (3, 7)]:
+        max_pq.insert(Task(task_id, priority, 0))
+    max_pq.remove(2)
+    max_pq.insert(Task(2, 1, 0))
+    assert [max_pq.extract_max().task_id for _ in range(3)] == [3, 1, 2]
+
+
+def test_thread_safe_queue():
+    """Test concurrent producers and consumers on a thread-safe queue"""
+    print("\n=== Testing Thread-Safe Priority Queue ===")
+
+    pq = ThreadSafePriorityQueue("min")
+    producers, consumers, per_producer = 4, 4, 2000
+    consumed = [[] for _ in range(consumers)]
+
+    def produce(offset):
+        tasks = [Task(offset + i, random.randint(1, 1000), 0) for i in range(per_producer)]
+        for start in range(0, per_producer, 100):
+            pq.put_many(tasks[start:start + 50])
+            for task in tasks[start + 50:start + 100]:
+                pq.put(task)
+
+    def consume(index):
+        while True:
+            tasks = pq.get_many(64, timeout=0.5)
+            if (not tasks):
+                return
+            consumed[index].extend(tasks)
+            # Each batch leaves the heap in priority order
+            assert all(a.priority <= b.priority for a, b in zip(tasks, tasks[1:]))
+
+    threads = [threading.Thread(target=produce, args=(i * per_producer,)) for i in range(producers)]
+    threads += [threading.Thread(target=consume, args=(i,)) for i in range(consumers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    task_ids = sorted(task.task_id for tasks in consumed for task in tasks)
+    assert task_ids == list(range(producers * per_producer))
+    assert pq.get(timeout=0.01) is None
+    print(f"Consumed {len(task_ids)} tasks from {producers} producers with {consumers} consumers")
+
+    pq.put(Task(1, 5, 0))
+    pq.put(Task(2, 3, 0))
+    assert pq.decrease_key(1, 1)
+    assert pq.get(block=False).task_id == 1
+
+
+def test_thread_safe_contention():
+    """Measure the single heap lock under contention against the same heap operations without threads"""
+    print("\n=== Thread-Safe Queue Contention ===")
+
+    producers, per_producer = 4, 10000
+    priorities = [random.random() for _ in range(producers * per_producer)]
+
+    def sequential(pq):
+        for i, p in enumerate(priorities):
+            pq.insert(Task(i, p, 0))
+        while not pq.is_empty():
+            pq.extract()
+
+    def contended(pq):
+        consumed = []
+
+        def produce(offset):
+            for i in range(offset, offset + per_producer):
+                pq.put(Task(i, priorities[i], 0))
+
+        def consume():
+            while len(consumed) < len(priorities):
+                task = pq.get(timeout=0.05)
+                if (task is not None):
+                    consumed.append(task)
+
+        threads = [threading.Thread(target=produce, args=(i * per_producer,)) for i in range(producers)]
+        threads.append(threading.Thread(target=consume))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(consumed) == len(priorities) and pq.is_empty()
+
+    ops = 2 * len(priorities)
+    bound = measure(sequential, MinHeapPriorityQueue, ops=ops, trials=3).median_ns
+    locked = measure(contended, ThreadSafePriorityQueue, ops=ops, trials=3).median_ns
+    print(f"Heap alone: {bound:.0f}ns/op, {producers} producers and 1 consumer: {locked:.0f}ns/op "
+          f"({locked / bound:.2f}x)")
+    # The GIL already serializes the heap operations, the lock only adds its own overhead
+    assert locked < 4 * bound
+
+
+def test_async_queue():
+    """Test that waiting consumers of the asyncio queue are woken one per task"""
+    print("\n=== Testing Asyncio Priority Queue ===")
+
+    async def run():
+        pq = AsyncPriorityQueue("max")
+        results = []
+
+        async def consume():
+            results.append(await pq.get())
+
+        consumers = [asyncio.create_task(consume()) for _ in range(3)]
+        await asyncio.sleep(0)
+        assert len(pq.getters) == 3
+
+        pq.put(Task(1, 5, 0))
+        await asyncio.sleep(0)
+        assert len(results) == 1 and len(pq.getters) == 2  # Only one consumer was woken
+
+        pq.put_many([Task(2, 1, 0), Task(3, 9, 0)])
+        await asyncio.gather(*consumers)
+        assert sorted(task.task_id for task in results) == [1, 2, 3]
+
+        pq.put_many([Task(4, 2, 0), Task(5, 4, 0), Task(6, 6, 0)])
+        pq.increase_key(4, 10)
+        assert [task.task_id for task in await pq.get_many(2)] == [4, 6]
+        assert pq.get_nowait().task_id == 5
+        assert pq.get_nowait() is None
+        print("Woke one consumer per inserted task")
+
+    asyncio.run(run())
+
+
+def test_sharded_queue():
+    """Test strict and relaxed extraction from sharded queues"""
+    print("\n=== Testing Sharded Priority Queues ===")
+
+    priorities = [random.randint(1, 1000) for _ in range(2000)]
+
+    for strict in (True, False):
+        pq = ShardedPriorityQueue(num_shards=8, order="min", strict=strict)
+        pq.insert_many(Task(i, p, 0) for i, p in enumerate(priorities[:1000]))
+        for i, p in enumerate(priorities[1000:], 1000):
+            pq.insert(Task(i, p, 0))
+        for i in range(0, 2000, 10):
+            pq.decrease_key(i, 0)
+        pq.remove(1)
+
+        extracted = []
+        while not pq.is_empty():
+            extracted.append(pq.extract().priority)
+        assert pq.extract() is None
+        expected = sorted(0 if i % 10 == 0 else p for i, p in enumerate(priorities) if i != 1)
+        if (strict):
+            assert extracted == expected
+        else:
+            assert sorted(extracted) == expected
+            inversions = sum(a > b for a, b in zip(extracted, extracted[1:]))
+            print(f"Relaxed mode: {inversions} adjacent inversions in {len(extracted)} extractions")
+        print(f"{'Strict' if strict else 'Relaxed'} mode extracted {len(extracted)} tasks")
+
+    for strict in (True, False):
+        with ProcessShardedPriorityQueue(num_shards=2, order="max", strict=strict) as pq:
+            pq.insert_many(Task(i, p, 0) for i, p in enumerate(priorities[:200]))
+            pq.insert(Task(200, 5000, 0))
+            assert pq.increase_key(3, 6000)
+            extracted = []
+            while not pq.is_empty():
+                extracted.append(pq.extract().task_id)
+            assert sorted(extracted) == list(range(201))
+            if (strict):
+                assert extracted[:2] == [3, 200]
+        print(f"Process shards ({'strict' if strict else 'relaxed'}) extracted {len(extracted)} tasks")
+
+    # A failed operation is raised in the client and leaves its shard serving
+    with ProcessShardedPriorityQueue(num_shards=2) as pq:
+        pq.insert_many(Task(i, p, 0) for i, p in enumerate(priorities[:100]))
+        for operation in (lambda: pq.insert(Task(100, "urgent", 0)),
+                          lambda: pq.insert_many([Task(102, 1, 0), Task(104, "urgent", 0)]),  # One shard
+                          lambda: pq.decrease_key(5, "urgent")):
+            try:
+                operation()
+                assert False, "incomparable priority accepted"
+            except TypeError:
+                pass
+        assert len(pq) == 100
+        extracted = []
+        while not pq.is_empty():
+            extracted.append(pq.extract().priority)
+        assert extracted == sorted(priorities[:100]) and pq.extract() is None
+
+
+def test_deadline_scheduler():
+    """Test expiry and earliest-deadline-first extraction against a linear scan"""
+    print("\n=== Testing Deadline Scheduler ===")
+
+    rng = random.Random(3)
+    scheduler = DeadlineScheduler(tick=1.0, wheel_size=16, levels=2)
+    pending = {}
+    now = 0
+    expired_count = 0
+
+    for task_id in range(5000):
+        deadline = now + rng.choice([rng.uniform(-2, 20), rng.uniform(0, 300), rng.uniform(0, 5000)])
+        task = Task(task_id, rng.randint(1, 10), now, deadline)
+        scheduler.schedule(task)
+        pending[task_id] = task
+
+        if (task_id % 7 == 0):
+            cancelled = rng.choice(list(pending))
+            assert scheduler.cancel(cancelled)
+            del pending[cancelled]
+
+        if (task_id % 50 == 0 and pending):
+            earliest = scheduler.extract_earliest()
+            assert earliest.deadline == min(task.deadline for task in pending.values())
+            del pending[earliest.task_id]
+
+        if (task_id % 10 == 0):
+            now += rng.choice([0.5, 3, 40])
+            expired = scheduler.pop_expired(now)
+            assert {task.task_id for task in expired} == {i for i, task in pending.items() if task.deadline <= now}
+            for task in expired:
+                del pending[task.task_id]
+            expired_count += len(expired)
+
+    assert len(scheduler) == len(pending)
+    print(f"Expired {expired_count} tasks, {len(scheduler)} still scheduled")
+
+
+def test_persistent_queue():
+    """Test reopening and crash recovery of the memory-mapped priority queue"""
+    print("\n=== Testing Persistent Priority Queue ===")
+
+    priorities = [random.randint(1, 1000) for _ in range(3000)]
+    expected = sorted(0 if i % 3 == 0 else p for i, p in enumerate(priorities) if i != 1)
+
+    directory = tempfile.mkdtemp()
+    crash_directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, "queue")
+        pq = PersistentPriorityQueue(path, fsync="batch", checkpoint_every=1000)
+        for i, p in enumerate(priorities):
+            pq.insert(Task(i, p, i, deadline=None if i % 2 else i + 5))
+        for i in range(0, 3000, 3):
+            pq.decrease_key(i, 0)
+        pq.remove(1)
+        extracted = [pq.extract().priority for _ in range(100)]
+        pq.close()
+
+        # A cleanly closed queue is mapped again without replaying anything
+        pq = PersistentPriorityQueue(path)
+        assert len(pq) == len(expected) - 100
+        pq.flush()
+
+        # Copying the files of an open queue leaves a data file that was not closed cleanly
+        for suffix in ("", ".wal", ".ckpt"):
+            shutil.copyfile(path + suffix, os.path.join(crash_directory, "queue" + suffix))
+
+        while not pq.is_empty():
+            extracted.append(pq.extract().priority)
+        pq.close()
+        assert extracted == expected
+        print(f"Reopened queue extracted {len(extracted)} tasks in order")
+
+        with PersistentPriorityQueue(os.path.join(crash_directory, "queue")) as recovered:
+            recovered_tasks = []
+            while not recovered.is_empty():
+                recovered_tasks.append(recovered.extract().priority)
+        assert recovered_tasks == expected[100:]
+        print(f"Recovered queue extracted {len(recovered_tasks)} tasks in order")
+
+        # A duplicate task_id is rejected on a freshly reopened queue too, and never reaches the log
+        duplicate_path = os.path.join(directory, "duplicate")
+        with PersistentPriorityQueue(duplicate_path) as pq:
+            pq.insert(Task(1, 5, 0))
+        pq = PersistentPriorityQueue(duplicate_path, fsync="always")
+        assert pq.task_position is None
+        try:
+            pq.insert(Task(1, 3, 0))
+            assert False, "duplicate task_id accepted"
+        except ValueError:
+            pass
+        pq.insert(Task(2, 7, 0))
+        for suffix in ("", ".wal", ".ckpt"):
+            shutil.copyfile(duplicate_path + suffix, os.path.join(crash_directory, "duplicate" + suffix))
+        pq.close()
+        with PersistentPriorityQueue(os.path.join(crash_directory, "duplicate")) as recovered:
+            assert [recovered.extract().task_id for _ in range(len(recovered))] == [1, 2]
+
+        # Crash after a checkpoint was installed but before the log was reset: the log
+        # is older than the checkpoint and must not be replayed on top of it
+        class CrashingLog:
+            def __init__(self, wal):
+                self.wal = wal
+
+            def __getattr__(self, name):
+                return getattr(self.wal, name)
+
+            def truncate(self, size):
+                raise RuntimeError("crash")
+
+        window_path = os.path.join(directory, "window")
+        pq = PersistentPriorityQueue(window_path, fsync="always")
+        for i in range(1, 5):
+            pq.insert(Task(i, i, 0))
+        pq.wal = CrashingLog(pq.wal)
+        try:
+            pq.checkpoint()
+            assert False, "checkpoint did not crash"
+        except RuntimeError:
+            pass
+        for suffix in ("", ".wal", ".ckpt"):
+            shutil.copyfile(window_path + suffix, os.path.join(crash_directory, "window" + suffix))
+        pq.wal.wal.close()
+        pq.map.close()
+        pq.file.close()
+
+        with PersistentPriorityQueue(os.path.join(crash_directory, "window")) as recovered:
+            assert [recovered.extract().priority for _ in range(len(recovered))] == [1, 2, 3, 4]
+    finally:
+        shutil.rmtree(directory)
+        shutil.rmtree(crash_directory)
+
+
+def test_meldable_heaps():
+    """Test the pairing and Fibonacci heaps, including melding two queues"""
+    print("\n=== Testing Meldable Heaps ===")
+
+    priorities = [random.randint(1, 1000) for _ in range(2000)]
+    for engine in (PairingHeapPriorityQueue, FibonacciHeapPriorityQueue):
+        first, second = engine("min"), engine("min")
+        for i, p in enumerate(priorities):
+            (first if i % 2 else second).insert(Task(i, p, 0))
+        for i in range(0, 2000, 4):
+            (first if i % 2 else second).decrease_key(i, priorities[i] // 3)
+        first.remove(1)
+        first.meld(second)
+        assert second.is_empty() and len(first) == 1999
+
+        extracted = []
+        while not first.is_empty():
+            extracted.append(first.extract().priority)
+        assert extracted == sorted(p // 3 if i % 4 == 0 else p for i, p in enumerate(priorities) if i != 1)
+        print(f"{engine.__name__}: extracted {len(extracted)} tasks in order after meld")
+
+
+def dijkstra(graph, source, pq):
+    """Shortest path distances from source using a min-priority queue with decrease_key"""
+    distances = {source: 0}
+    pq.insert(Task(source, 0, 0))
+    while not pq.is_empty():
+        task = pq.extract()
+        for neighbour, weight in graph[task.task_id]:
+            distance = task.priority + weight
+            if (neighbour not in distances):
+                distances[neighbour] = distance
+                pq.insert(Task(neighbour, distance, 0))
+            elif (distance < distances[neighbour] and pq.decrease_key(neighbour, distance)):
+                distances[neighbour] = distance
+    return distances
+
+
+def test_meldable_benchmark():
+    """Compare the binary heap with the meldable heaps on Dijkstra and queue merging"""
+    print("\n=== Meldable Heap Benchmark ===")
+
+    rng = random.Random(11)
+    nodes, edges_per_node = 20000, 8
+    graph = [[(rng.randrange(nodes), rng.randint(1, 100)) for _ in range(edges_per_node)] for _ in range(nodes)]
+    engines = {
+        "Binary": lambda: MinHeapPriorityQueue(),
+        "Pairing": lambda: PairingHeapPriorityQueue("min"),
+        "Fibonacci": lambda: FibonacciHeapPriorityQueue("min"),
+    }
+
+    results = {}
+    for name, make in engines.items():
+        def run():
+            results[name] = dijkstra(graph, 0, make())
+
+        seconds = measure(run, warmup=0, trials=3).median_ns / 1e9
+        print(f"{name:<10} Dijkstra on {nodes} nodes: {seconds:.4f} seconds")
+    assert results["Binary"] == results["Pairing"] == results["Fibonacci"]
+
+    queues, per_queue = 200, 500
+    priorities = [rng.randint(1, 1000) for _ in range(queues * per_queue)]
+    for name, make in engines.items():
+        merged_queues = []
+
+        def setup():
+            tenants = [make() for _ in range(queues)]
+            for q, pq in enumerate(tenants):
+                for i in range(q * per_queue, (q + 1) * per_queue):
+                    pq.insert(Task(i, priorities[i], 0))
+            merged_queues.append(tenants[0])
+            return tenants
+
+        def merge(tenants):
+            merged = tenants[0]
+            for pq in tenants[1:]:
+                if (name == "Binary"):
+                    merged.insert_many(pq.heap)
+                else:
+                    merged.meld(pq)
+
+        seconds = measure(merge, setup, warmup=0, trials=3).median_ns / 1e9
+        print(f"{name:<10} merging {queues} queues of {per_queue} tasks: {seconds:.4f} seconds")
+        merged = merged_queues[-1]
+        assert len(merged) == queues * per_queue
+        assert [merged.extract().priority for _ in range(100)] == sorted(priorities)[:100]
+
+
+def test_compact_queue():
+    """Test the array-backed priority queues against the object-based ones"""
+    print("\n=== Testing Compact Priority Queues ===")
+
+    priorities = [random.randint(1, 1000) for _ in range(1000)]
+
+    compact_min = CompactMinHeapPriorityQueue("q")
+    for i, p in enumerate(priorities[:500]):
+        compact_min.insert(Task(i, p, i, deadline=i + 100 if i % 2 else None))
+    for i in range(0, 500, 5):
+        compact_min.decrease_key(i, 0)
+    first = compact_min.extract_min()
+    assert first.priority == 0 and first.deadline in (None, first.task_id + 100)
+
+    extracted = [first.priority]
+    while not compact_min.is_empty():
+        extracted.append(compact_min.extract_min().priority)
+    assert extracted == sorted(0 if i % 5 == 0 else p for i, p in enumerate(priorities[:500]))
+    print("Compact min-heap extracted", len(extracted), "tasks in order")
+
+    compact_max = CompactMaxHeapPriorityQueue.from_tasks(Task(i, p, 0) for i, p in enumerate(priorities))
+    compact_max.increase_key(10, 5000)
+    assert compact_max.extract_max().task_id == 10
+    assert not compact_max.increase_key(10, 6000)  # Already extracted
+
+    extracted = []
+    while not compact_max.is_empty():
+        extracted.append(compact_max.extract_max().priority)
+    assert extracted == sorted((p for i, p in enumerate(priorities) if i != 10), reverse=True)
+    print("Compact max-heap extracted", len(extracted) + 1, "tasks in order")
+
+    # Priorities come back in the column type, and ids past max_task_id are rejected
+    compact_float = CompactMinHeapPriorityQueue(max_task_id=100)
+    compact_float.insert(Task(100, 3, 0))
+    assert compact_float.peek().priority == 3.0 and isinstance(compact_float.peek().priority, float)
+    assert len(compact_float.position) == 101
+    for task_id in (101, 10 ** 12, -1):
+        try:
+            compact_float.insert(Task(task_id, 1, 0))
+            assert False, f"task id {task_id} should be rejected"
+        except ValueError:
+            pass
+    assert len(compact_float) == 1 and len(compact_float.position) == 101
+    compact_int = CompactMaxHeapPriorityQueue.from_tasks([Task(0, 7, 0)], priority_typecode="q")
+    assert isinstance(compact_int.extract_max().priority, int)
+
+    # A priority the column rejects leaves no trace of the task
+    compact_int.insert(Task(1, 5, 0))
+    for bad_task in (Task(2, 1.5, 0), Task(2, 1 << 64, 0), Task(2, 1, "now")):
+        try:
+            compact_int.insert(bad_task)
+            assert False, f"{bad_task} accepted"
+        except (TypeError, OverflowError):
+            pass
+        assert 2 not in compact_int and len(compact_int) == 1
+    compact_int.insert(Task(2, 9, 0))
+    assert [compact_int.extract_max().task_id for _ in range(2)] == [2, 1]
+
+
+def test_compact_memory():
+    """Compare memory per queued task of the object-based and compact queues"""
+    print("\n=== Memory per Task ===")
+
+    size = 100000
+    priorities = [random.randint(1, 1000) for _ in range(size)]
+
+    tracemalloc.start()
+    min_pq = MinHeapPriorityQueue.from_tasks(Task(i, p, 0) for i, p in enumerate(priorities))
+    object_bytes = tracemalloc.get_traced_memory()[0] / size
+    tracemalloc.stop()
+    del min_pq
+
+    tracemalloc.start()
+    compact_pq = CompactMinHeapPriorityQueue.from_tasks(Task(i, p, 0) for i, p in enumerate(priorities))
+    compact_bytes = tracemalloc.get_traced_memory()[0] / size
+    tracemalloc.stop()
+    del compact_pq
+
+    print(f"MinHeapPriorityQueue: {object_bytes:.1f} bytes/task, "
+          f"CompactMinHeapPriorityQueue: {compact_bytes:.1f} bytes/task")
+    # Four 8-byte columns and the position table, against a Task object and a dict entry per task
+    assert compact_bytes < object_bytes / 2
+
+
+def test_indexed_queue():
+    """Test handle-based operations and handle recycling of the indexed priority queue"""
+    print("\n=== Indexed Priority Queue ===")
+
+    min_pq = IndexedMinHeapPriorityQueue(capacity=4)
+    handles = [min_pq.insert(Task(task_id, priority, 0)) for task_id, priority in [(10, 7), (11, 4), (12, 9), (13, 3)]]
+    assert handles == [0, 1, 2, 3]
+    assert min_pq.decrease_key_by_handle(handles[2], 1) and not min_pq.decrease_key_by_handle(handles[2], 5)
+    assert min_pq.handle_of(12) == handles[2] and min_pq.task_of(handles[2]).priority == 1
+    assert min_pq.extract_min().task_id == 12 and not min_pq.is_valid(handles[2])
+
+    # The freed handle is recycled, the tables grow past the initial capacity
+    assert min_pq.insert(Task(14, 5, 0)) == handles[2]
+    more = min_pq.insert_many([Task(task_id, task_id, 0) for task_id in range(20, 30)])
+    assert len(set(more)) == 10 and len(min_pq.position) >= 14
+
+    # task_id API through the secondary map
+    assert min_pq.decrease_key(10, 2) and min_pq.remove(14) and 14 not in min_pq
+    assert [min_pq.extract_min().task_id for _ in range(3)] == [10, 13, 11]
+
+    # Both directions of key change on both orders, by handle and by task_id
+    assert min_pq.increase_key(20, 100) and min_pq.increase_key_by_handle(min_pq.handle_of(21), 101)
+    assert not min_pq.increase_key(22, 1) and not min_pq.increase_key_by_handle(min_pq.handle_of(22), 1)
+    assert [task.task_id for task in (min_pq.extract_min() for _ in range(len(min_pq)))][-2:] == [20, 21]
+
+    # A duplicate task_id anywhere in a batch is rejected before anything is inserted
+    dup_pq = IndexedMinHeapPriorityQueue.from_tasks(Task(i, i, 0) for i in range(5))
+    for batch in ([Task(5, 0, 0), Task(6, 1, 0), Task(2, 2, 0)], [Task(7, 0, 0), Task(8, 1, 0), Task(7, 2, 0)]):
+        try:
+            dup_pq.insert_many(batch)
+            assert False, "duplicate task_id accepted"
+        except ValueError:
+            pass
+    assert len(dup_pq) == 5 and [dup_pq.extract_min().task_id for _ in range(5)] == [0, 1, 2, 3, 4]
+
+    max_pq = IndexedMaxHeapPriorityQueue(index_task_ids=False)
+    handles = max_pq.insert_many(Task(i, random.randint(1, 1000), 0) for i in range(1000))
+    for handle in handles[:100]:
+        max_pq.increase_key_by_handle(handle, 2000 + handle)
+    assert [max_pq.extract_max().task_id for _ in range(100)] == list(range(99, -1, -1))
+    assert max_pq.decrease_key_by_handle(handles[100], -1) and not max_pq.decrease_key_by_handle(handles[100], 5)
+    assert max_pq.task_of(handles[100]).priority == -1
+    priorities = [max_pq.extract_max().priority for _ in range(len(max_pq))]
+    assert priorities == sorted(priorities, reverse=True)
+
+    # Handle updates against the task_id dictionary path of the heap core
+    size, updates = 50000, 100000
+    rng = random.Random(5)
+    task_ids = [("job", i) for i in range(size)]
+    priorities = [rng.randint(1, 10 ** 6) for _ in range(size)]
+    changes = [(rng.randrange(size), rng.randint(1, 10 ** 6)) for _ in range(updates)]
+    core = MinHeapPriorityQueue.from_tasks(Task(task_ids[i], p, 0) for i, p in enumerate(priorities))
+    indexed = IndexedMinHeapPriorityQueue()
+    handles = indexed.insert_many(Task(task_ids[i], p, 0) for i, p in enumerate(priorities))
+
+    start = time.perf_counter()
+    for i, priority in changes:
+        core.change_priority(task_ids[i], priority)
+    dict_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for i, priority in changes:
+        indexed.change_priority_by_handle(handles[i], priority)
+    handle_time = time.perf_counter() - start
+    print(f"Key changes: task_id {dict_time / updates * 1e6:.3f}us/op, handle {handle_time / updates * 1e6:.3f}us/op "
+          f"({dict_time / handle_time:.2f}x)")
+    assert [core.extract_min().priority for _ in range(size)] == [indexed.extract_min().priority for _ in range(size)]
+
+
+def test_bucket_queue():
+    """Test bucket and radix heap queues against the heap core, including the fallback heap"""
+    print("\n=== Bucket / Radix Queues ===")
+
+    rng = random.Random(21)
+    for bucket_class, heap_class in ((BucketMinPriorityQueue, MinHeapPriorityQueue),
+                                     (BucketMaxPriorityQueue, MaxHeapPriorityQueue)):
+        for kwargs in ({}, {"priority_range": (1, 100)}, {"max_buckets": 128}):
+            bucket_pq, heap_pq = bucket_class(**kwargs), heap_class()
+            next_id = 0
+            for _ in range(3000):
+                op = rng.random()
+                if (op < 0.45):
+                    # Mostly small integers, some far out of range and some floats
+                    priority = rng.choice([rng.randint(1, 100), rng.randint(-500, 500), rng.random() * 100])
+                    bucket_pq.insert(Task(next_id, priority, 0))
+                    heap_pq.insert(Task(next_id, priority, 0))
+                    next_id += 1
+                elif (op < 0.7 and next_id):
+                    task_id, priority = rng.randrange(next_id), rng.randint(-200, 200)
+                    assert bucket_pq.change_priority(task_id, priority) == heap_pq.change_priority(task_id, priority)
+                elif (op < 0.8 and next_id):
+                    task_id = rng.randrange(next_id)
+                    assert bucket_pq.remove(task_id) == heap_pq.remove(task_id)
+                elif (not heap_pq.is_empty()):
+                    expected = heap_pq.peek().priority
+                    assert bucket_pq.peek().priority == expected
+                    task = bucket_pq.extract()
+                    assert task.priority == expected and heap_pq.remove(task.task_id)
+                assert len(bucket_pq) == len(heap_pq)
+            if (kwargs.get("priority_range")):
+                assert bucket_pq.low == 1 and bucket_pq.high == 100
+            assert bucket_pq.increase_key(-1, 5) is False and bucket_pq.decrease_key(-1, 5) is False
+
+    # Monotone workload: priorities never drop below the last extracted one
+    radix, heap_pq = RadixHeapPriorityQueue(), MinHeapPriorityQueue()
+    last = 0
+    for i in range(5000):
+        priority = last + rng.randint(0, 1000)
+        radix.insert(Task(i, priority, 0))
+        heap_pq.insert(Task(i, priority, 0))
+        if (i % 3 == 0):
+            target = rng.randrange(i + 1)
+            if (target in heap_pq):
+                new_priority = last + rng.randint(0, 50)
+                assert radix.decrease_key(target, new_priority) == heap_pq.decrease_key(target, new_priority)
+        if (i % 2 == 0):
+            last = radix.extract_min().priority
+            assert last == heap_pq.extract_min().priority
+    radix.insert(Task("late", last - 10, 0))  # Below the last extracted priority: fallback heap
+    heap_pq.insert(Task("late", last - 10, 0))
+    assert [radix.extract_min().priority for _ in range(len(radix))] == \
+        [heap_pq.extract_min().priority for _ in range(len(heap_pq))]
+
+    # Bounded integer priorities as in test_performance
+    size = 100000
+    priorities = [rng.randint(1, 1000) for _ in range(size)]
+    for name, queue_class in (("MinHeapPriorityQueue", MinHeapPriorityQueue),
+                              ("BucketMinPriorityQueue", BucketMinPriorityQueue),
+                              ("RadixHeapPriorityQueue", RadixHeapPriorityQueue)):
+        pq = queue_class()
+        start = time.perf_counter()
+        for i, priority in enumerate(priorities):
+            pq.insert(Task(i, priority, 0))
+        insert_time = time.perf_counter() - start
+        start = time.perf_counter()
+        for i in range(0, size, 10):
+            pq.decrease_key(i, 0)
+        change_time = time.perf_counter() - start
+        start = time.perf_counter()
+        while not pq.is_empty():
+            pq.extract_min()
+        extract_time = time.perf_counter() - start
+        print(f"{name:24}: insert {insert_time / size * 1e6:.3f}us, decrease_key {change_time / (size // 10) * 1e6:.3f}us, "
+              f"extract_min {extract_time / size * 1e6:.3f}us")
+
+
+def test_stable_tie_break():
+    """Test FIFO extraction of equal priorities and the per-cohort latency of stable mode"""
+    print("\n=== Stable Tie-Breaking ===")
+
+    for queue_class in (MinHeapPriorityQueue, MaxHeapPriorityQueue):
+        for arity in (2, 4):
+            pq = queue_class(arity=arity, tie_break="sequence")
+            pq.insert_many(Task(i, i % 5, 0) for i in range(500))
+            for i in range(500, 1000):
+                pq.insert(Task(i, i % 5, 0))
+            # A key change keeps the original place among equal priorities
+            pq.change_priority(3, 0)
+            pq.change_priority(3, 3)
+            order = [pq.extract().task_id for _ in range(1000)]
+            levels = [[task_id for task_id in order if task_id % 5 == level] for level in range(5)]
+            assert all(level == sorted(level) for level in levels)
+
+    # Arrival times first, then insertion order, also through a key function
+    for kwargs in ({}, {"key": lambda task: str(task.priority)}):
+        pq = MaxHeapPriorityQueue(tie_break="arrival", **kwargs)
+        for task_id, arrival in enumerate([5, 3, 3, 9, 1]):
+            pq.insert(Task(task_id, 7, arrival))
+        pq.insert(Task(9, 8, 0))
+        assert [pq.extract_max().task_id for _ in range(6)] == [9, 4, 1, 2, 0, 3]
+
+    # Lazily removed and re-inserted tasks get a fresh place in line
+    pq = MinHeapPriorityQueue(tie_break="sequence", lazy_remove=True, compaction_threshold=0.3)
+    pq.insert_many(Task(i, 1, 0) for i in range(10))
+    for task_id in (0, 1, 2, 3):
+        pq.remove(task_id)
+    pq.insert(Task(2, 1, 0))
+    assert [pq.extract_min().task_id for _ in range(len(pq))] == [4, 5, 6, 7, 8, 9, 2] and not pq.ties
+
+    try:
+        MinHeapPriorityQueue(tie_break="sequence").insert(Task(1, 0.5, 0))
+        assert False, "float priority packed into an integer key"
+    except TypeError:
+        pass
+
+    # A rejected task leaves a non-empty queue, its tie-breakers and its sequence untouched
+    bad_tasks = {"sequence": [Task(10, 1.5, 0)], "arrival": [Task(10, 1.5, 0), Task(10, 1, -1)]}
+    for tie_break, tasks in bad_tasks.items():
+        pq = MinHeapPriorityQueue(tie_break=tie_break)
+        pq.insert_many(Task(i, 5 - i % 3, i) for i in range(6))
+        sequence = pq.sequence
+        for bad_task in tasks:
+            for insert in (pq.insert, lambda task: pq.insert_many([Task(11, 0, 0), task]),
+                           lambda task: pq.insert_many([Task(i, 0, 0) for i in range(11, 20)] + [task])):
+                try:
+                    insert(bad_task)
+                    assert False, f"{bad_task} packed into an integer key"
+                except TypeError:
+                    pass
+                assert len(pq.heap) == len(pq.keys) == len(pq.ties) == 6 and pq.sequence == sequence
+        try:
+            pq.change_priority(0, 0.5)
+            assert False, "float priority packed into an integer key"
+        except TypeError:
+            assert pq.heap[pq.task_position[0]].priority == 5
+        pq.insert(Task(6, 3, 6))
+        assert [pq.extract_min().task_id for _ in range(len(pq))] == [2, 5, 6, 1, 4, 0, 3]
+
+    # 100k tasks over 1000 priority levels: one extraction per tick and an arrival on
+    # 90% of the ticks, so the backlog drains. Per cohort of arrivals, the wait in ticks
+    # and the places lost to later arrivals of the same priority are reported
+    rng = random.Random(22)
+    size, arrivals, cohort_size = 10000, 90000, 20000
+    priorities = [rng.randint(1, 1000) for _ in range(size + arrivals)]
+    arrives = [rng.random() < 0.9 for _ in range(2 * arrivals)]
+    for tie_break in (None, "sequence"):
+        pq = MinHeapPriorityQueue(tie_break=tie_break)
+        arrived, served = {}, {}  # Tasks per priority level so far
+        rank = []  # Arrival rank of each task within its priority level
+        for task_id, priority in enumerate(priorities):
+            rank.append(arrived.get(priority, 0))
+            arrived[priority] = rank[-1] + 1
+
+        pq.insert_many(Task(i, priorities[i], 0) for i in range(size))
+        waits, lost = {}, {}
+        next_id, tick = size, 0
+        start = time.perf_counter()
+        while (not pq.is_empty()):
+            if (next_id < size + arrivals and arrives[tick]):
+                pq.insert(Task(next_id, priorities[next_id], tick))
+                next_id += 1
+            task = pq.extract_min()
+            cohort = task.task_id // cohort_size
+            served_rank = served.get(task.priority, 0)
+            served[task.priority] = served_rank + 1
+            waits.setdefault(cohort, LatencyHistogram()).record(tick - task.arrival_time)
+            lost.setdefault(cohort, LatencyHistogram()).record(max(served_rank - rank[task.task_id], 0))
+            tick += 1
+        elapsed = time.perf_counter() - start
+        print(f"tie_break={tie_break!s:8}: {elapsed / tick * 1e6:.3f}us per tick")
+        for cohort in sorted(waits):
+            wait, places = waits[cohort].snapshot(), lost[cohort].snapshot()
+            print(f"  tasks {cohort * cohort_size:>5}+: wait p99 {wait['p99']:>5}, max {wait['max']:>5} ticks; "
+                  f"places lost p99 {places['p99']:>2}, max {places['max']:>2}")
+        if (tie_break):
+            assert all(places.max == 0 for places in lost.values())
+
+
+def test_aging_queue():
+    """Test aging without per-task updates, the ceiling and the starvation bound"""
+    print("\n=== Priority Aging ===")
+
+    pq = AgingPriorityQueue(rate=2, ceiling=50)
+    pq.insert_many([Task("old", 10, 0), Task("new", 30, 8), Task("urgent", 60, 9)])
+    pq.advance(12)
+    assert sorted(pq.effective_priority(task) for task in pq.aging.heap + pq.urgent.heap) == [34, 38, 60]
+    assert pq.peek().task_id == "urgent" and pq.extract_max().task_id == "urgent"
+    assert pq.extract_max().task_id == "new"
+    pq.advance(100)
+    assert pq.effective_priority(pq.peek()) == 50  # Capped at the ceiling
+    assert pq.increase_key("old", 70) and pq.peek().priority == 70 and "old" in pq.urgent
+    assert pq.decrease_key("old", 5) and "old" in pq.aging and not pq.decrease_key("old", 6)
+    assert pq.remove("old") and pq.is_empty()
+
+    # Sustained higher priority load: every tick one task of priority 50 arrives and one
+    # task is served. A plain max-heap never serves the priority 1 task
+    rate, ceiling, ticks = 0.5, 100, 1000
+    plain, aged = MaxHeapPriorityQueue(), AgingPriorityQueue(rate=rate, ceiling=ceiling)
+    for pq in (plain, aged):
+        pq.insert(Task("low", 1, 0))
+        pq.insert_many(Task(("backlog", i), 50, 0) for i in range(20))
+    served = {}
+    for tick in range(ticks):
+        aged.advance(tick)
+        for pq in (plain, aged):
+            pq.insert(Task(tick, 50, tick))
+            if (pq.extract_max().task_id == "low"):
+                served[pq] = tick
+    assert plain not in served and served[aged] <= 20 + (ceiling - 1) / rate
+    print(f"Priority 1 task served at tick {served[aged]} with aging, never without")
+
+    # Cost per tick: O(1) clock advance against increase_key on every queued task
+    size = 20000
+    tasks = [Task(i, random.randint(1, 1000), 0) for i in range(size)]
+    rescan = MaxHeapPriorityQueue.from_tasks(Task(task.task_id, task.priority, 0) for task in tasks)
+    start = time.perf_counter()
+    for tick in range(1, 4):
+        for task in list(rescan.heap):
+            rescan.increase_key(task.task_id, task.priority + 1)
+    rescan_time = (time.perf_counter() - start) / 3
+    aged = AgingPriorityQueue.from_tasks(tasks, rate=1)
+    start = time.perf_counter()
+    for tick in range(1, 1001):
+        aged.advance(tick)
+    advance_time = (time.perf_counter() - start) / 1000
+    print(f"Aging {size} tasks per tick: increase_key rescan {rescan_time * 1e3:.2f}ms, advance() {advance_time * 1e6:.3f}us")
+
+
+def test_fair_scheduler():
+    """Test weighted shares, lazy tenant creation and dropping, and scaling to 10k tenants"""
+    print("\n=== Weighted Fair Scheduler ===")
+
+    weights = {tenant: tenant % 4 + 1 for tenant in range(40)}
+    scheduler = FairScheduler(weights=weights)
+    for tenant in weights:
+        scheduler.insert_many(tenant, (Task(i, random.randint(1, 1000), 0) for i in range(100)))
+    served = {}
+    last_priority = {}
+    for _ in range(1000):
+        tenant, task = scheduler.dispatch()
+        served[tenant] = served.get(tenant, 0) + 1
+        assert task.priority >= last_priority.get(tenant, 0)  # Each tenant's tasks in priority order
+        last_priority[tenant] = task.priority
+    # Backlogged tenants are served in proportion to their weights (40 tenants, total weight 100)
+    assert all(abs(served[tenant] - 10 * weight) <= 1 for tenant, weight in weights.items())
+
+    # Tenants are dropped once empty and start from the current virtual time when they return
+    assert scheduler.remove(0, next(iter(scheduler.queue_of(0).task_position)))
+    while (0 in scheduler):
+        scheduler.remove(0, next(iter(scheduler.queue_of(0).task_position)))
+    scheduler.insert_many(0, (Task(i, 1, 0) for i in range(50)))
+    assert sum(scheduler.dispatch()[0] == 0 for _ in range(100)) <= 2  # No banked credit
+    while not scheduler.is_empty():
+        scheduler.dispatch()
+    assert not scheduler.queues and scheduler.tenants.is_empty() and scheduler.dispatch() is None
+
+    # Dispatch cost against picking the tenant with the smallest pass by scanning all of them
+    tasks_total = 100000
+    for tenants in (100, 1000, 10000):
+        per_tenant = tasks_total // tenants
+        scheduler = FairScheduler(weights={tenant: tenant % 4 + 1 for tenant in range(tenants)})
+        for tenant in range(tenants):
+            scheduler.insert_many(tenant, (Task(i, random.randint(1, 1000), 0) for i in range(per_tenant)))
+        queues = {tenant: MinHeapPriorityQueue.from_tasks(Task(i, 1, 0) for i in range(per_tenant))
+                  for tenant in range(tenants)}
+        passes = {tenant: scheduler.stride(tenant) for tenant in range(tenants)}
+
+        start = time.perf_counter()
+        while not scheduler.is_empty():
+            scheduler.dispatch()
+        heap_time = (time.perf_counter() - start) / tasks_total
+
+        scans = 2000
+        start = time.perf_counter()
+        for _ in range(scans):
+            tenant = min(passes, key=passes.get)
+            queues[tenant].extract_min()
+            passes[tenant] += scheduler.stride(tenant)
+        scan_time = (time.perf_counter() - start) / scans
+        print(f"{tenants:>5} tenants: tenant heap {heap_time * 1e6:.3f}us/dispatch, "
+              f"scan {scan_time * 1e6:.3f}us/dispatch ({scan_time / heap_time:.1f}x)")
+
+
+def test_apply_batch():
+    """Test columnar batches of mixed operations against the same calls made one by one"""
+    print("\n=== Batched Operations ===")
+
+    def apply_one_by_one(pq, op_codes, task_ids, priorities):
+        extracted = []
+        for op, task_id, priority in zip(op_codes, task_ids, priorities):
+            if (op == OP_INSERT):
+                pq.insert(Task(task_id, priority, 0))
+            elif (op == OP_CHANGE_PRIORITY):
+                pq.change_priority(task_id, priority)
+            elif (op == OP_DECREASE_KEY):
+                pq.decrease_key(task_id, priority)
+            elif (op == OP_INCREASE_KEY):
+                pq.increase_key(task_id, priority)
+            elif (op == OP_REMOVE):
+                pq.remove(task_id)
+            else:
+                extracted.append(pq.extract())
+        return extracted
+
+    pq = MinHeapPriorityQueue()
+    extracted = pq.apply_batch(
+        array("b", [OP_INSERT, OP_INSERT, OP_INSERT, OP_DECREASE_KEY, OP_DECREASE_KEY, OP_INCREASE_KEY, OP_EXTRACT,
+                    OP_REMOVE, OP_EXTRACT, OP_EXTRACT]),
+        array("q", [1, 2, 3, 3, 3, 2, 0, 2, 0, 0]),
+        array("q", [5, 6, 7, 4, 6, 9, 0, 0, 0, 0]))
+    assert [task and task.task_id for task in extracted] == [3, 1, None] and pq.is_empty()
+    for columns in (([OP_INSERT], [1], []), ([9], [1], [1])):
+        try:
+            pq.apply_batch(*columns)
+            assert False, "invalid batch accepted"
+        except ValueError:
+            pass
+
+    # Invalid operation codes are rejected before any operation is applied
+    pq = MinHeapPriorityQueue.from_tasks(Task(i, i, 0) for i in range(10))
+    try:
+        pq.apply_batch([OP_CHANGE_PRIORITY, OP_INSERT, 9], [9, 100, 0], [-1, -5, 0])
+        assert False, "unknown operation code accepted"
+    except ValueError:
+        pass
+    assert pq.peek().task_id == 0 and pq.peek().priority == 0 and len(pq) == 10
+
+    # A batch failing partway leaves the operations before the failure applied, heap intact
+    try:
+        pq.apply_batch([OP_CHANGE_PRIORITY, OP_INSERT, OP_DECREASE_KEY], [9, 100, 3], [-1, -5, "x"])
+        assert False, "incomparable priority accepted"
+    except TypeError:
+        pass
+    assert len(pq) == 11 and [pq.extract_min().task_id for _ in range(3)] == [100, 9, 0]
+
+    # Inserting the same id twice keeps both tasks, as two insert() calls do
+    pq = MinHeapPriorityQueue()
+    pq.apply_batch([OP_INSERT, OP_INSERT], [7, 7], [3, 1])
+    assert len(pq) == 2 and sorted(pq.keys) == [1, 3]
+
+    # Random batches with ties broken by insertion order, so results must match exactly
+    rng = random.Random(25)
+    for trial in range(60):
+        kwargs = {"tie_break": "sequence", "lazy_remove": trial % 3 == 0, "arity": 2 + trial % 2}
+        queue_class = MinHeapPriorityQueue if trial % 2 else MaxHeapPriorityQueue
+        batch_pq, single_pq = queue_class(**kwargs), queue_class(**kwargs)
+        next_id = 0
+        for _ in range(4):
+            op_codes, task_ids, priorities, removed = [], [], [], []
+            for _ in range(rng.randint(0, 400)):
+                op = rng.choice([OP_INSERT] * 4 + [OP_CHANGE_PRIORITY, OP_DECREASE_KEY, OP_INCREASE_KEY] * 2
+                                + [OP_REMOVE, OP_EXTRACT])
+                if (op == OP_INSERT or not next_id):
+                    # Re-insert a task removed earlier in the batch now and then
+                    task_id = removed.pop() if removed and rng.random() < 0.2 else next_id
+                    next_id += task_id == next_id
+                    op = OP_INSERT
+                else:
+                    task_id = rng.randrange(next_id + 1)
+                    if (op == OP_REMOVE and task_id < next_id and task_id not in removed):
+                        removed.append(task_id)
+                op_codes.append(op)
+                task_ids.append(task_id)
+                priorities.append(rng.randint(1, 30))
+            expected = apply_one_by_one(single_pq, op_codes, task_ids, priorities)
+            assert [task and task.task_id for task in batch_pq.apply_batch(op_codes, task_ids, priorities)] == \
+                [task and task.task_id for task in expected]
+        assert [task.task_id for task in (batch_pq.extract() for _ in range(len(batch_pq)))] == \
+            [task.task_id for task in (single_pq.extract() for _ in range(len(single_pq)))]
+
+    # Reprioritizing most of the heap rebuilds it instead of sifting every task
+    batch_pq = MinHeapPriorityQueue.from_tasks((Task(i, i % 50, 0) for i in range(1000)), tie_break="sequence")
+    single_pq = MinHeapPriorityQueue.from_tasks((Task(i, i % 50, 0) for i in range(1000)), tie_break="sequence")
+    op_codes = [OP_CHANGE_PRIORITY] * 900 + [OP_EXTRACT] * 10
+    task_ids = [(i * 7) % 1000 for i in range(900)] + [0] * 10
+    priorities = [rng.randint(1, 30) for _ in range(910)]
+    assert [task.task_id for task in batch_pq.apply_batch(op_codes, task_ids, priorities)] == \
+        [task.task_id for task in apply_one_by_one(single_pq, op_codes, task_ids, priorities)]
+
+    # One tick of the dispatcher, as separate calls and as a single batch
+    for size, tick, extract_share in ((100000, 5000, 0.01), (100000, 5000, 0.2), (10000, 20000, 0.0),
+                                      (100000, 100000, None)):
+        priorities = [rng.randint(1, 10 ** 6) for _ in range(size)]
+        op_codes, task_ids, batch_priorities = [], [], []
+        next_id = size
+        for _ in range(tick):
+            r = rng.random()
+            if (extract_share is None):
+                # Every task gets a new priority
+                op_codes.append(OP_CHANGE_PRIORITY)
+                task_ids.append(len(task_ids))
+            elif (r < extract_share):
+                op_codes.append(OP_EXTRACT)
+                task_ids.append(0)
+            elif (r < 0.5):
+                op_codes.append(OP_INSERT)
+                task_ids.append(next_id)
+                next_id += 1
+            else:
+                # Repeated key changes to a hot set of tasks
+                op_codes.append(OP_DECREASE_KEY)
+                task_ids.append(rng.randrange(2000))
+            batch_priorities.append(rng.randint(1, 10 ** 6))
+
+        def filled():
+            return MinHeapPriorityQueue.from_tasks(Task(i, priority, 0) for i, priority in enumerate(priorities))
+
+        one_by_one = measure(lambda pq: apply_one_by_one(pq, op_codes, task_ids, batch_priorities), filled,
+                             ops=tick, warmup=1, trials=5).median_ns
+        batched = measure(lambda pq: pq.apply_batch(op_codes, task_ids, batch_priorities), filled,
+                          ops=tick, warmup=1, trials=5).median_ns
+        mix = "all reprioritized" if extract_share is None else f"{extract_share:>4.0%} extracts"
+        print(f"heap {size:>6}, tick {tick:>6} ops, {mix:>17}: one by one {one_by_one / 1e3:.3f}us/op, "
+              f"apply_batch {batched / 1e3:.3f}us/op ({one_by_one / batched:.2f}x)")
+
+
+def test_instrumentation():
+    """Test operation counters, histograms and export of instrumented queues"""
+    print("\n=== Instrumentation ===")
+
+    max_pq = MaxHeapPriorityQueue(lazy_remove=True)
+    exported = []
+    metrics = instrument(max_pq, HeapMetrics(export_every=500))
+    metrics.add_exporter(exported.append)
+    assert type(max_pq) is not MaxHeapPriorityQueue and isinstance(max_pq, MaxHeapPriorityQueue)
+
+    for i in range(1000):
+        max_pq.insert(Task(i, random.randint(1, 1000), 0))
+    for i in range(50):
+        max_pq.increase_key(i, 2000 + i)
+    for i in range(50, 700):  # Lazy removals compact the heap through build_heap()
+        max_pq.remove(i)
+    assert [max_pq.extract_max().task_id for _ in range(50)] == list(range(49, -1, -1))
+    priorities = [max_pq.extract_max().priority for _ in range(len(max_pq))]
+    assert priorities == sorted(priorities, reverse=True)
+
+    snapshot = metrics.snapshot()
+    operations = snapshot["operations"]
+    # increase_key runs change_priority internally, only the outer call is recorded
+    assert operations["increase_key"]["count"] == 50 and "change_priority" not in operations
+    assert operations["insert"]["count"] == 1000 and operations["extract_max"]["count"] == 350
+    assert operations["extract_max"]["comparisons"] > 0 and operations["extract_max"]["sift_depth"]["max"] >= 1
+    latency = operations["insert"]["latency_ns"]
+    assert latency["min"] <= latency["p50"] <= latency["p99"] <= latency["max"]
+    assert len(exported) == 4 and snapshot["gauges"]["size"] == 0
+    print("Extract comparisons per op:", round(operations["extract_max"]["comparisons_per_op"], 2))
+
+    uninstrument(max_pq)
+    assert type(max_pq) is MaxHeapPriorityQueue and type(max_pq.task_position) is dict
+
+    histogram = LatencyHistogram(significant_bits=4)
+    for value in range(1, 1001):
+        histogram.record(value)
+    assert abs(histogram.percentile(50) - 500) <= 500 / 8 and histogram.percentile(100) <= 1000
+
+
+def test_benchmark_harness():
+    """Test the statistics, result files and regression check of the benchmark harness"""
+    print("\n=== Benchmark Harness ===")
+
+    result = BenchmarkResult("case", {"size": 10}, [500, 100, 300, 200, 400], ops=10)
+    assert result.median_ns == 30 and result.q1_ns == 20 and result.q3_ns == 40 and result.iqr_ns == 20
+    assert result.ci_low_ns <= result.median_ns <= result.ci_high_ns
+    assert result.case_id == "case[size=10]"
+
+    calls = []
+    measured = measure(calls.append, setup=lambda: 1, name="noop", warmup=2, trials=5)
+    assert len(calls) == 7 and len(measured.samples_ns) == 5 and gc.isenabled()
+
+    baseline = [BenchmarkResult("op", {"size": 1}, [100, 101, 102, 103, 104]),
+                BenchmarkResult("other", {}, [100, 101, 102, 103, 104])]
+    current = [BenchmarkResult("op", {"size": 1}, [150, 151, 152, 153, 154]),
+               BenchmarkResult("other", {}, [90, 99, 104, 110, 120])]
+
+    directory = tempfile.mkdtemp()
+    try:
+        for extension, write in (("json", write_json), ("csv", write_csv)):
+            path = os.path.join(directory, f"baseline.{extension}")
+            write(baseline, path)
+            loaded = load_results(path)
+            assert [r.case_id for r in loaded] == ["op[size=1]", "other"]
+            assert loaded[0].median_ns == 102
+
+            statuses = {row[0]: row[4] for row in compare_results(loaded, current, threshold=0.1)}
+            assert statuses == {"op[size=1]": "regression", "other": "ok"}
+    finally:
+        shutil.rmtree(directory)
+    print("Regression flagged:", statuses)
+
+
 def test_performance():
     """Test average time per operation for different queue sizes"""
     print("\n=== Performance Testing ===")
@@ -105,45 +1341,60 @@ def test_performance():
     for size in sizes:
         print(f"\n-- Queue Size: {size} --")
 
-        tasks = [Task(i, random.randint(1, 1000), 0) for i in range(size)]
+        priorities = [random.randint(1, 1000) for _ in range(size)]
+
+        def tasks():
+            return [Task(i, priority, 0) for i, priority in enumerate(priorities)]
+
+        def timed(func, setup, ops):
+            """Median time per operation in milliseconds over repeated runs"""
+            return measure(func, setup, ops=ops, warmup=1, trials=3).median_ns / 1e6
 
         # MinHeap
-        min_pq = MinHeapPriorityQueue()
+        def insert_min(state):
+            min_pq = MinHeapPriorityQueue()
+            for task in state:
+                min_pq.insert(task)
 
-        start = time.time()
-        for task in tasks:
-            min_pq.insert(task)
-        avg_insert = (time.time() - start) / size * 1000
+        def decrease(min_pq):
+            for i in range(100):
+                min_pq.decrease_key(i, 1)
 
-        start = time.time()
-        for i in range(100):
-            min_pq.decrease_key(i, 1)
-        avg_decrease = (time.time() - start) / 100 * 1000
+        def extract_min(min_pq):
+            for _ in range(size):
+                min_pq.extract_min()
 
-        start = time.time()
-        for _ in range(size):
-            min_pq.extract_min()
-        avg_extract = (time.time() - start) / size * 1000
+        def filled_min():
+            return MinHeapPriorityQueue.from_tasks(tasks())
 
+        avg_insert = timed(insert_min, tasks, size)
+        avg_bulk = timed(MinHeapPriorityQueue.from_tasks, tasks, size)
+        avg_decrease = timed(decrease, filled_min, 100)
+        avg_extract = timed(extract_min, filled_min, size)
+
+        print(f"MinHeap - Bulk load: {avg_bulk:.4f}ms/op")
         print(f"MinHeap - Insert: {avg_insert:.4f}ms/op, Decrease: {avg_decrease:.4f}ms/op, Extract: {avg_extract:.4f}ms/op")
 
         # MaxHeap
-        max_pq = MaxHeapPriorityQueue()
+        def insert_max(state):
+            max_pq = MaxHeapPriorityQueue()
+            for task in state:
+                max_pq.insert(task)
+
+        def increase(max_pq):
+            for i in range(100):
+                max_pq.increase_key(i, 1000)
 
-        start = time.time()
-        for task in tasks:
-            max_pq.insert(task)
-        avg_insert = (time.time() - start) / size * 1000
+        def extract_max(max_pq):
+            for _ in range(size):
+                max_pq.extract_max()
 
-        start = time.time()
-        for i in range(100):
-            max_pq.increase_key(i, 1000)
-        avg_increase = (time.time() - start) / 100 * 1000
+        def filled_max():
+            return MaxHeapPriorityQueue.from_tasks(tasks())
 
-        start = time.time()
-        for _ in range(size):
-            max_pq.extract_max()
-        avg_extract = (time.time() - start) / size * 1000
+        avg_insert = timed(insert_max, tasks, size)
+        avg_increase = timed(increase, filled_max, 100)
+        avg_extract = timed(extract_max, filled_max, size)
 
         print(f"MaxHeap - Insert: {avg_insert:.4f}ms/op, Increase: {avg_increase:.4f}ms/op, Extract: {avg_extract:.4f}ms/op")
 
@@ -151,4 +1402,27 @@ def test_performance():
 if __name__ == "__main__":
     test_basic_operations()
     test_priority_changes()
+    test_bulk_operations()
+    test_custom_keys()
+    test_arity()
+    test_arity_benchmark()
+    test_remove()
+    test_thread_safe_queue()
+    test_thread_safe_contention()
+    test_async_queue()
+    test_sharded_queue()
+    test_deadline_scheduler()
+    test_persistent_queue()
+    test_meldable_heaps()
+    test_meldable_benchmark()
+    test_compact_queue()
+    test_compact_memory()
+    test_indexed_queue()
+    test_bucket_queue()
+    test_stable_tie_break()
+    test_aging_queue()
+    test_fair_scheduler()
+    test_apply_batch()
+    test_instrumentation()
+    test_benchmark_harness()
     test_performance()